@@ -8,6 +8,7 @@ from ovos_utils.xdg_utils import xdg_data_home
 
 from ovos_classifiers.heuristics.corefiob import CorefIOBTags, CorefIOBHeuristicTagger
 from ovos_classifiers.utils import load_tagger
+from ovos_classifiers.utils.registry import MODEL_REGISTRY, model_file_size
 
 # TODO - benchmark and choose based on performance/model size
 # TODO - ensure all langs have 1 model
@@ -21,30 +22,30 @@ class OVOSCorefIOBTagger:
     _XDG_PATH = f"{xdg_data_home()}/OpenVoiceOS/classifiers"
     _BASE_METADATA_URL = "https://github.com/OpenVoiceOS/ovos-classifiers/raw/dev/models/metadata"
     _BASE_MODEL_URL = "https://github.com/OpenVoiceOS/ovos-classifiers/raw/dev/models/corefiob"
-    makedirs(_XDG_PATH, exist_ok=True)
 
     def __init__(self, model_id=None):
         config_core = Configuration()
+        self.lang = config_core.get("lang", "en-us")
         self.config = config_core.get("classifiers", {}).get("corefiob", {})
         model_id = model_id or self.config.get("model_id") or "corefiob_heuristic"
         if model_id in _LANGDEFAULTS:
             model_id = _LANGDEFAULTS.get(model_id)
         self.model_id = model_id
-        self.meta, self.clf = self.load_model(self.model_id)
+        self.meta, self.clf = self.load_model(self.model_id, self.lang)
 
     @property
     def tagset(self):
         return self.meta.get("tagset") or "CorefIOBTags"
 
     @classmethod
-    def get_model(cls, model_id):
+    def get_model(cls, model_id, lang=None):
         if model_id in _LANGDEFAULTS:
             model_id = _LANGDEFAULTS.get(model_id)
 
         if model_id == "corefiob_heuristic":
             return {"model_id": "corefiob_heuristic",
                     "tagset": "CorefIOBTags",
-                    "lang": Configuration().get("lang", "en-us"),
+                    "lang": lang or Configuration().get("lang", "en-us"),
                     "algo": "heuristic"}, CorefIOBHeuristicTagger
 
         meta_path = f"{cls._XDG_PATH}/{model_id}.json"
@@ -52,6 +53,7 @@ class OVOSCorefIOBTagger:
             with open(meta_path) as f:
                 meta = json.load(f)
         else:
+            makedirs(cls._XDG_PATH, exist_ok=True)
             url = f"{cls._BASE_METADATA_URL}/{model_id}.json"
             meta = requests.get(url).json()
             with open(meta_path, "wb") as f:
@@ -59,6 +61,7 @@ class OVOSCorefIOBTagger:
 
         model_path = f"{cls._XDG_PATH}/{model_id}.pkl"
         if not isfile(model_path):
+            makedirs(cls._XDG_PATH, exist_ok=True)
             url = f"{cls._BASE_MODEL_URL}/{model_id}.pkl"
             model = requests.get(url).content
             with open(model_path, "wb") as f:
@@ -67,13 +70,27 @@ class OVOSCorefIOBTagger:
         return meta, model_path
 
     @classmethod
-    def load_model(cls, model_id):
-        data, model_path = cls.get_model(model_id)
-        return load_tagger(data, model_path)
+    def load_model(cls, model_id, lang=None):
+        # models are shared process wide, see utils.registry
+        # instances pass the lang resolved once at construction
+        lang = lang or Configuration().get("lang", "en-us")
+        return MODEL_REGISTRY.get_or_load(("corefiob", model_id, lang),
+                                          lambda: cls._load_model(model_id, lang))
+
+    @classmethod
+    def _load_model(cls, model_id, lang):
+        data, model_path = cls.get_model(model_id, lang)
+        return load_tagger(data, model_path), model_file_size(model_path)
 
     def iob_tag(self, postagged_tokens):
         return self.clf.tag(postagged_tokens)
 
+    def iob_tag_batch(self, postagged_sentences):
+        """ iob tag a list of postagged sentences, batched when the model supports it """
+        if hasattr(self.clf, "tag_sents"):
+            return self.clf.tag_sents(postagged_sentences)
+        return [self.clf.tag(s) for s in postagged_sentences]
+
     @staticmethod
     def normalize_corefs(iobtagged_tokens):
         return CorefIOBHeuristicTagger.normalize_corefs(iobtagged_tokens)
@@ -2,11 +2,11 @@ import random
 from os import makedirs
 from os.path import isfile
 
-import nltk
 import requests
-from nltk.corpus import treebank
 from ovos_utils.xdg_utils import xdg_data_home
 
+from ovos_classifiers.utils.nltk_resources import ensure_resource
+
 
 def _tagged_to_dataset(tagged_sentences):
     X, y = [], []
@@ -129,7 +129,8 @@ def get_utterance_tags_trainset():
 
 # Treebank
 def get_treebank_tagged_sents(udep=False):
-    nltk.download('treebank')
+    from nltk.corpus import treebank
+    ensure_resource('treebank')
     if udep:
         corpus = list(treebank.tagged_sents(tagset="universal"))
     else:
@@ -154,7 +155,8 @@ def get_treebank_trainset(udep=False):
 
 # Brown
 def get_brown_tagged_sents(udep=False):
-    nltk.download('treebank')
+    from nltk.corpus import treebank
+    ensure_resource('treebank')
     if udep:
         corpus = list(treebank.tagged_sents(tagset="universal"))
     else:
@@ -0,0 +1,121 @@
+import csv
+import random
+import sys
+from collections import Counter
+
+
+class CSVDataset:
+    """ (utterance, label) samples from one or more csv files, read lazily
+
+    the first column is the label, the remaining columns are the utterance,
+    commas inside utterances are kept even if the field is not quoted
+
+    nothing is kept in memory, every iteration reads the files again,
+    use batches() to feed out-of-core learners (partial_fit)
+    """
+
+    def __init__(self, csv_paths, header=True):
+        if isinstance(csv_paths, str):
+            csv_paths = [csv_paths]
+        self.csv_paths = list(csv_paths)
+        self.header = header
+
+    def __iter__(self):
+        for csv_path in self.csv_paths:
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                if self.header:
+                    next(reader, None)
+                for row in reader:
+                    if len(row) < 2:  # empty line / no label
+                        continue
+                    yield ",".join(row[1:]).strip(), row[0].strip()
+
+    def batches(self, batch_size=1000):
+        """ yield (X, y) lists of up to batch_size samples """
+        X, y = [], []
+        for utt, label in self:
+            X.append(utt)
+            y.append(label)
+            if len(X) >= batch_size:
+                yield X, y
+                X, y = [], []
+        if X:
+            yield X, y
+
+    def to_lists(self):
+        """ load all samples, returns X, y """
+        X, y = [], []
+        for utt, label in self:
+            X.append(utt)
+            y.append(label)
+        return X, y
+
+    def utterances(self):
+        """ re-iterable view of the utterances, read from disk on every pass
+
+        sklearn vectorizers accept any iterable of strings, pass this
+        instead of a list to avoid keeping the whole corpus in memory """
+        return _Column(self, 0)
+
+    def labels(self):
+        """ list of labels, interned so repeated labels share one string """
+        return [sys.intern(label) for _, label in self]
+
+    def label_counts(self):
+        return Counter(label for _, label in self)
+
+    @property
+    def classes(self):
+        """ sorted labels, needed by partial_fit on the first batch """
+        return sorted(self.label_counts())
+
+    def train_test_split(self, test_size=0.6, random_state=None):
+        """ stratified split, returns (train, test) datasets
+
+        each label gets round(count * test_size) test samples (at least one
+        on each side when possible and 0 < test_size < 1), sampled uniformly without replacement.
+        counting labels takes one pass over the files, the utterances are
+        not kept in memory but the positions of the test samples are, a set
+        of ints per label, so memory is still O(n) (roughly 60 bytes per
+        test sample, ~30MB for 1M rows with test_size=0.5) """
+        rng = random.Random(random_state)
+        test_positions = {}
+        for label, count in sorted(self.label_counts().items()):
+            k = round(count * test_size)
+            if 0 < test_size < 1 and count > 1:
+                k = min(max(k, 1), count - 1)
+            test_positions[label] = set(rng.sample(range(count), k))
+        return (_CSVSplit(self, test_positions, test=False),
+                _CSVSplit(self, test_positions, test=True))
+
+
+class _CSVSplit(CSVDataset):
+    """ one side of CSVDataset.train_test_split, also read lazily """
+
+    def __init__(self, dataset, test_positions, test):
+        super().__init__(dataset.csv_paths, dataset.header)
+        self.dataset = dataset
+        self.test_positions = test_positions
+        self.test = test
+
+    def __iter__(self):
+        # position of each sample among the samples with the same label
+        seen = Counter()
+        for utt, label in self.dataset:
+            pos = seen[label]
+            seen[label] += 1
+            if (pos in self.test_positions.get(label, ())) == self.test:
+                yield utt, label
+
+
+class _Column:
+    """ one column of a CSVDataset, see CSVDataset.utterances """
+
+    def __init__(self, dataset, idx):
+        self.dataset = dataset
+        self.idx = idx
+
+    def __iter__(self):
+        for sample in self.dataset:
+            yield sample[self.idx]
@@ -1,10 +1,10 @@
-import nltk
 from nltk.corpus import wordnet as wn
 
+from ovos_classifiers.utils.nltk_resources import ensure_resources
+
 
 class Wordnet:
-    nltk.download("wordnet")
-    nltk.download('omw-1.4')
+    ensure_resources("wordnet", "omw-1.4")
 
     @staticmethod
     def get_synsets(word, pos=wn.NOUN):
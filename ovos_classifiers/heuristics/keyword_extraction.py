@@ -5,9 +5,8 @@ from enum import Enum
 from itertools import chain, groupby, product
 from typing import Callable, DefaultDict, Dict, List, Optional, Set, Tuple
 
-import nltk
-
 from ovos_classifiers.heuristics.postag import NltkPostag
+from ovos_classifiers.utils.nltk_resources import ensure_resource
 
 
 class HeuristicExtractor:
@@ -152,7 +151,8 @@ class Rake:
         :param word_tokenizer: Tokenizer used to tokenize the sentence string into words.
         """
 
-        nltk.download("stopwords")
+        import nltk
+        ensure_resource("stopwords")
         self.langs = {
             "en": "english",
             "ar": "arabic",
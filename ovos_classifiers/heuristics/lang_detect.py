@@ -4,13 +4,15 @@ import os
 import pickle
 import typing
 
-import nltk
 from nltk.corpus import udhr
 from ovos_utils.xdg_utils import xdg_data_home
 
+from ovos_classifiers.utils.nltk_resources import ensure_resource
+
 
 class LMLangClassifier:
     def __init__(self, path=None):
+        self._compiled = None
         if path:
             with open(path, "rb") as f:
                 self.language_models = pickle.load(f)
@@ -18,6 +20,58 @@ class LMLangClassifier:
         else:
             self.fit()
 
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_compiled"] = None
+        return state
+
+    def __setstate__(self, state):
+        # pickles from before the compiled mode stored language_models directly
+        if "language_models" in state:
+            state["_language_models"] = state.pop("language_models")
+        state["_compiled"] = None
+        self.__dict__.update(state)
+
+    @property
+    def language_models(self):
+        return self._language_models
+
+    @language_models.setter
+    def language_models(self, models):
+        self._language_models = models
+        self._compiled = None  # recompiled on next predict
+
+    def compile(self):
+        """ intern the ngram vocabulary and store the language models
+        as a sparse matrix with unit norm rows, so a batch of texts
+        can be scored with a single matrix product"""
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        langs = list(self.language_models)
+        vocab = {}
+        rows, cols, vals = [], [], []
+        for idx, lang in enumerate(langs):
+            for ng, prob in self.language_models[lang].items():
+                rows.append(idx)
+                cols.append(vocab.setdefault(ng, len(vocab)))
+                vals.append(prob)
+        matrix = csr_matrix((np.array(vals, dtype=np.float64), (rows, cols)),
+                            shape=(len(langs), len(vocab)))
+        norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+        norms[norms == 0] = 1.0
+        matrix = csr_matrix(matrix.multiply(1 / norms[:, None]))
+        self._compiled = (langs, vocab, matrix.T.tocsr(), norms)
+        return self
+
+    @property
+    def norms(self):
+        """ precomputed L2 norm of each language model """
+        if self._compiled is None:
+            self.compile()
+        langs, _, _, norms = self._compiled
+        return dict(zip(langs, norms.tolist()))
+
     def fit(self, save=True):
         model = f"{xdg_data_home()}/ovos-classifiers/lang_lms.pkl"
         os.makedirs(os.path.dirname(model), exist_ok=True)
@@ -25,9 +79,10 @@ class LMLangClassifier:
             with open(model, "rb") as f:
                 self.language_models = pickle.load(f)
             print(f"lang models loaded from {model}")
+            self.compile()
             return model
 
-        nltk.download('udhr')  # udhr = Universal Declaration of Human Rights
+        ensure_resource('udhr')  # udhr = Universal Declaration of Human Rights
         languages = ['en', 'de', 'nl', 'fr', 'it', 'es', "pt", "no", "ca", "da", "fi", "sw"]
         language_ids = ['English-Latin1', 'German_Deutsch-Latin1', 'Dutch_Nederlands-Latin1', 'French_Francais-Latin1',
                         'Italian_Italiano-Latin1', 'Spanish_Espanol-Latin1', 'Portuguese_Portugues-Latin1',
@@ -42,6 +97,7 @@ class LMLangClassifier:
             with open(model, "wb") as f:
                 pickle.dump(self.language_models, f)
             print(f"lang models saved to {model}")
+        self.compile()
         return model
 
     @staticmethod
@@ -115,10 +171,44 @@ class LMLangClassifier:
             n_vals: a list of n_gram sizes to extract to build a model of the test
             text; ideally reflect the n_gram sizes used in 'language_models'
         """
-        text_model = self.build_model(text, n_vals)
-        scores = {m: self.calculate_cosine(self.language_models[m], text_model)
-                  for m in self.language_models}
-        return scores
+        return self.predict_batch([text], n_vals)[0]
+
+    def predict_batch(self,
+                      texts: typing.List[str],
+                      n_vals=range(1, 4)
+                      ) -> typing.List[typing.Dict[str, float]]:
+        """
+        Score a list of texts against every language model,
+        returns a list of {lang: cosine} dicts, one per text
+        """
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        if self._compiled is None:
+            self.compile()
+        langs, vocab, matrix, _ = self._compiled
+
+        indptr = [0]
+        cols, vals = [], []
+        text_norms = np.zeros(len(texts))
+        for i, text in enumerate(texts):
+            counts = collections.Counter(self.extract_xgrams(text, n_vals))
+            # cosine is scale invariant, raw counts can be used instead of
+            # probabilities, ngrams missing from the vocab only count for the norm
+            text_norms[i] = math.sqrt(sum(c * c for c in counts.values()))
+            for ng, c in counts.items():
+                col = vocab.get(ng)
+                if col is not None:
+                    cols.append(col)
+                    vals.append(c)
+            indptr.append(len(cols))
+        X = csr_matrix((np.array(vals, dtype=np.float64), cols, indptr),
+                       shape=(len(texts), len(vocab)))
+
+        scores = (X @ matrix).toarray()
+        text_norms[text_norms == 0] = 1.0  # no ngrams, all scores are 0
+        scores /= text_norms[:, None]
+        return [dict(zip(langs, row)) for row in scores.tolist()]
 
 
 if __name__ == "__main__":
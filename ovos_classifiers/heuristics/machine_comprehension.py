@@ -1,4 +1,10 @@
+import heapq
 import math
+import os
+import pickle
+
+import numpy as np
+
 from ovos_classifiers.heuristics.tokenize import word_tokenize
 
 
@@ -37,6 +43,13 @@ class BM25:
 
     avg_doc_len_ : float
         Average number of terms for documents in the corpus.
+
+    vocab_ : dict[str, int]
+        Term id per term, index into postings_.
+
+    postings_ : list[tuple[np.ndarray, np.ndarray]]
+        Inverted index, per term id the documents containing the term
+        and the precomputed BM25 weight of the term in each of them.
     """
 
     def __init__(self, k1=1.5, b=0.75):
@@ -90,12 +103,85 @@ class BM25:
         self.corpus_ = corpus
         self.corpus_size_ = corpus_size
         self.avg_doc_len_ = sum(doc_len) / corpus_size
+        self._build_index()
         return self
 
-    def search(self, query):
-        scores = [self._score(query, index) for index in range(self.corpus_size_)]
+    def _build_index(self):
+        """ build the inverted index, term -> (doc ids, bm25 weights)
+        the weight only depends on the term and document,
+        so scoring a query is just summing postings"""
+        # per document length normalization, avg_doc_len_ is 0 if all documents are empty
+        avg_doc_len = self.avg_doc_len_ or 1
+        len_norm = self.k1 * (1 - self.b + self.b * np.asarray(self.doc_len_, dtype=np.float64)
+                              / avg_doc_len)
+        docs = {}
+        freqs = {}
+        for index, frequencies in enumerate(self.tf_):
+            for term, freq in frequencies.items():
+                if term not in docs:
+                    docs[term] = []
+                    freqs[term] = []
+                docs[term].append(index)
+                freqs[term].append(freq)
+
+        self.vocab_ = {}
+        self.postings_ = []
+        for term, doc_ids in docs.items():
+            doc_ids = np.asarray(doc_ids, dtype=np.int32)
+            freq = np.asarray(freqs[term], dtype=np.float64)
+            weights = self.idf_[term] * freq * (self.k1 + 1) / (freq + len_norm[doc_ids])
+            self.vocab_[term] = len(self.postings_)
+            self.postings_.append((doc_ids, weights))
+        self._matrix = None
+
+    def _score_all(self, query):
+        scores = np.zeros(self.corpus_size_, dtype=np.float64)
+        for term in query:  # repeated terms are counted every time
+            tid = self.vocab_.get(term)
+            if tid is None:
+                continue
+            doc_ids, weights = self.postings_[tid]
+            scores[doc_ids] += weights
         return scores
 
+    def search(self, query):
+        return self._score_all(query).tolist()
+
+    def search_batch(self, queries):
+        """ score several queries at once, returns one list of scores per query """
+        from scipy.sparse import csr_matrix
+
+        if self._matrix is None:
+            # term x document weight matrix, built on first batch
+            indptr = np.cumsum([0] + [len(d) for d, _ in self.postings_])
+            cols = [d for d, _ in self.postings_]
+            vals = [w for _, w in self.postings_]
+            self._matrix = csr_matrix((np.concatenate(vals) if vals else np.zeros(0),
+                                       np.concatenate(cols) if cols else np.zeros(0, dtype=np.int32),
+                                       indptr),
+                                      shape=(len(self.postings_), self.corpus_size_))
+
+        rows, cols = [], []
+        for qid, query in enumerate(queries):
+            for term in query:
+                tid = self.vocab_.get(term)
+                if tid is not None:
+                    rows.append(qid)
+                    cols.append(tid)
+        # duplicate entries are summed, so repeated terms still count
+        Q = csr_matrix((np.ones(len(rows)), (rows, cols)),
+                       shape=(len(queries), len(self.postings_)))
+        return (Q @ self._matrix).toarray().tolist()
+
+    def get_top_n(self, query, n=5):
+        """ return the n best (document index, score) pairs,
+        only documents sharing a term with the query are considered"""
+        scores = self._score_all(query)
+        matched = np.flatnonzero(scores)
+        # ties are broken by document index
+        best = heapq.nlargest(n, matched, key=lambda i: (scores[i], -i))
+        return [(int(i), float(scores[i])) for i in best]
+
     def _score(self, query, index):
         score = 0.0
 
@@ -113,6 +199,109 @@ class BM25:
         return score
 
 
+class BM25Corpus(BM25):
+    """
+    BM25 index that can be updated after fitting and saved to disk
+
+    document statistics (tf, df, lengths) are updated incrementally by
+    add_documents / remove_documents, idf and the inverted index depend on
+    the corpus size and are rebuilt lazily on the next query
+
+    remove_documents swaps the last document into the freed slot,
+    document indexes are not stable across removals
+    """
+
+    def __init__(self, corpus=None, k1=1.5, b=0.75):
+        super().__init__(k1=k1, b=b)
+        self.tf_ = []
+        self.df_ = {}
+        self.idf_ = {}
+        self.doc_len_ = []
+        self.corpus_ = []
+        self.corpus_size_ = 0
+        self.avg_doc_len_ = 0.0
+        self._total_len = 0
+        self._dirty = True
+        if corpus:
+            self.add_documents(corpus)
+
+    def fit(self, corpus):
+        self.__init__(k1=self.k1, b=self.b)
+        return self.add_documents(corpus)
+
+    def add_documents(self, documents):
+        for document in documents:
+            frequencies = {}
+            for term in document:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term in frequencies:
+                self.df_[term] = self.df_.get(term, 0) + 1
+            self.tf_.append(frequencies)
+            self.doc_len_.append(len(document))
+            self.corpus_.append(document)
+            self._total_len += len(document)
+        self._update_size()
+        return self
+
+    def remove_documents(self, indexes):
+        # descending order, so the swapped in document is never one to remove
+        for index in sorted(set(indexes), reverse=True):
+            for term in self.tf_[index]:
+                self.df_[term] -= 1
+                if not self.df_[term]:
+                    self.df_.pop(term)
+            self._total_len -= self.doc_len_[index]
+            for l in (self.tf_, self.doc_len_, self.corpus_):
+                l[index] = l[-1]
+                l.pop()
+        self._update_size()
+        return self
+
+    def _update_size(self):
+        self.corpus_size_ = len(self.corpus_)
+        self.avg_doc_len_ = self._total_len / self.corpus_size_ if self.corpus_size_ else 0.0
+        self._dirty = True
+
+    def _refresh(self):
+        if not self._dirty:
+            return
+        self.idf_ = {term: math.log(1 + (self.corpus_size_ - freq + 0.5) / (freq + 0.5))
+                     for term, freq in self.df_.items()}
+        if self.avg_doc_len_:
+            self._build_index()
+        else:  # empty corpus or only empty documents, nothing can match
+            self.vocab_ = {}
+            self.postings_ = []
+            self._matrix = None
+        self._dirty = False
+
+    def _score_all(self, query):
+        self._refresh()
+        return super()._score_all(query)
+
+    def search_batch(self, queries):
+        self._refresh()
+        return super().search_batch(queries)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # the index is cheap to rebuild and several times larger than the stats
+        for k in ("vocab_", "postings_", "_matrix"):
+            state.pop(k, None)
+        state["_dirty"] = True
+        return state
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
 def rank_answers(question, evidence, stopwords=None):
     stopwords = stopwords or []
     bm25 = BM25()
@@ -1,7 +1,7 @@
 import re
 
-import nltk
 from ovos_classifiers.heuristics.tokenize import word_tokenize
+from ovos_classifiers.utils.nltk_resources import ensure_resources
 
 
 class RegexPostag:
@@ -143,11 +143,16 @@ class NltkPostag:
     def __init__(self, config=None):
         # TODO - lang support
         self.config = config or {}
-        nltk.download('punkt')
-        nltk.download('averaged_perceptron_tagger')
-        nltk.download('universal_tagset')
+        ensure_resources("punkt", "averaged_perceptron_tagger", "universal_tagset")
 
     def tag(self, sentence):
+        import nltk
         if isinstance(sentence, str):
             sentence = nltk.word_tokenize(sentence)
         return nltk.pos_tag(sentence, tagset="universal")
+
+    def tag_sents(self, sentences):
+        import nltk
+        sentences = [nltk.word_tokenize(s) if isinstance(s, str) else s
+                     for s in sentences]
+        return nltk.pos_tag_sents(sentences, tagset="universal")
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from os.path import dirname, isfile
 import json
+import re
 
 
 class HeuristicUtteranceTagger:
@@ -13,7 +15,8 @@ class HeuristicUtteranceTagger:
     def predict(self, sentences):
         if isinstance(sentences, str):
             sentences = [sentences]
-        return [self.classify(s, self.lang) for s in sentences]
+        matchers = self._get_matchers(self.lang)
+        return [self._classify(s, matchers) for s in sentences]
 
     @staticmethod
     def _get_kwords(lang):
@@ -31,29 +34,44 @@ class HeuristicUtteranceTagger:
                data.get("exclamation", []), \
                data.get("social", [])
 
+    @staticmethod
+    def _compile(keywords, prefix=False):
+        if not keywords:
+            return re.compile(r"(?!)").match  # never matches
+        pattern = "|".join(re.escape(w) for w in sorted(keywords, key=len, reverse=True))
+        if prefix:
+            return re.compile(pattern).match
+        return re.compile(pattern).search
+
     @classmethod
-    def classify(cls, sentence, lang):
-        sentence = sentence.lower().strip()
+    @lru_cache(maxsize=None)
+    def _get_matchers(cls, lang):
+        """ keyword tables compiled to regexes, loaded once per lang
+        checked in order, first match wins"""
         command_action_keywords, command_denial_keywords, question_query_keywords, \
         question_request_keywords, question_yesno_keywords, sentence_exclamation_keywords, \
         sentence_social_keywords = cls._get_kwords(lang)
+        return (
+            ("COMMAND:ACTION", cls._compile(command_action_keywords, prefix=True)),
+            ("QUESTION:YESNO", cls._compile(question_yesno_keywords, prefix=True)),
+            ("QUESTION:QUERY", cls._compile(question_query_keywords, prefix=True)),
+            ("COMMAND:DENIAL", cls._compile(command_denial_keywords)),
+            ("QUESTION:REQUEST", cls._compile(question_request_keywords)),
+            ("SENTENCE:SOCIAL", cls._compile(sentence_social_keywords)),
+            ("SENTENCE:EXCLAMATION", cls._compile(sentence_exclamation_keywords))
+        )
 
-        if any(sentence.startswith(w) for w in command_action_keywords):
-            return "COMMAND:ACTION"
-        elif any(sentence.startswith(w) for w in question_yesno_keywords):
-            return "QUESTION:YESNO"
-        elif any(sentence.startswith(w) for w in question_query_keywords):
-            return "QUESTION:QUERY"
-        elif any(w in sentence for w in command_denial_keywords):
-            return "COMMAND:DENIAL"
-        elif any(w in sentence for w in question_request_keywords):
-            return "QUESTION:REQUEST"
-        elif any(w in sentence for w in sentence_social_keywords):
-            return "SENTENCE:SOCIAL"
-        elif any(w in sentence for w in sentence_exclamation_keywords):
-            return "SENTENCE:EXCLAMATION"
-        else:
-            return "SENTENCE:STATEMENT"
+    @staticmethod
+    def _classify(sentence, matchers):
+        sentence = sentence.lower().strip()
+        for label, matcher in matchers:
+            if matcher(sentence):
+                return label
+        return "SENTENCE:STATEMENT"
+
+    @classmethod
+    def classify(cls, sentence, lang):
+        return cls._classify(sentence, cls._get_matchers(lang))
 
 
 if __name__ == "__main__":
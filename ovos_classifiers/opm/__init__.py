@@ -2,6 +2,7 @@
 # the best available model or heuristic will be used for each language
 # config for model settings comes from ovos-config under classifiers section
 
+from ovos_config import Configuration
 from quebra_frases import span_indexed_word_tokenize
 
 from ovos_classifiers.opm.heuristics import UtteranceNormalizerPlugin
@@ -17,10 +18,23 @@ from ovos_plugin_manager.templates.transformers import UtteranceTransformer
 class OVOSPostagPlugin(PosTagger):
     """postag via models trained in ovos-classifiers"""
 
+    def __init__(self, config=None):
+        super().__init__(config)
+        # ovos-config is read once, taggers are created once per lang
+        self._core_config = Configuration()
+        self._taggers = {}
+
+    def get_tagger(self, lang=None):
+        lang = lang or self.config.get("lang") or self._core_config.get("lang", "en-us")
+        if lang not in self._taggers:
+            # tagger model from ovos-config
+            self._taggers[lang] = OVOSPostag(lang=lang, config=self._core_config)
+        return self._taggers[lang]
+
     def postag(self, spans, lang=None):
         if isinstance(spans, str):
             spans = span_indexed_word_tokenize(spans)
-        tagger = OVOSPostag(lang=lang)  # tagger model from ovos-config
+        tagger = self.get_tagger(lang)
         tags = tagger.postag(" ".join(t for s, e, t in spans))
         tagged_spans = [(s, e, t, tags[idx][1])
                         for idx, (s, e, t) in enumerate(spans)]
@@ -1,9 +1,10 @@
 # these plugins do not have external dependencies and do not download any data
 # they should be available in all platforms
+import hashlib
 import string
 from ovos_classifiers.heuristics.corefiob import CorefIOBHeuristicTagger
 from ovos_classifiers.heuristics.keyword_extraction import HeuristicExtractor
-from ovos_classifiers.heuristics.machine_comprehension import BM25
+from ovos_classifiers.heuristics.machine_comprehension import BM25Corpus
 from ovos_classifiers.heuristics.normalize import Normalizer, CatalanNormalizer, CzechNormalizer, \
     PortugueseNormalizer, AzerbaijaniNormalizer, RussianNormalizer, EnglishNormalizer, UkrainianNormalizer, \
     GermanNormalizer
@@ -11,6 +12,7 @@ from ovos_classifiers.heuristics.phonemizer import EnglishARPAHeuristicPhonemize
 from ovos_classifiers.heuristics.postag import RegexPostag
 from ovos_classifiers.heuristics.summarization import WordFrequencySummarizer
 from ovos_classifiers.utils import get_stopwords
+from ovos_classifiers.utils.registry import ModelRegistry
 from ovos_plugin_manager.templates.coreference import CoreferenceSolverEngine
 from ovos_plugin_manager.templates.g2p import Grapheme2PhonemePlugin
 from ovos_plugin_manager.templates.keywords import KeywordExtractor
@@ -115,20 +117,32 @@ class BM25MultipleChoiceSolver(MultipleChoiceSolver):
 class BM25SolverPlugin(EvidenceSolver):
     """extract best sentence from text that answers the question, using BM25 algorithm"""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the same evidence (eg. a cached web page) is often asked several questions,
+        # keep the fitted indexes keyed by a hash of the evidence text
+        self._indexes = ModelRegistry(max_models=self.config.get("index_cache_size", 32),
+                                      max_bytes=None)
+
+    def get_index(self, evidence):
+        def build():
+            sents = []
+            for s in evidence.split("\n"):
+                sents += sentence_tokenize(s)
+            corpus = [word_tokenize(s) for s in sents]
+            return BM25Corpus(corpus), 0
+
+        key = hashlib.sha256(evidence.encode("utf-8")).hexdigest()
+        return self._indexes.get_or_load(key, build)
+
     def get_best_passage(self, evidence, question, context=None):
         """
         evidence and question assured to be in self.default_lang
          returns summary of provided document
         """
-        bm25 = BM25()
-
-        sents = []
-        for s in evidence.split("\n"):
-            sents += sentence_tokenize(s)
-        corpus = [word_tokenize(s) for s in sents]
-        bm25.fit(corpus)
+        bm25 = self.get_index(evidence)
         scores = bm25.search(word_tokenize(question))
-        ans = max([s for s in zip(scores, corpus)],
+        ans = max([s for s in zip(scores, bm25.corpus_)],
                   key=lambda k: k[0])[1]
         return " ".join(ans)
 
@@ -1,13 +1,14 @@
 import json
 from os import makedirs
 from os.path import isfile
-import nltk
 import requests
 from ovos_config import Configuration
 from ovos_utils.xdg_utils import xdg_data_home
 
 from ovos_classifiers.heuristics.postag import NltkPostag, RegexPostag
 from ovos_classifiers.utils import load_tagger
+from ovos_classifiers.utils.nltk_resources import ensure_resources
+from ovos_classifiers.utils.registry import MODEL_REGISTRY, model_file_size
 
 # TODO - benchmark and choose based on performance/model size
 # TODO - ensure all langs have 1 model
@@ -24,10 +25,10 @@ class OVOSPostag:
     _XDG_PATH = f"{xdg_data_home()}/OpenVoiceOS/classifiers"
     _BASE_METADATA_URL = "https://github.com/OpenVoiceOS/ovos-classifiers/raw/dev/models/metadata"
     _BASE_MODEL_URL = "https://github.com/OpenVoiceOS/ovos-classifiers/raw/dev/models/postag"
-    makedirs(_XDG_PATH, exist_ok=True)
 
-    def __init__(self, model_id=None, lang=None):
-        config_core = Configuration()
+    def __init__(self, model_id=None, lang=None, config=None):
+        # config is the ovos-config dict, pass it to avoid reading it again
+        config_core = config if config is not None else Configuration()
         self.lang = lang or config_core.get("lang", "en-us")
         self.config = config_core.get("classifiers", {}).get("postag", {})
         model_id = model_id or self.config.get("model_id") or self.lang.split("-")[0]
@@ -60,6 +61,7 @@ class OVOSPostag:
             with open(meta_path) as f:
                 meta = json.load(f)
         else:
+            makedirs(self._XDG_PATH, exist_ok=True)
             url = f"{self._BASE_METADATA_URL}/{model_id}.json"
             meta = requests.get(url).json()
             with open(meta_path, "wb") as f:
@@ -67,6 +69,7 @@ class OVOSPostag:
 
         model_path = f"{self._XDG_PATH}/{model_id}.pkl"
         if not isfile(model_path):
+            makedirs(self._XDG_PATH, exist_ok=True)
             url = f"{self._BASE_MODEL_URL}/{model_id}.pkl"
             model = requests.get(url).content
             with open(model_path, "wb") as f:
@@ -75,16 +78,25 @@ class OVOSPostag:
         return meta, model_path
 
     def load_model(self, model_id):
+        # models are shared process wide, see utils.registry
+        return MODEL_REGISTRY.get_or_load(("postag", model_id, self.lang),
+                                          lambda: self._load_model(model_id))
+
+    def _load_model(self, model_id):
         if model_id == "nltk":
-            nltk.download("punkt")
-            nltk.download('averaged_perceptron_tagger')
-            nltk.download('universal_tagset')
+            ensure_resources("punkt", "averaged_perceptron_tagger", "universal_tagset")
         data, model_path = self.get_model(model_id)
-        return load_tagger(data, model_path)
+        return load_tagger(data, model_path), model_file_size(model_path)
 
     def postag(self, sentence):
         return self.clf.tag(sentence)
 
+    def postag_batch(self, sentences):
+        """ postag a list of sentences, batched when the model supports it """
+        if hasattr(self.clf, "tag_sents"):
+            return self.clf.tag_sents(sentences)
+        return [self.clf.tag(s) for s in sentences]
+
 
 if __name__ == "__main__":
     p = OVOSPostag("regex")
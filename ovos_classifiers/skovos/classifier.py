@@ -1,18 +1,29 @@
 import numpy as np
-from sklearn.calibration import CalibratedClassifierCV
-from sklearn.ensemble import RandomForestClassifier, VotingClassifier, ExtraTreesClassifier
-from sklearn.feature_selection import SelectFromModel
-from sklearn.linear_model import LogisticRegression, Perceptron, PassiveAggressiveClassifier
-from sklearn.naive_bayes import MultinomialNB, GaussianNB, BernoulliNB
-from sklearn.neural_network import MLPClassifier
+from scipy.sparse import issparse
+from sklearn.base import clone
+from sklearn.exceptions import NotFittedError
 from sklearn.pipeline import Pipeline
-from sklearn.svm import SVC, LinearSVC
 
+from ovos_classifiers.skovos.compiled import CompiledSklearnClassifier, proba_to_labels
 from ovos_classifiers.skovos.pipelines import get_features_pipeline
 from ovos_classifiers.tasks.classifier import OVOSAbstractClassifier
 
 
+def _to_dense(X):
+    return X.toarray() if issparse(X) else X
+
+
 def iter_clfs(calibrate=True, feature_select=False, voting=False):
+    # most sklearn estimator modules are slow to import, only needed for training
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.ensemble import RandomForestClassifier, VotingClassifier, ExtraTreesClassifier
+    from sklearn.feature_selection import SelectFromModel
+    from sklearn.linear_model import LogisticRegression, Perceptron, PassiveAggressiveClassifier
+    from sklearn.naive_bayes import MultinomialNB, GaussianNB, BernoulliNB
+    from sklearn.neural_network import MLPClassifier
+    from sklearn.preprocessing import FunctionTransformer
+    from sklearn.svm import SVC, LinearSVC
+
     if voting:
         clfs = {
 
@@ -55,7 +66,9 @@ def iter_clfs(calibrate=True, feature_select=False, voting=False):
             "svc": SVC(kernel='linear', probability=True),
             "lr": LogisticRegression(),
             "mnb": MultinomialNB(),
-            "gnb": GaussianNB(),
+            # the features pipelines output sparse matrices, GaussianNB needs dense
+            "gnb": Pipeline([("dense", FunctionTransformer(_to_dense, accept_sparse=True)),
+                             ("clf", GaussianNB())]),
             "bnb": BernoulliNB(),
             "rf": RandomForestClassifier()
         }
@@ -82,6 +95,41 @@ class SklearnOVOSClassifier(OVOSAbstractClassifier):
         self.clf.fit(train_data, target_data)
         return self.clf
 
+    def partial_train(self, train_data, target_data, classes=None):
+        """ incremental training on a minibatch, without refitting from scratch
+
+        needs stateless features (cv2_hashing, tfidf_hashing, skipgram2_hashing...)
+        and a classifier with partial_fit (Perceptron, PassiveAggressiveClassifier,
+        SGDClassifier, MultinomialNB, BernoulliNB), all labels must be passed
+        in classes on the first call, also works on a model loaded with
+        load_from_file(path), but not with mmap_mode="r" """
+        if self.pipeline_id == "raw":
+            clf = self.clf if self.clf is not None else self._pipeline_clf
+            if not hasattr(clf, "partial_fit"):
+                # eg. a raw Pipeline, the features step would need to be refitted
+                raise ValueError(f"raw {clf.__class__.__name__} does not support incremental "
+                                 f"training, pass the classifier with a stateless features "
+                                 f"pipeline instead (cv2_hashing, tfidf_hashing, skipgram2_hashing)")
+            self.clf = clf
+            X = train_data
+        else:
+            if self.clf is None:
+                self.clf = Pipeline([
+                    ('utils', get_features_pipeline(self.pipeline_id)),
+                    ('clf', clone(self._pipeline_clf))
+                ])
+            features, clf = self.clf.steps[0][1], self.clf.steps[-1][1]
+            try:
+                X = features.transform(train_data)
+            except NotFittedError as e:
+                raise ValueError(f"pipeline '{self.pipeline_id}' needs to be fitted, "
+                                 f"use a stateless pipeline (eg. cv2_hashing) "
+                                 f"for incremental training") from e
+        if not hasattr(clf, "partial_fit"):
+            raise ValueError(f"{clf.__class__.__name__} does not support incremental training")
+        clf.partial_fit(X, target_data, classes=classes)
+        return self.clf
+
     @property
     def pipeline(self):
         return [
@@ -98,17 +146,22 @@ class SklearnOVOSClassifier(OVOSAbstractClassifier):
     def predict_proba(self, text):
         return np.max(self.clf.predict_proba(text), axis=1)
 
-    def predict_labels(self, utterances):
-        probs = []
-        for pred in self.clf.predict_proba(utterances):
-            classes = self.clf.classes_
-            labels = {classes[idx]: p for idx, p in enumerate(pred)}
-            probs.append(labels)
-        return probs
+    def predict_labels(self, utterances, columnar=False, top_k=None, threshold=None):
+        """ {label: probability} per utterance, see proba_to_labels for the
+        columnar/top_k/threshold options """
+        return proba_to_labels(self.clf.classes_, self.clf.predict_proba(utterances),
+                               columnar=columnar, top_k=top_k, threshold=threshold)
+
+    def compile(self):
+        """ lean inference object with the same predictions as self.clf
+
+        only linear models (optionally calibrated) can be compiled,
+        raises ValueError otherwise """
+        return CompiledSklearnClassifier.from_estimator(self.clf)
 
 
 class SklearnOVOSVotingClassifier(SklearnOVOSClassifier):
-    def __init__(self, voter_clfs, pipeline_id, voting='soft', weights=None):
+    def __init__(self, voter_clfs, pipeline_id, voting='soft', weights=None, n_jobs=None):
 
         # sklearn style
         # voter_clfs = [('dt', clf1), ('knn', clf2), ('svc', clf3)]
@@ -118,25 +171,29 @@ class SklearnOVOSVotingClassifier(SklearnOVOSClassifier):
             voter_clfs = [(c.__class__.__name__, c) for c in voter_clfs]
         self.voter_clfs = voter_clfs
 
-        pipeline_clf = VotingClassifier(estimators=self.voter_clfs, voting=voting, weights=weights)
+        from sklearn.ensemble import VotingClassifier
+        # n_jobs fits the voters in parallel (joblib), eg. -1 for all cores,
+        # keep None when already running inside a process pool (find_best_pipeline)
+        pipeline_clf = VotingClassifier(estimators=self.voter_clfs, voting=voting,
+                                        weights=weights, n_jobs=n_jobs)
         super().__init__(pipeline_id=pipeline_id, pipeline_clf=pipeline_clf)
 
-    @property
-    def voting_pipelines(self):
-        pipes = {}
-        for name, clf in self.voter_clfs:
-            pipes[name] = Pipeline([
-                ('utils', get_features_pipeline(self.pipeline_id)),
-                ('clf', clf)
-            ])
-        return pipes
-
     def train(self, train_data, target_data):
-        for name, clf in self.voting_pipelines.items():
-            print("training", name)
-            clf.fit(train_data, target_data)
-        print("training voting classifier")
-        return super().train(train_data, target_data)
+        # features are computed once and shared by all voters,
+        # the voters fitted by VotingClassifier are the final model
+        if self.pipeline_id != "raw":
+            features = get_features_pipeline(self.pipeline_id)
+            X = features.fit_transform(train_data, target_data)
+        else:
+            features = None
+            X = train_data
+        print("training voting classifier", [name for name, _ in self.voter_clfs])
+        voting = clone(self._pipeline_clf).fit(X, target_data)
+        if features is None:
+            self.clf = voting
+        else:
+            self.clf = Pipeline([('utils', features), ('clf', voting)])
+        return self.clf
 
     def predict_proba(self, text):
         return np.max(self.clf.predict_proba(text), axis=1)
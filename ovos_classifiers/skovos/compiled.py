@@ -0,0 +1,365 @@
+# lean inference for fitted sklearn pipelines
+# the sklearn Pipeline/FeatureUnion/CalibratedClassifierCV machinery validates inputs,
+# checks fitted state and re-fits label encoders on every call, for single utterances
+# that overhead dominates, a compiled classifier keeps only what inference needs:
+# vocabularies, a stacked weight matrix and the calibration parameters
+import numpy as np
+from ovos_utils.log import LOG
+from scipy import sparse
+from scipy.special import expit
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.pipeline import Pipeline, FeatureUnion
+from sklearn.preprocessing import LabelEncoder, normalize
+from sklearn.utils.extmath import safe_sparse_dot
+
+
+def proba_to_labels(classes, proba, columnar=False, top_k=None, threshold=None):
+    """ turn a (n_samples, n_classes) probability matrix into labels
+
+    by default returns a list of {label: probability} dicts, one per row
+    with top_k only the k most likely labels are kept (most likely first),
+    with threshold labels below it are dropped
+
+    columnar=True skips the per row dicts:
+        - returns (classes, proba), filtered out entries are set to 0
+        - with top_k returns (labels, proba) of shape (n_samples, k),
+          sorted by probability
+    """
+    classes = np.asarray(classes)
+    proba = np.asarray(proba)
+    if top_k is not None:
+        idx = np.argsort(-proba, axis=1, kind="stable")[:, :top_k]
+        labels = classes[idx]
+        proba = np.take_along_axis(proba, idx, axis=1)
+    else:
+        labels = None
+
+    if columnar:
+        if threshold is not None:
+            proba = np.where(proba >= threshold, proba, 0.0)
+        if labels is None:
+            return classes, proba
+        return labels, proba
+
+    if labels is None:
+        names = classes.tolist()
+        if threshold is None:
+            return [dict(zip(names, row)) for row in proba.tolist()]
+        labels = np.broadcast_to(classes, proba.shape)
+    if threshold is None:
+        return [dict(zip(l, p)) for l, p in zip(labels.tolist(), proba.tolist())]
+    keep = (proba >= threshold).tolist()
+    return [{l: p for l, p, k in zip(ls, ps, ks) if k}
+            for ls, ps, ks in zip(labels.tolist(), proba.tolist(), keep)]
+
+
+def _missing_vectorizer_internals(vectorizer):
+    """ private sklearn attributes CompiledCountVectorizer relies on """
+    if isinstance(vectorizer, TfidfVectorizer) and not hasattr(vectorizer, "_tfidf"):
+        return ["TfidfVectorizer._tfidf"]
+    return []
+
+
+def _missing_calibration_internals(estimator):
+    """ private sklearn attributes CompiledCalibratedLinearModel relies on """
+    missing = set()
+    for calibrated in getattr(estimator, "calibrated_classifiers_", []):
+        for attr in ("estimator", "calibrators", "classes", "method"):
+            if not hasattr(calibrated, attr):
+                missing.add(f"calibrated_classifiers_[i].{attr}")
+    return sorted(missing)
+
+
+class CompiledCountVectorizer:
+    """ CountVectorizer / TfidfVectorizer transform without the sklearn checks """
+
+    def __init__(self, vectorizer):
+        self.vectorizer = vectorizer
+        self.vocabulary = vectorizer.vocabulary_
+        self.n_features = len(self.vocabulary)
+        self.dtype = vectorizer.dtype
+        self.binary = vectorizer.binary
+        self.tfidf = isinstance(vectorizer, TfidfVectorizer)
+        tfidf = vectorizer._tfidf if self.tfidf else None
+        self.sublinear_tf = tfidf.sublinear_tf if tfidf else False
+        self.idf = getattr(tfidf, "idf_", None) if tfidf else None
+        self.norm = tfidf.norm if tfidf else None
+        self._analyze = vectorizer.build_analyzer()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_analyze")  # closures over the vectorizer, rebuilt on load
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._analyze = self.vectorizer.build_analyzer()
+
+    def transform(self, X):
+        vocab = self.vocabulary
+        j_indices = []
+        values = []
+        indptr = [0]
+        for doc in X:
+            counter = {}
+            for feature in self._analyze(doc):
+                idx = vocab.get(feature)
+                if idx is not None:
+                    counter[idx] = counter.get(idx, 0) + 1
+            j_indices.extend(counter.keys())
+            values.extend(counter.values())
+            indptr.append(len(j_indices))
+
+        X = sparse.csr_matrix((np.asarray(values, dtype=np.intc),
+                               np.asarray(j_indices, dtype=np.int32),
+                               np.asarray(indptr, dtype=np.int32)),
+                              shape=(len(indptr) - 1, self.n_features),
+                              dtype=self.dtype)
+        X.sort_indices()
+        if self.binary:
+            X.data.fill(1)
+
+        if self.tfidf:
+            if X.dtype not in (np.float64, np.float32):
+                X = X.astype(np.float64)
+            if self.sublinear_tf:
+                np.log(X.data, X.data)
+                X.data += 1.0
+            if self.idf is not None:
+                X.data *= self.idf[X.indices]
+            if self.norm is not None:
+                X = normalize(X, norm=self.norm, copy=False)
+        return X
+
+
+class CompiledFeatures:
+    """ chain of transformers, FeatureUnions are flattened into lists of chains """
+
+    def __init__(self, steps, union=False):
+        self.steps = steps
+        self.union = union
+
+    @classmethod
+    def from_transformer(cls, transformer):
+        if transformer is None or (isinstance(transformer, str) and transformer == "passthrough"):
+            return cls([])
+        if isinstance(transformer, Pipeline):
+            return cls([cls.from_transformer(step) for _, step in transformer.steps])
+        if isinstance(transformer, FeatureUnion) and not transformer.transformer_weights:
+            return cls([cls.from_transformer(t) for _, t in transformer.transformer_list
+                        if not (isinstance(t, str) and t == "drop")], union=True)
+        if isinstance(transformer, CountVectorizer):
+            missing = _missing_vectorizer_internals(transformer)
+            if not missing:
+                return CompiledCountVectorizer(transformer)
+            LOG.warning(f"can not compile {transformer.__class__.__name__}, this sklearn "
+                        f"version has no {', '.join(missing)}, using the sklearn transform")
+        # anything else (eg. keyword features) is used as is
+        return transformer
+
+    def transform(self, X):
+        if self.union:
+            Xs = [step.transform(X) for step in self.steps]
+            # same as FeatureUnion._hstack
+            if any(sparse.issparse(f) for f in Xs):
+                return sparse.hstack(Xs).tocsr()
+            return np.hstack(Xs)
+        for step in self.steps:
+            X = step.transform(X)
+        return X
+
+
+def _linear_params(estimator):
+    if not hasattr(estimator, "coef_") or not hasattr(estimator, "decision_function"):
+        raise ValueError(f"{estimator.__class__.__name__} is not a linear model, "
+                         f"it can not be compiled")
+    coef = estimator.coef_
+    if sparse.issparse(coef):
+        coef = coef.toarray()
+    coef = np.atleast_2d(coef)
+    intercept = np.broadcast_to(estimator.intercept_, (coef.shape[0],))
+    return coef, np.asarray(intercept, dtype=np.float64)
+
+
+class CompiledLinearModel:
+    """ decision function of a fitted linear classifier """
+
+    def __init__(self, estimator):
+        self.classes_ = estimator.classes_
+        self.coef, self.intercept = _linear_params(estimator)
+
+    def decision_function(self, X):
+        scores = safe_sparse_dot(X, self.coef.T, dense_output=True) + self.intercept
+        if scores.shape[1] == 1:
+            return scores.reshape(-1)
+        return scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            indices = (scores > 0).astype(int)
+        else:
+            indices = scores.argmax(axis=1)
+        return self.classes_[indices]
+
+    def predict_proba(self, X):
+        raise AttributeError("uncalibrated linear models have no predict_proba")
+
+
+class CompiledCalibratedLinearModel:
+    """ CalibratedClassifierCV over a linear model
+
+    the weights of every fold are stacked into a single matrix, so all folds
+    are scored with one matmul, sigmoid calibrators are applied to all
+    columns at once, probabilities are combined exactly like sklearn does
+    """
+
+    def __init__(self, estimator):
+        self.classes_ = estimator.classes_
+        self.n_classes = len(self.classes_)
+
+        coefs, intercepts = [], []
+        self.folds = []  # (first column, last column, class index per column)
+        self.calibrators = []
+        col = 0
+        for calibrated in estimator.calibrated_classifiers_:
+            if calibrated.method not in ("sigmoid", "isotonic"):
+                raise ValueError(f"unsupported calibration method: {calibrated.method}")
+            coef, intercept = _linear_params(calibrated.estimator)
+            coefs.append(coef)
+            intercepts.append(intercept)
+
+            pos_class_indices = LabelEncoder().fit(calibrated.classes).transform(
+                calibrated.estimator.classes_)
+            n_cols = min(coef.shape[0], len(calibrated.calibrators), len(pos_class_indices))
+            class_idx = np.array(pos_class_indices[:n_cols])
+            if self.n_classes == 2:
+                # predictions are only for the positive class
+                class_idx += 1
+            self.folds.append((col, col + n_cols, class_idx))
+            self.calibrators += calibrated.calibrators[:n_cols]
+            col += coef.shape[0]
+
+        self.coef = np.vstack(coefs)
+        self.intercept = np.concatenate(intercepts)
+        # columns without a calibrator are never used
+        self._sigmoid = all(hasattr(c, "a_") for c in self.calibrators)
+        if self._sigmoid:
+            a = np.zeros(self.coef.shape[0])
+            b = np.zeros(self.coef.shape[0])
+            idx = np.concatenate([np.arange(start, end) for start, end, _ in self.folds])
+            a[idx] = [c.a_ for c in self.calibrators]
+            b[idx] = [c.b_ for c in self.calibrators]
+            self._a, self._b = a, b
+
+    def decision_function(self, X):
+        return safe_sparse_dot(X, self.coef.T, dense_output=True) + self.intercept
+
+    def _calibrate(self, scores):
+        if self._sigmoid:
+            return expit(-(self._a * scores + self._b))
+        calibrated = np.zeros_like(scores)
+        calibrators = iter(self.calibrators)
+        for start, end, _ in self.folds:
+            for i in range(start, end):
+                calibrated[:, i] = next(calibrators).predict(scores[:, i])
+        return calibrated
+
+    def predict_proba(self, X):
+        calibrated = self._calibrate(self.decision_function(X))
+        n_samples = calibrated.shape[0]
+        mean_proba = np.zeros((n_samples, self.n_classes))
+        for start, end, class_idx in self.folds:
+            proba = np.zeros((n_samples, self.n_classes))
+            proba[:, class_idx] = calibrated[:, start:end]
+            if self.n_classes == 2:
+                proba[:, 0] = 1.0 - proba[:, 1]
+            else:
+                denominator = np.sum(proba, axis=1)[:, np.newaxis]
+                uniform_proba = np.full_like(proba, 1 / self.n_classes)
+                proba = np.divide(proba, denominator, out=uniform_proba,
+                                  where=denominator != 0)
+            proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+            mean_proba += proba
+        mean_proba /= len(self.folds)
+        return mean_proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class SklearnModel:
+    """ fallback for models that can not be compiled with the installed sklearn,
+    predictions go through the estimator itself """
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+        self.classes_ = estimator.classes_
+
+    def decision_function(self, X):
+        return self.estimator.decision_function(X)
+
+    def predict(self, X):
+        return self.estimator.predict(X)
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(X)
+
+
+class CompiledSklearnClassifier:
+    """ lean inference object built from a fitted sklearn classifier
+
+    supports Pipelines of CountVectorizer/TfidfVectorizer/FeatureUnions
+    (other transformers are kept as they are) ending in a linear model,
+    optionally wrapped in CalibratedClassifierCV
+
+    compiling relies on private sklearn attributes (TfidfVectorizer._tfidf and
+    the fitted calibrators), when they are missing the affected step falls
+    back to the sklearn code path with a warning
+    """
+
+    def __init__(self, features, model):
+        self.features = features
+        self.model = model
+
+    @classmethod
+    def from_estimator(cls, clf):
+        from sklearn.calibration import CalibratedClassifierCV
+        if isinstance(clf, Pipeline):
+            features = CompiledFeatures([CompiledFeatures.from_transformer(step)
+                                         for _, step in clf.steps[:-1]])
+            clf = clf.steps[-1][1]
+        else:
+            features = CompiledFeatures([])
+        if isinstance(clf, CalibratedClassifierCV):
+            missing = _missing_calibration_internals(clf)
+            if missing:
+                # sklearn internals changed, keep the exact sklearn predict_proba
+                LOG.warning(f"can not compile CalibratedClassifierCV, this sklearn version "
+                            f"has no {', '.join(missing)}, using the sklearn predict_proba")
+                model = SklearnModel(clf)
+            else:
+                model = CompiledCalibratedLinearModel(clf)
+        else:
+            model = CompiledLinearModel(clf)
+        return cls(features, model)
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def transform(self, X):
+        return self.features.transform(X)
+
+    def decision_function(self, X):
+        return self.model.decision_function(self.transform(X))
+
+    def predict(self, X):
+        return self.model.predict(self.transform(X))
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.transform(X))
+
+    def predict_labels(self, X, columnar=False, top_k=None, threshold=None):
+        return proba_to_labels(self.classes_, self.predict_proba(X),
+                               columnar=columnar, top_k=top_k, threshold=threshold)
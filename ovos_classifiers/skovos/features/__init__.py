@@ -1,26 +1,108 @@
 # feature extraction utils
 
 import functools
+import hashlib
+import importlib
+import os
+import pickle
+import threading
+from os.path import isfile
 
-import ahocorasick
 import numpy as np
-from nltk.util import skipgrams
-from anyascii import anyascii as latinize_text
-from ovos_config import Configuration
-from ovos_utils.xdg_utils import xdg_data_home
+from scipy import sparse
+from ovos_utils.log import LOG
+from ovos_utils.xdg_utils import xdg_data_home, xdg_cache_home
 from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.feature_extraction import DictVectorizer
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.linear_model import Perceptron
+from sklearn.exceptions import NotFittedError
+from sklearn.feature_extraction import DictVectorizer, FeatureHasher
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.utils.validation import check_is_fitted
 
-from ovos_classifiers.corefiob import OVOSCorefIOBTagger
-from ovos_classifiers.datasets import get_ocp_entities_dataset
-from ovos_classifiers.heuristics.lang_detect import LMLangClassifier
 from ovos_classifiers.heuristics.tokenize import word_tokenize
-from ovos_classifiers.postag import OVOSPostag
 from ovos_classifiers.utils import extract_postag_features, \
-    extract_word_features, normalize, get_stemmer, extract_single_word_features
+    extract_sentence_postag_features, extract_sentence_word_features, \
+    normalize, get_stemmer, extract_single_word_features
 from ovos_classifiers.utils import get_stopwords
+from ovos_classifiers.utils.registry import ModelRegistry
+
+# taggers, language models and datasets are slow to import,
+# they are imported where used and only resolved here on attribute access
+_LAZY_IMPORTS = {
+    "OVOSCorefIOBTagger": "ovos_classifiers.corefiob",
+    "OVOSPostag": "ovos_classifiers.postag",
+    "LMLangClassifier": "ovos_classifiers.heuristics.lang_detect",
+    "get_ocp_entities_dataset": "ovos_classifiers.datasets"
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _DictVectorizer(DictVectorizer):
+    """ DictVectorizer with 32bit sparse indices,
+    SGD based estimators (Perceptron...) refuse int64 indices """
+
+    @staticmethod
+    def _csr32(X):
+        if sparse.issparse(X) and X.nnz < np.iinfo(np.int32).max:
+            X.indices = X.indices.astype(np.int32, copy=False)
+            X.indptr = X.indptr.astype(np.int32, copy=False)
+        return X
+
+    def fit_transform(self, X, y=None):
+        return self._csr32(super().fit_transform(X, y))
+
+    def transform(self, X):
+        return self._csr32(super().transform(X))
+
+
+def _dict_vectorizer(sparse=True, n_features=None, alternate_sign=True):
+    if n_features:
+        # hashed features, no vocabulary stored in the model, always sparse
+        return FeatureHasher(n_features=n_features, input_type="dict",
+                             alternate_sign=alternate_sign, dtype=np.float32)
+    # one-hot/boolean/count features, float32 is plenty and halves memory
+    # sparse=False is the old dense float64 output
+    return _DictVectorizer(sparse=sparse, dtype=np.float32 if sparse else np.float64)
+
+
+def _feature_names(vectorizer):
+    if isinstance(vectorizer, FeatureHasher):
+        # hashing is one way, the column of a feature is known, not the reverse
+        raise ValueError("feature names unavailable with hashing (n_features is set)")
+    return vectorizer.get_feature_names_out()
+
+
+def _is_fitted(vectorizer):
+    try:
+        check_is_fitted(vectorizer)
+        return True
+    except NotFittedError:
+        return False
+
+
+class _SparseVectorizerMixin:
+    """ vectorizers pickled before the `sparse` param keep their output type """
+
+    def __sklearn_is_fitted__(self):
+        # the fitted state lives in the wrapped vectorizer, sklearn only
+        # looks for attributes ending in _ (eg. last step of a Pipeline)
+        vectorizer = getattr(self, "_vectorizer", None) or getattr(self, "_dict_vectorizer", None)
+        return _is_fitted(vectorizer)
+
+    def __setstate__(self, state):
+        if "sparse" not in state:
+            vectorizer = state.get("_vectorizer") or state.get("_dict_vectorizer")
+            state["sparse"] = getattr(vectorizer, "sparse", False)
+        if "n_features" in self._get_param_names():
+            state.setdefault("n_features", None)
+            state.setdefault("alternate_sign", True)
+        super().__setstate__(state)
 
 
 class TokenizerTransformer(BaseEstimator, TransformerMixin):
@@ -54,14 +136,15 @@ class SingleWordFeaturesTransformer(BaseEstimator, TransformerMixin):
         return feats
 
 
-class SingleWordFeaturesVectorizer(BaseEstimator, TransformerMixin):
-    def __init__(self):
+class SingleWordFeaturesVectorizer(_SparseVectorizerMixin, BaseEstimator, TransformerMixin):
+    def __init__(self, sparse=True):
+        self.sparse = sparse
         self._transformer = SingleWordFeaturesTransformer()
-        self._vectorizer = DictVectorizer(sparse=False)
+        self._vectorizer = _dict_vectorizer(sparse)
         super().__init__()
 
     def get_feature_names(self):
-        return self._vectorizer.get_feature_names()
+        return self._vectorizer.get_feature_names_out()
 
     def fit(self, X, y=None, **kwargs):
         X = self._transformer.transform(X)
@@ -76,7 +159,9 @@ class SingleWordFeaturesVectorizer(BaseEstimator, TransformerMixin):
 class WordFeaturesTransformer(BaseEstimator, TransformerMixin):
     def __init__(self, lang=None, stemmer=None, memory=2):
         super().__init__()
-        lang = lang or Configuration().get("lang", "en-us")
+        if not lang:
+            from ovos_config import Configuration
+            lang = Configuration().get("lang", "en-us")
         lang = lang.split("-")[0]
         self.stemmer = stemmer or get_stemmer(lang)
         self.memory = memory
@@ -85,24 +170,29 @@ class WordFeaturesTransformer(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, X, **transform_params):
-        feats = [
-            extract_word_features(X, index, stemmer=self.stemmer,
-                                  memory=self.memory)
-            for index in range(len(X))]
+        feats = extract_sentence_word_features(X, stemmer=self.stemmer,
+                                               memory=self.memory)
         return feats
 
 
-class WordFeaturesVectorizer(BaseEstimator, TransformerMixin):
-    def __init__(self, lang=None, stemmer=None, memory=2):
+class WordFeaturesVectorizer(_SparseVectorizerMixin, BaseEstimator, TransformerMixin):
+    def __init__(self, lang=None, stemmer=None, memory=2, sparse=True,
+                 n_features=None, alternate_sign=True):
+        """ n_features: hash the features into n_features columns (FeatureHasher)
+        instead of storing the vocabulary, alternate_sign for signed hashing
+        linear models then have (n_classes, n_features) coefs, sparsify() them """
         self.lang = lang
         self.memory = memory
         self.stemmer = stemmer
+        self.sparse = sparse
+        self.n_features = n_features
+        self.alternate_sign = alternate_sign
         self._transformer = WordFeaturesTransformer(lang=lang, stemmer=stemmer, memory=memory)
-        self._vectorizer = DictVectorizer(sparse=False)
+        self._vectorizer = _dict_vectorizer(sparse, n_features, alternate_sign)
         super().__init__()
 
     def get_feature_names(self):
-        return self._vectorizer.get_feature_names()
+        return _feature_names(self._vectorizer)
 
     def fit(self, X, y=None, **kwargs):
         X = self._transformer.transform(X)
@@ -140,39 +230,45 @@ class LangFeaturesTransformer(BaseEstimator, TransformerMixin):
         }
         self.clf = None
 
-    def extract_features(self, sentence):
+    def extract_features(self, sentence, scores=None):
         tokens = word_tokenize(sentence)
         feats = {
             l + "_stopword_count": 0 for l in self.stopwords.keys()
         }
         for lang, swords in self.stopwords.items():
             feats[lang] = sum(1 for w in tokens if w in swords)
-        for lang, score in self.clf.predict(sentence):
+        if scores is None:
+            scores = self.clf.predict(sentence)
+        for lang, score in scores.items():
             feats[lang + "_score"] = score
         return feats
 
     def fit(self, *args, **kwargs):
         for l, lang in self.langs.items():
             self.stopwords[l] = get_stopwords(lang)
+        from ovos_classifiers.heuristics.lang_detect import LMLangClassifier
         self.clf = LMLangClassifier()
         return self
 
     def transform(self, X, **transform_params):
-        feats = [self.extract_features(x) for x in X]
+        X = list(X)
+        scores = self.clf.predict_batch(X)
+        feats = [self.extract_features(x, s) for x, s in zip(X, scores)]
         return feats
 
 
-class LangFeaturesVectorizer(BaseEstimator, TransformerMixin):
-    def __init__(self, lang=None, stemmer=None, memory=2):
+class LangFeaturesVectorizer(_SparseVectorizerMixin, BaseEstimator, TransformerMixin):
+    def __init__(self, lang=None, stemmer=None, memory=2, sparse=True):
         self.lang = lang
         self.memory = memory
         self.stemmer = stemmer
+        self.sparse = sparse
         self._transformer = LangFeaturesTransformer()
-        self._vectorizer = DictVectorizer(sparse=False)
+        self._vectorizer = _dict_vectorizer(sparse)
         super().__init__()
 
     def get_feature_names(self):
-        return self._vectorizer.get_feature_names()
+        return self._vectorizer.get_feature_names_out()
 
     def fit(self, X, y=None, **kwargs):
         self._transformer.fit()
@@ -188,6 +284,7 @@ class LangFeaturesVectorizer(BaseEstimator, TransformerMixin):
 class POSTaggerTransformer(BaseEstimator, TransformerMixin):
     def __init__(self, lang="nltk", stemmer=None, memory=2):
         super().__init__()
+        from ovos_classifiers.postag import OVOSPostag
         self.tagger = OVOSPostag(lang.split("-")[0])
         self.stemmer = stemmer or get_stemmer(lang)
         self.memory = memory
@@ -197,20 +294,23 @@ class POSTaggerTransformer(BaseEstimator, TransformerMixin):
 
     def transform(self, X, **transform_params):
         X = [self.tagger.postag(sent) for sent in X]
-        feats = [extract_postag_features(
-            X, index, memory=self.memory, stemmer=self.stemmer)
-            for index in range(len(X))]
+        feats = extract_sentence_postag_features(
+            X, memory=self.memory, stemmer=self.stemmer)
         return feats
 
 
-class POSTaggerVectorizer(BaseEstimator, TransformerMixin):
-    def __init__(self, lang=None, stemmer=None, memory=2):
+class POSTaggerVectorizer(_SparseVectorizerMixin, BaseEstimator, TransformerMixin):
+    def __init__(self, lang=None, stemmer=None, memory=2, sparse=True,
+                 n_features=None, alternate_sign=True):
         super().__init__()
+        self.sparse = sparse
+        self.n_features = n_features  # see WordFeaturesVectorizer
+        self.alternate_sign = alternate_sign
         self._pos_transformer = POSTaggerTransformer(lang=lang, stemmer=stemmer, memory=memory)
-        self._dict_vectorizer = DictVectorizer()
+        self._dict_vectorizer = _dict_vectorizer(sparse, n_features, alternate_sign)
 
     def get_feature_names(self):
-        return self._dict_vectorizer.get_feature_names()
+        return _feature_names(self._dict_vectorizer)
 
     def fit(self, X, y=None, **kwargs):
         X = self._pos_transformer.transform(X)
@@ -225,6 +325,8 @@ class POSTaggerVectorizer(BaseEstimator, TransformerMixin):
 class CorefIOBTaggerTransformer(BaseEstimator, TransformerMixin):
     def __init__(self, lang="en", stemmer=None, memory=2):
         super().__init__()
+        from ovos_classifiers.corefiob import OVOSCorefIOBTagger
+        from ovos_classifiers.postag import OVOSPostag
         self.postagger = OVOSPostag(lang.split("-")[0])
         self.corefiob = OVOSCorefIOBTagger(lang)
         self.stemmer = stemmer or get_stemmer(lang)
@@ -237,7 +339,9 @@ class CorefIOBTaggerTransformer(BaseEstimator, TransformerMixin):
         `index`   = the index of the token we want to extract utils for
         `history` = the previous predicted IOB tags
         """
-        coreftagger = coreftagger or OVOSCorefIOBTagger("heuristic")
+        if coreftagger is None:
+            from ovos_classifiers.corefiob import OVOSCorefIOBTagger
+            coreftagger = OVOSCorefIOBTagger("heuristic")
         feat_dict = extract_postag_features(tokens, index, stemmer=stemmer,
                                             memory=memory)
         coref_tags = coreftagger.iob_tag(tokens)
@@ -261,26 +365,49 @@ class CorefIOBTaggerTransformer(BaseEstimator, TransformerMixin):
 
         return feat_dict
 
+    @staticmethod
+    def extract_sentence_corefiob_features(tokens, coreftagger=None, stemmer=None, memory=2):
+        """ extract_corefiob_features for every index of `tokens`,
+        the sentence is only coref tagged once"""
+        if coreftagger is None:
+            from ovos_classifiers.corefiob import OVOSCorefIOBTagger
+            coreftagger = OVOSCorefIOBTagger("heuristic")
+        feats = extract_sentence_postag_features(tokens, stemmer=stemmer,
+                                                 memory=memory)
+        coref_tags = coreftagger.iob_tag(tokens)
+        for index, feat_dict in enumerate(feats):
+            feat_dict["ciob"] = coref_tags[index][1]
+            # look ahead N words
+            for i in range(1, memory + 1):
+                feat_dict["next-" * i + "ciob"] = coref_tags[index + i][1]
+            # look back N words
+            for i in range(1, memory + 1):
+                feat_dict["prev-" * i + "ciob"] = coref_tags[index - i][1]
+        return feats
+
     def fit(self, *args, **kwargs):
         return self
 
     def transform(self, X, **transform_params):
         X = [self.postagger.postag(sent) for sent in X]
-        feats = [self.extract_corefiob_features(
-            X, index, coreftagger=self.corefiob,
+        feats = self.extract_sentence_corefiob_features(
+            X, coreftagger=self.corefiob,
             memory=self.memory, stemmer=self.stemmer)
-            for index in range(len(X))]
         return feats
 
 
-class CorefIOBTaggerVectorizer(BaseEstimator, TransformerMixin):
-    def __init__(self, lang=None, stemmer=None, memory=2):
+class CorefIOBTaggerVectorizer(_SparseVectorizerMixin, BaseEstimator, TransformerMixin):
+    def __init__(self, lang=None, stemmer=None, memory=2, sparse=True,
+                 n_features=None, alternate_sign=True):
         super().__init__()
+        self.sparse = sparse
+        self.n_features = n_features  # see WordFeaturesVectorizer
+        self.alternate_sign = alternate_sign
         self._coref_transformer = CorefIOBTaggerTransformer(lang=lang, stemmer=stemmer, memory=memory)
-        self._dict_vectorizer = DictVectorizer()
+        self._dict_vectorizer = _dict_vectorizer(sparse, n_features, alternate_sign)
 
     def get_feature_names(self):
-        return self._dict_vectorizer.get_feature_names()
+        return _feature_names(self._dict_vectorizer)
 
     def fit(self, X, y=None, **kwargs):
         X = self._coref_transformer.transform(X)
@@ -293,8 +420,24 @@ class CorefIOBTaggerVectorizer(BaseEstimator, TransformerMixin):
 
 
 class PronounTaggerTransformer(BaseEstimator, TransformerMixin):
+    # (feature, prev feature): keywords
+    _KEYWORD_FEATURES = {
+        # Match keywords for male coreferent
+        ("male_pron", "prev_male_pron"): ["he", "him", "his"],
+        ("neutral_pron", "prev_neutral_pron"): ["they", "them", "their"],
+        ("female_pron", "prev_female_pron"): ["she", "her", "hers"],
+        ("inanimate_pron", "prev_inanimate_pron"): ["it"],
+        # Match keywords for male entity
+        ("implicit_male", "prev_male"): ["man", "men", "boy", "guy", "male", "gentleman",
+                                         "brother", "father", "uncle", "grandfather"],
+        # Match keywords for female entity
+        ("implicit_female", "prev_female"): ["woman", "women", "girl", "lady", "female",
+                                             "sister", "mother", "aunt", "grandmother"]
+    }
+
     def __init__(self, lang="en", stemmer=None, memory=2):
         super().__init__()
+        from ovos_classifiers.postag import OVOSPostag
         self.tagger = OVOSPostag(lang.split("-")[0])
         self.stemmer = stemmer or get_stemmer(lang)
         self.memory = memory
@@ -314,53 +457,54 @@ class PronounTaggerTransformer(BaseEstimator, TransformerMixin):
         feat_dict["prev_noun"] = any(t[1] == "NOUN" or t[1] == "PROPN"
                                      for t in sent)
 
-        # Match keywords for male coreferent
-        mp = ["he", "him", "his"]
-        pp = ["they", "them", "their"]
-        fp = ["she", "her", "hers"]
-        np = ["it"]
-        feat_dict["male_pron"] = word in mp
-        feat_dict["prev_male_pron"] = any(t[0] in mp for t in sent)
-        feat_dict["neutral_pron"] = word in pp
-        feat_dict["prev_neutral_pron"] = any(t[0] in pp for t in sent)
-        feat_dict["female_pron"] = word in fp
-        feat_dict["prev_female_pron"] = any(t[0] in fp for t in sent)
-        feat_dict["inanimate_pron"] = word in np
-        feat_dict["prev_inanimate_pron"] = any(t[0] in np for t in sent)
-
-        # Match keywords for male entity
-        mwords = ["man", "men", "boy", "guy", "male", "gentleman",
-                  "brother", "father", "uncle", "grandfather"]
-        feat_dict["implicit_male"] = word in mwords
-        feat_dict["prev_male"] = any(t[0] in mwords for t in sent)
-
-        # Match keywords for female entity
-        fwords = ["woman", "women", "girl", "lady", "female",
-                  "sister", "mother", "aunt", "grandmother"]
-        feat_dict["implicit_female"] = word in fwords
-        feat_dict["prev_female"] = any(t[0] in fwords for t in sent)
+        for (k, prev_k), words in PronounTaggerTransformer._KEYWORD_FEATURES.items():
+            feat_dict[k] = word in words
+            feat_dict[prev_k] = any(t[0] in words for t in sent)
 
         return feat_dict
 
+    @classmethod
+    def extract_sentence_pronoun_features(cls, tokens, stemmer=None, memory=2):
+        """ extract_pronoun_features for every index of `tokens`,
+        the prev_* flags are carried along instead of rescanning the sentence"""
+        feats = extract_sentence_postag_features(tokens, stemmer=stemmer,
+                                                 memory=memory)
+        prev = dict.fromkeys(cls._KEYWORD_FEATURES, False)
+        prev_noun = False
+        for index, feat_dict in enumerate(feats):
+            word = tokens[index][0].lower().rstrip("s")
+            feat_dict["prev_noun"] = prev_noun
+            for (k, prev_k), words in cls._KEYWORD_FEATURES.items():
+                feat_dict[k] = word in words
+                feat_dict[prev_k] = prev[(k, prev_k)]
+            # prev flags for the next token
+            prev_noun = prev_noun or tokens[index][1] in ("NOUN", "PROPN")
+            for key, words in cls._KEYWORD_FEATURES.items():
+                prev[key] = prev[key] or tokens[index][0] in words
+        return feats
+
     def fit(self, *args, **kwargs):
         return self
 
     def transform(self, X, **transform_params):
         X = [self.tagger.postag(sent) for sent in X]
-        feats = [self.extract_pronoun_features(
-            X, index, memory=self.memory, stemmer=self.stemmer)
-            for index in range(len(X))]
+        feats = self.extract_sentence_pronoun_features(
+            X, memory=self.memory, stemmer=self.stemmer)
         return feats
 
 
-class PronounTaggerVectorizer(BaseEstimator, TransformerMixin):
-    def __init__(self, lang=None, stemmer=None, memory=2):
+class PronounTaggerVectorizer(_SparseVectorizerMixin, BaseEstimator, TransformerMixin):
+    def __init__(self, lang=None, stemmer=None, memory=2, sparse=True,
+                 n_features=None, alternate_sign=True):
         super().__init__()
+        self.sparse = sparse
+        self.n_features = n_features  # see WordFeaturesVectorizer
+        self.alternate_sign = alternate_sign
         self._coref_transformer = PronounTaggerTransformer(lang=lang, stemmer=stemmer, memory=memory)
-        self._dict_vectorizer = DictVectorizer()
+        self._dict_vectorizer = _dict_vectorizer(sparse, n_features, alternate_sign)
 
     def get_feature_names(self):
-        return self._dict_vectorizer.get_feature_names()
+        return _feature_names(self._dict_vectorizer)
 
     def fit(self, X, y=None, **kwargs):
         X = self._coref_transformer.transform(X)
@@ -413,14 +557,15 @@ class SentenceWordFeaturesTransformer(BaseEstimator, TransformerMixin):
         return feats
 
 
-class SentenceWordFeaturesVectorizer(BaseEstimator, TransformerMixin):
-    def __init__(self):
+class SentenceWordFeaturesVectorizer(_SparseVectorizerMixin, BaseEstimator, TransformerMixin):
+    def __init__(self, sparse=True):
         super().__init__()
+        self.sparse = sparse
         self._transformer = SentenceWordFeaturesTransformer()
-        self._vectorizer = DictVectorizer(sparse=False)
+        self._vectorizer = _dict_vectorizer(sparse)
 
     def get_feature_names(self):
-        return self._vectorizer.get_feature_names()
+        return self._vectorizer.get_feature_names_out()
 
     def fit(self, X, y=None, **kwargs):
         X = self._transformer.transform(X)
@@ -435,9 +580,13 @@ class SentenceWordFeaturesVectorizer(BaseEstimator, TransformerMixin):
 class SkipGramVectorizer(BaseEstimator, TransformerMixin):
 
     def __init__(self, n=2, k=2):
+        from nltk.util import skipgrams
         skipper = functools.partial(skipgrams, n=n, k=k)
         self._vectorizer = CountVectorizer(analyzer=skipper)
 
+    def __sklearn_is_fitted__(self):
+        return _is_fitted(self._vectorizer)
+
     def get_feature_names(self):
         return self._vectorizer.get_feature_names_out()
 
@@ -451,6 +600,35 @@ class SkipGramVectorizer(BaseEstimator, TransformerMixin):
         return self._vectorizer.transform(X)
 
 
+class SkipGramHashingVectorizer(BaseEstimator, TransformerMixin):
+    """ stateless SkipGramVectorizer, skipgrams are hashed into n_features columns
+
+    does not need fit, usable for incremental training (partial_fit)"""
+
+    def __init__(self, n=2, k=2, n_features=2 ** 20):
+        self.n = n
+        self.k = k
+        self.n_features = n_features
+
+    def __sklearn_is_fitted__(self):
+        return True
+
+    def fit(self, X, y=None, **kwargs):
+        return self
+
+    def transform(self, X, **transform_params):
+        from nltk.util import skipgrams
+        X = [[" ".join(g) for g in skipgrams(word_tokenize(t), self.n, self.k)]
+             for t in X]
+        hasher = HashingVectorizer(analyzer=_identity, n_features=self.n_features,
+                                   alternate_sign=False, norm=None)
+        return hasher.transform(X)
+
+
+def _identity(x):
+    return x
+
+
 class SkipGramTransformer(BaseEstimator, TransformerMixin):
 
     def __init__(self, n=2, k=2):
@@ -467,41 +645,193 @@ class SkipGramTransformer(BaseEstimator, TransformerMixin):
         return feats
 
 
+# bump when the layout of the compiled keyword index changes
+KEYWORD_INDEX_VERSION = 1
+
+# csv digest -> (entities, index, label keys, snapshot)
+# parsed + compiled entity files shared by every KeywordFeatures in the process,
+# instances copy the index the first time they modify it
+KEYWORD_INDEXES = ModelRegistry(max_models=4, max_bytes=None)
+
+
 class KeywordFeatures:
-    def __init__(self, csv_path=None, ignore_list=None):
+    def __init__(self, csv_path=None, ignore_list=None, background_rebuild=False,
+                 cache_dir=None):
         ignore_list = ignore_list or []
         self.ignore_list = ignore_list
         self.bias = {}  # just for logging
-        self.automatons = {}
-        self._needs_building = []
         self.entities = {}
+        # if True, match() keeps using the previous automaton while
+        # a new one is built in a background thread
+        self.background_rebuild = background_rebuild
+        # compiled index cache, also used by later load_entities calls
+        self.cache_dir = cache_dir
+        # lowercased sample -> {label: sample}
+        # all labels share a single automaton built from this index
+        self._index = {}
+        self._label_keys = {}  # label -> keys in the index
+        # keys changed since the base automaton was built, they are masked
+        # in the base and live in a small overlay automaton instead,
+        # so runtime registrations do not rebuild everything
+        self._changed_keys = set()
+        # True while _index/_label_keys are shared with KEYWORD_INDEXES
+        self._shared_index = False
+        # (base, overlay, masked keys, label order), swapped atomically
+        self._snapshot = None
+        self._dirty = set()  # labels changed since the last rebuild
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._rebuild_thread = None
         if csv_path:
-            self.load_entities(csv_path)
+            self.load_entities(csv_path, cache_dir=cache_dir)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_lock", None)
+        state.pop("_build_lock", None)
+        state.pop("_rebuild_thread", None)
+        return state
+
+    def __setstate__(self, state):
+        # models pickled before the merged automaton kept one automaton per label
+        automatons = state.pop("automatons", None)
+        state.setdefault("cache_dir", None)
+        self.__dict__.update(state)
+        self._shared_index = False  # unpickled data is never shared
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._rebuild_thread = None
+        if automatons is not None:
+            self.background_rebuild = False
+            self._index = {}
+            self._label_keys = {}
+            for name, automaton in automatons.items():
+                for key, sample in automaton.items():
+                    self._index.setdefault(key, {})[name] = sample
+                    self._label_keys.setdefault(name, set()).add(key)
+            self._changed_keys = set()
+            self._snapshot = None
+            self._dirty = set(automatons)
+            self.__dict__.pop("_needs_building", None)
+
+    def _own_index(self):
+        # copy on write, call with self._lock held
+        if self._shared_index:
+            self._index = {k: dict(v) for k, v in self._index.items()}
+            self._label_keys = {k: set(v) for k, v in self._label_keys.items()}
+            self._shared_index = False
+
+    def _add_samples(self, name, samples):
+        with self._lock:
+            self._own_index()
+            keys = self._label_keys.setdefault(name, set())
+            for s in samples:
+                key = s.lower()
+                self._index.setdefault(key, {})[name] = s
+                keys.add(key)
+                self._changed_keys.add(key)
+            self._dirty.add(name)
+
+    def _remove_label(self, name):
+        with self._lock:
+            self._own_index()
+            for key in self._label_keys.pop(name, []):
+                samples = self._index[key]
+                samples.pop(name, None)
+                if not samples:
+                    self._index.pop(key)
+                self._changed_keys.add(key)
+            self._dirty.add(name)
+
+    @staticmethod
+    def _make_automaton(payloads):
+        import ahocorasick
+        automaton = ahocorasick.Automaton()
+        for key, payload in payloads:
+            automaton.add_word(key, (key, payload))
+        if not len(automaton):
+            return None
+        automaton.make_automaton()
+        return automaton
+
+    def _build_automaton(self):
+        with self._build_lock:
+            # copy what we need under the lock, registrations made while
+            # the automaton is being built mark it dirty again
+            with self._lock:
+                # compact everything into the base automaton once
+                # the overlay gets too big to be cheap to rebuild
+                full = self._snapshot is None or \
+                       len(self._changed_keys) * 10 > len(self._index)
+                if full:
+                    keys = list(self._index)
+                    self._changed_keys = set()
+                    masked = frozenset()
+                else:
+                    keys = list(self._changed_keys)
+                    masked = frozenset(self._changed_keys)
+                payloads = []
+                for key in keys:
+                    samples = self._index.get(key, {})
+                    payload = tuple((name, s) for name, s in samples.items()
+                                    if len(s) >= 3)
+                    if payload:
+                        payloads.append((key, payload))
+                # match() yields grouped by label, in the order labels were added
+                label_order = {name: idx for idx, name in enumerate(list(self.entities))}
+                self._dirty = set()
+
+            if full:
+                self._snapshot = (self._make_automaton(payloads), None,
+                                  masked, label_order)
+            else:
+                self._snapshot = (self._snapshot[0], self._make_automaton(payloads),
+                                  masked, label_order)
+
+    def _background_build(self):
+        while self._dirty:
+            self._build_automaton()
+
+    def rebuild(self, wait=True):
+        """ (re)build the automaton now instead of on the next match
+
+        with wait=False the build happens in a background thread
+        and readers keep using the previous automaton until it is done"""
+        if wait:
+            if self._rebuild_thread is not None:
+                self._rebuild_thread.join()
+            if self._dirty or self._snapshot is None:
+                self._build_automaton()
+            return
+        if self._rebuild_thread is None or not self._rebuild_thread.is_alive():
+            self._rebuild_thread = threading.Thread(target=self._background_build,
+                                                    daemon=True)
+            self._rebuild_thread.start()
 
     def reset_automatons(self):
         # "untrain" the automatons
-        self._needs_building = [name for name in self.automatons]
-        self.automatons = {name: ahocorasick.Automaton() for name in self.automatons.keys()}
+        with self._lock:
+            self._index = {}
+            self._label_keys = {}
+            self._shared_index = False
         for name, samples in self.entities.items():
-            for s in samples:
-                self.automatons[name].add_word(s.lower(), s)
+            self._add_samples(name, samples)
 
     def register_entity(self, name, samples):
         """ register runtime entity samples,
             eg from skills"""
-        if name not in self.entities:
-            self.entities[name] = []
-        self.entities[name] += samples
+        # not in place, the sample lists may be shared with other instances
+        self.entities[name] = self.entities.get(name, []) + list(samples)
         if name not in self.bias:
             self.bias[name] = []
         self.bias[name] += samples
+        self._add_samples(name, samples)
 
-        if name not in self.automatons:
-            self.automatons[name] = ahocorasick.Automaton()
-        for s in samples:
-            self.automatons[name].add_word(s.lower(), s)
-
-        self._needs_building.append(name)
+    def register_entities(self, entities):
+        """ register many runtime entities at once,
+            eg. {name: [samples]}, the automaton is rebuilt only once"""
+        for name, samples in entities.items():
+            self.register_entity(name, samples)
 
     def deregister_entity(self, name):
         """ register runtime entity samples,
@@ -510,17 +840,51 @@ class KeywordFeatures:
             self.entities.pop(name)
         if name in self.bias:
             self.bias.pop(name)
-        if name in self.automatons:
-            self.automatons.pop(name)
-        if name in self._needs_building:
-            self._needs_building.remove(name)
+        self._remove_label(name)
 
-    def load_entities(self, csv_path):
-        ents = {}
+    def deregister_entities(self, names):
+        for name in names:
+            self.deregister_entity(name)
+
+    def load_entities(self, csv_path, cache_dir=None):
+        """ load entities from csv files
+
+        if cache_dir is set, the parsed entities and the compiled automaton
+        are saved there, keyed by a hash of the csv contents, and loaded
+        from disk on the next call instead of being rebuilt
+
+        within a process the same files are only parsed and compiled once,
+        see KEYWORD_INDEXES"""
+        cache_dir = cache_dir or self.cache_dir
         if isinstance(csv_path, str):
             files = [csv_path]
         else:
             files = csv_path
+
+        index_path = digest = None
+        # shared and compiled indexes can only be used as a starting point
+        if not self.entities and not self._index:
+            sha = hashlib.sha256()
+            for csv_path in files:
+                with open(csv_path, "rb") as f:
+                    sha.update(f.read())
+                sha.update(b"\0")
+            digest = sha.hexdigest()
+            if cache_dir:
+                index_path = f"{cache_dir}/{digest}.kwidx"
+            shared = KEYWORD_INDEXES.get(digest)
+            if shared is not None:
+                self._adopt_index(shared)
+                if index_path and not isfile(index_path):
+                    self._save_index(index_path, digest)
+                return {k: list(v) for k, v in self.entities.items()}
+            if index_path:
+                if isfile(index_path) and self._load_index(index_path, digest):
+                    self._share_index(digest)
+                    return {k: list(v) for k, v in self.entities.items()}
+
+        from anyascii import anyascii as latinize_text
+        ents = {}
         data = []
         for csv_path in files:
             with open(csv_path) as f:
@@ -532,47 +896,125 @@ class KeywordFeatures:
                 ents[n] = []
             s = latinize_text(s)
             ents[n].append(s)
-            self._needs_building.append(n)
 
-        for k, samples in ents.items():
-            self._needs_building.append(k)
-            if k not in self.automatons:
-                self.automatons[k] = ahocorasick.Automaton()
-            for s in samples:
-                self.automatons[k].add_word(s.lower(), s)
         self.entities.update(ents)
+        for k, samples in ents.items():
+            self._add_samples(k, samples)
+
+        if digest:
+            self.rebuild()
+            if index_path:
+                self._save_index(index_path, digest)
+            self._share_index(digest)
         return ents
 
-    def match(self, utt):
-        for k, automaton in self.automatons.items():
-            if k in self._needs_building:
-                automaton.make_automaton()
+    def _share_index(self, digest):
+        with self._lock:
+            shared = (dict(self.entities), self._index,
+                      self._label_keys, self._snapshot)
+            self._shared_index = True
+        KEYWORD_INDEXES.put(digest, shared)
+
+    def _adopt_index(self, shared):
+        entities, index, label_keys, snapshot = shared
+        with self._lock:
+            self.entities.update(entities)
+            self._index = index
+            self._label_keys = label_keys
+            self._shared_index = True
+            self._changed_keys = set()
+            self._snapshot = snapshot
+            self._dirty = set()
+
+    def _save_index(self, path, digest):
+        with self._lock:
+            state = {"version": KEYWORD_INDEX_VERSION,
+                     "csv_hash": digest,
+                     "entities": self.entities,
+                     "index": self._index,
+                     "label_keys": self._label_keys,
+                     "snapshot": self._snapshot}
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # write + rename, other processes may be reading it
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+            except OSError as e:
+                LOG.warning(f"failed to save keyword index {path}: {e}")
+
+    def _load_index(self, path, digest):
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            LOG.warning(f"failed to load keyword index {path}: {e}")
+            return False
+        if state.get("version") != KEYWORD_INDEX_VERSION or \
+                state.get("csv_hash") != digest:
+            return False
+        with self._lock:
+            self.entities.update(state["entities"])
+            self._index = state["index"]
+            self._label_keys = state["label_keys"]
+            self._changed_keys = set()
+            self._snapshot = state["snapshot"]
+            self._dirty = set()
+        return True
 
-        self._needs_building = []
+    def match(self, utt):
+        if self._snapshot is None or \
+                (self._dirty and not self.background_rebuild):
+            self.rebuild()
+        elif self._dirty:
+            self.rebuild(wait=False)
+        # readers only touch this snapshot, a concurrent rebuild swaps it
+        base, overlay, masked, label_order = self._snapshot
 
         utt = utt.lower().strip(".!?,;:")
 
-        for k, automaton in self.automatons.items():
-            # skip automatons without registered samples
-            if not self.entities.get(k):
+        hits = []
+        boundaries = {}  # key -> passes the whole utterance word checks
+        tokens = None
+        for automaton in (base, overlay):
+            if automaton is None:
                 continue
-
-            for idx, v in automaton.iter(utt):
-                if len(v) < 3:
-                    continue
-
-                if "_name" in k and v.lower() in self.ignore_list:
-                    # LOG.debug(f"ignoring {k}:  {v}")
+            for end, (key, payload) in automaton.iter(utt):
+                if automaton is base and key in masked:
+                    continue  # changed after the base was built
+                start = end - len(key) + 1
+                # filter partial words
+                if (start == 0 or utt[start - 1] == " ") and \
+                        (end == len(utt) - 1 or utt[end + 1] == " "):
+                    is_word = True
+                else:
+                    # not delimited at this offset, but the keyword may still
+                    # be a full word elsewhere in the utterance
+                    is_word = boundaries.get(key)
+                    if is_word is None:
+                        if tokens is None:
+                            tokens = utt.split(" ")
+                        is_word = (" " in key or key in tokens) and \
+                                  (key + " " in utt or utt.endswith(key))
+                        boundaries[key] = is_word
+                if not is_word:
                     continue
 
-                # filter partial words
-                if " " not in v:
-                    if v.lower() not in utt.split(" "):
+                for k, v in payload:
+                    # skip labels without registered samples
+                    if not self.entities.get(k):
                         continue
-                if v.lower() + " " in utt or utt.endswith(v.lower()):
-                    # if k in self.bias:
-                    #    LOG.debug(f"BIAS {k} : {v}")
-                    yield k, v
+                    if "_name" in k and key in self.ignore_list:
+                        # LOG.debug(f"ignoring {k}:  {v}")
+                        continue
+                    hits.append((label_order.get(k, len(label_order)), end, -len(key), k, v))
+
+        # group by label, within a label keep the automaton order,
+        # ie. by end offset and longest keyword first
+        hits.sort(key=lambda h: h[:3])
+        for _, _, _, k, v in hits:
+            yield k, v
 
     def count(self, sentence):
         match = {k: 0 for k in self.entities.keys()}
@@ -596,12 +1038,30 @@ class KeywordFeatures:
         return match
 
 
+# KeywordFeaturesTransformer/Vectorizer params missing from old pickles
+_KEYWORD_PARAMS = {"csv_path": None, "ignore_list": None, "background_rebuild": False,
+                   "cache_dir": None}
+
+
 class KeywordFeaturesTransformer(BaseEstimator, TransformerMixin):
 
-    def __init__(self, csv_path=None, ignore_list=None, **kwargs):
-        self.wordlist = KeywordFeatures(csv_path, ignore_list)
+    def __init__(self, csv_path=None, ignore_list=None, background_rebuild=False,
+                 cache_dir=None, **kwargs):
+        self.csv_path = csv_path
+        self.ignore_list = ignore_list
+        self.background_rebuild = background_rebuild
+        self.cache_dir = cache_dir
+        self.wordlist = KeywordFeatures(csv_path, ignore_list,
+                                        background_rebuild=background_rebuild,
+                                        cache_dir=cache_dir)
         super().__init__(**kwargs)
 
+    def __setstate__(self, state):
+        # pickled before the params were stored, get_params/clone need them
+        for k, v in _KEYWORD_PARAMS.items():
+            state.setdefault(k, v)
+        super().__setstate__(state)
+
     @property
     def labels(self):
         return sorted(list(self.wordlist.entities.keys()))
@@ -609,19 +1069,25 @@ class KeywordFeaturesTransformer(BaseEstimator, TransformerMixin):
     def ignore(self, samples):
         self.wordlist.ignore_list += samples
 
-    def load_entities(self, csv_path):
-        self.wordlist.load_entities(csv_path)
+    def load_entities(self, csv_path, cache_dir=None):
+        self.wordlist.load_entities(csv_path, cache_dir=cache_dir)
 
     def register_entity(self, name, samples):
         """ register runtime entity samples,
             eg from skills"""
         self.wordlist.register_entity(name, samples)
 
+    def register_entities(self, entities):
+        self.wordlist.register_entities(entities)
+
     def deregister_entity(self, name):
         """ register runtime entity samples,
             eg from skills"""
         self.wordlist.deregister_entity(name)
 
+    def deregister_entities(self, names):
+        self.wordlist.deregister_entities(names)
+
     def fit(self, *args, **kwargs):
         return self
 
@@ -636,9 +1102,18 @@ class KeywordFeaturesTransformer(BaseEstimator, TransformerMixin):
 
 
 class KeywordFeaturesVectorizer(BaseEstimator, TransformerMixin):
-    def __init__(self, csv_path=None, ignore_list=None, **kwargs):
+    def __init__(self, csv_path=None, ignore_list=None, background_rebuild=False,
+                 cache_dir=None, sparse=True, **kwargs):
         super().__init__(**kwargs)
-        self._transformer = KeywordFeaturesTransformer(csv_path, ignore_list, **kwargs)
+        self.csv_path = csv_path
+        self.ignore_list = ignore_list
+        self.background_rebuild = background_rebuild
+        self.cache_dir = cache_dir
+        self.sparse = sparse
+        self._transformer = KeywordFeaturesTransformer(csv_path, ignore_list,
+                                                       background_rebuild=background_rebuild,
+                                                       cache_dir=cache_dir,
+                                                       **kwargs)
         # NOTE: changing this list requires retraining the classifier
         self.labels_index = []
 
@@ -649,8 +1124,8 @@ class KeywordFeaturesVectorizer(BaseEstimator, TransformerMixin):
     def ignore(self, samples):
         self._transformer.ignore(samples)
 
-    def load_entities(self, csv_path):
-        self._transformer.load_entities(csv_path)
+    def load_entities(self, csv_path, cache_dir=None):
+        self._transformer.load_entities(csv_path, cache_dir=cache_dir)
         self.fit()
 
     def register_entity(self, name, samples):
@@ -659,17 +1134,47 @@ class KeywordFeaturesVectorizer(BaseEstimator, TransformerMixin):
         self._transformer.register_entity(name, samples)
         self.fit()
 
+    def register_entities(self, entities):
+        """ register many runtime entities at once, eg. {name: [samples]}"""
+        self._transformer.register_entities(entities)
+        self.fit()
+
     def deregister_entity(self, name):
         """ register runtime entity samples,
             eg from skills"""
         self._transformer.deregister_entity(name)
         self.fit()
 
+    def deregister_entities(self, names):
+        self._transformer.deregister_entities(names)
+        self.fit()
+
     def fit(self, *args, **kwargs):
         self.labels_index = sorted(self.labels)
         return self
 
+    def __setstate__(self, state):
+        # pickled before the `sparse` param, keep the dense output
+        state.setdefault("sparse", False)
+        for k, v in _KEYWORD_PARAMS.items():
+            state.setdefault(k, v)
+        super().__setstate__(state)
+
     def transform(self, X, **transform_params):
+        if self.sparse:
+            # one column per label, most utterances match few labels
+            index = {label: i for i, label in enumerate(self.labels_index)}
+            rows, cols, data = [], [], []
+            n = 0
+            for n, x in enumerate(self._transformer.transform(X), 1):
+                for label, v in x.items():
+                    if label in index and v:
+                        rows.append(n - 1)
+                        cols.append(index[label])
+                        data.append(v)
+            return sparse.csr_matrix((data, (rows, cols)), dtype=np.float32,
+                                     shape=(n, len(index)))
+
         X2 = []
         for x in self._transformer.transform(X):
             feats = []
@@ -684,16 +1189,21 @@ class KeywordFeaturesVectorizer(BaseEstimator, TransformerMixin):
 
 
 class OCPKeywordFeaturesVectorizer(KeywordFeaturesVectorizer):
-    def __init__(self, ignore_list=None, **kwargs):
+    def __init__(self, ignore_list=None, background_rebuild=False, **kwargs):
+        from ovos_classifiers.datasets import get_ocp_entities_dataset
         get_ocp_entities_dataset()  # ensure file exists
         csv_path = f"{xdg_data_home()}/OpenVoiceOS/datasets/ocp_entities_v0.csv"
-        super().__init__(csv_path, ignore_list, **kwargs)
+        # compiled once per csv version, then loaded from disk
+        kwargs["cache_dir"] = kwargs.get("cache_dir") or \
+                              f"{xdg_cache_home()}/OpenVoiceOS/classifiers/keywords"
+        super().__init__(csv_path, ignore_list, background_rebuild=background_rebuild, **kwargs)
 
 
 class ClassifierProbaVectorizer(BaseEstimator, TransformerMixin):
     def __init__(self, base_clf=None, prefit=True, **kwargs):
         super().__init__(**kwargs)
         if base_clf is None:
+            from sklearn.linear_model import Perceptron
             prefit = False
             base_clf = Perceptron()
         self.clf = base_clf
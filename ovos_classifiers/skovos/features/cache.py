@@ -0,0 +1,148 @@
+# content addressed cache for fitted feature extractors
+# pipeline searches train many pipelines on the same data, pipelines sharing
+# components (eg. the ocp keyword features) only compute them once
+import hashlib
+import os
+from os.path import isfile
+
+import joblib
+import numpy as np
+from ovos_utils.log import LOG
+from ovos_utils.xdg_utils import xdg_cache_home
+from scipy import sparse
+from sklearn.pipeline import Pipeline, FeatureUnion
+
+DEFAULT_CACHE_DIR = f"{xdg_cache_home()}/OpenVoiceOS/classifiers/features"
+
+
+def _skip(step):
+    return step is None or (isinstance(step, str) and step in ("drop", "passthrough"))
+
+
+def _input_key(X):
+    """ content hash of a raw dataset
+
+    lists and arrays are hashed by joblib, lazy iterables (eg. a
+    CSVDataset.utterances() view) are hashed while streaming over them,
+    hashing the object itself would only hash the file paths """
+    if X is None or isinstance(X, (list, tuple, np.ndarray)) or sparse.issparse(X):
+        return joblib.hash(X)
+    h = hashlib.sha256()
+    for x in X:
+        h.update(repr(x).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _hstack(Xs):
+    # same as FeatureUnion._hstack
+    if any(sparse.issparse(f) for f in Xs):
+        return sparse.hstack(Xs).tocsr()
+    return np.hstack(Xs)
+
+
+class FeaturesCache:
+    """ fitted transformers and their outputs, stored on disk by content
+
+    the key of a transformer output is the hash of the unfitted transformer
+    and of its input key, the input of a features pipeline is the raw
+    dataset (hashed), so equal components of different pipelines share entries
+
+    Pipeline steps and FeatureUnion components are cached individually
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+
+    def fit_transform(self, transformer, X, y=None, X_test=None):
+        """ fit transformer on (X, y) and transform X and X_test
+
+        returns (fitted transformer, X features, X_test features)
+        the transformer is fitted in place or replaced by a cached copy,
+        only use the returned object """
+        key = joblib.hash((_input_key(X), y))
+        test_key = _input_key(X_test) if X_test is not None else None
+        transformer, Xt, Xt_test, _, _ = self._fit_transform(transformer, X, y, key,
+                                                             X_test, test_key)
+        return transformer, Xt, Xt_test
+
+    def _fit_transform(self, transformer, X, y, key, X_test, test_key):
+        if isinstance(transformer, Pipeline):
+            steps = []
+            for name, step in transformer.steps:
+                if not _skip(step):
+                    step, X, X_test, key, test_key = self._fit_transform(step, X, y, key,
+                                                                         X_test, test_key)
+                steps.append((name, step))
+            transformer.steps = steps
+            return transformer, X, X_test, key, test_key
+
+        if isinstance(transformer, FeatureUnion):
+            weights = transformer.transformer_weights or {}
+            transformers, Xs, Xs_test, keys, test_keys = [], [], [], [], []
+            for name, t in transformer.transformer_list:
+                if not _skip(t):
+                    t, Xt, Xt_test, k, tk = self._fit_transform(t, X, y, key,
+                                                                X_test, test_key)
+                    if weights.get(name) is not None:
+                        Xt = Xt * weights[name]
+                        Xt_test = Xt_test * weights[name] if Xt_test is not None else None
+                    Xs.append(Xt)
+                    Xs_test.append(Xt_test)
+                    keys.append(k)
+                    test_keys.append(tk)
+                transformers.append((name, t))
+            transformer.transformer_list = transformers
+            Xt_test = _hstack(Xs_test) if X_test is not None else None
+            return (transformer, _hstack(Xs), Xt_test,
+                    joblib.hash((keys, weights)), joblib.hash(test_keys))
+
+        fit_key = joblib.hash((transformer, key))
+        path = f"{self.cache_dir}/{fit_key}.fit.pkl"
+        cached = self._load(path)
+        if cached is None:
+            self.misses += 1
+            Xt = transformer.fit_transform(X, y)
+            self._save(path, (transformer, Xt))
+        else:
+            self.hits += 1
+            transformer, Xt = cached
+
+        Xt_test = out_test_key = None
+        if X_test is not None:
+            out_test_key = joblib.hash((fit_key, test_key))
+            path = f"{self.cache_dir}/{out_test_key}.pkl"
+            Xt_test = self._load(path)
+            if Xt_test is None:
+                Xt_test = transformer.transform(X_test)
+                self._save(path, Xt_test)
+        return transformer, Xt, Xt_test, fit_key, out_test_key
+
+    @staticmethod
+    def _load(path):
+        if not isfile(path):
+            return None
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            LOG.warning(f"failed to load cached features {path}: {e}")
+            return None
+
+    def _save(self, path, value):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write + rename, other processes may be reading it
+            tmp = f"{path}.{os.getpid()}.tmp"
+            joblib.dump(value, tmp)
+            os.replace(tmp, path)
+        except Exception as e:
+            LOG.warning(f"failed to cache features {path}: {e}")
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for f in os.listdir(self.cache_dir):
+            if f.endswith(".pkl"):
+                os.remove(f"{self.cache_dir}/{f}")
@@ -1,10 +1,9 @@
 import re
 
-import nltk
 from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.feature_extraction import DictVectorizer
 
-from ovos_classifiers.utils import normalize
+from ovos_classifiers.skovos.features import _SparseVectorizerMixin, _dict_vectorizer
+from ovos_classifiers.utils import normalize, get_lemmatizer
 
 
 class WordNetLemmatizerTransformer(BaseEstimator, TransformerMixin):
@@ -12,7 +11,7 @@ class WordNetLemmatizerTransformer(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, X, **transform_params):
-        return normalize(X, stemmer=nltk.stem.WordNetLemmatizer(),
+        return normalize(X, stemmer=get_lemmatizer(),
                          **transform_params)
 
 
@@ -68,14 +67,15 @@ class QuestionFeaturesTransformerEN(BaseEstimator, TransformerMixin):
         return feats
 
 
-class QuestionFeaturesVectorizerEN(BaseEstimator, TransformerMixin):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+class QuestionFeaturesVectorizerEN(_SparseVectorizerMixin, BaseEstimator, TransformerMixin):
+    def __init__(self, sparse=True):
+        super().__init__()
+        self.sparse = sparse
         self._transformer = QuestionFeaturesTransformerEN()
-        self._vectorizer = DictVectorizer(sparse=False)
+        self._vectorizer = _dict_vectorizer(sparse)
 
     def get_feature_names(self):
-        return self._vectorizer.get_feature_names()
+        return self._vectorizer.get_feature_names_out()
 
     def fit(self, X, y=None, **kwargs):
         X = self._transformer.transform(X)
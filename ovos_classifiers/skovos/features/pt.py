@@ -1,9 +1,11 @@
 import re
+from functools import lru_cache
 
-import nltk
+from nltk.stem.rslp import RSLPStemmer
 from sklearn.base import BaseEstimator, TransformerMixin
 
-from ovos_classifiers.utils import normalize
+from ovos_classifiers.utils import normalize, CachedStemmer
+from ovos_classifiers.utils.nltk_resources import ensure_resource
 
 
 def word_tokenize_pt(sentence):
@@ -22,14 +24,21 @@ def word_tokenize_pt(sentence):
     return postprocess
 
 
+@lru_cache(maxsize=None)
+def get_rslp_stemmer():
+    """ shared, memoized RSLP stemmer, the rules are only loaded once """
+    ensure_resource('rslp')
+    return CachedStemmer(RSLPStemmer())
+
+
 class RSLPStemmerTransformer(BaseEstimator, TransformerMixin):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        nltk.download('rslp')
+        ensure_resource('rslp')
 
     def fit(self, *args, **kwargs):
         return self
 
     def transform(self, X, **transform_params):
-        return normalize(X, stemmer=nltk.stem.rslp.RSLPStemmer(),
+        return normalize(X, stemmer=get_rslp_stemmer(),
                          **transform_params)
@@ -1,16 +1,20 @@
 import abc
 import random
 import time
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 
+import numpy as np
 from ovos_utils.log import LOG
-from ovos_utils import create_daemon
 from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import balanced_accuracy_score, classification_report
-from sklearn.model_selection import RandomizedSearchCV, train_test_split
+from sklearn.model_selection import RandomizedSearchCV
 from sklearn.neural_network import MLPClassifier
 from sklearn.linear_model import Perceptron
+from sklearn.pipeline import Pipeline
+from ovos_classifiers.datasets.streaming import CSVDataset
 from ovos_classifiers.skovos.classifier import SklearnOVOSClassifier
+from ovos_classifiers.skovos.features.cache import FeaturesCache
 from ovos_classifiers.skovos.pipelines import get_features_pipeline
 
 
@@ -23,35 +27,117 @@ class TrainingRun:
     report: str = ""
     start_ts: float = 0
     end_ts: float = 0
+    featurize_time: float = 0  # seconds spent extracting features
+    fit_time: float = 0  # seconds spent fitting (and searching) the classifier
+    # hyperparam search candidates not beaten in both fit time and score, fastest first
+    pareto_front: list = field(default_factory=list)
+
+    @property
+    def wall_time(self):
+        return self.end_ts - self.start_ts
+
+
+def pareto_front(cv_results):
+    """ (fit time, cross validation score) pareto optimal candidates of a search
+
+    returns a list of dicts with params, fit_time, score and, for successive
+    halving, the n_resources the candidate was evaluated with, fastest first
+    """
+    n_resources = cv_results.get("n_resources", [None] * len(cv_results["params"]))
+    points = sorted(zip(cv_results["mean_fit_time"], cv_results["mean_test_score"],
+                        cv_results["params"], n_resources),
+                    key=lambda p: (p[0], -p[1]))
+    front = []
+    best = -np.inf
+    for fit_time, score, params, resources in points:
+        if np.isnan(score) or score <= best:
+            continue
+        best = score
+        point = {"params": params, "fit_time": float(fit_time), "score": float(score)}
+        if resources is not None:
+            point["n_resources"] = int(resources)
+        front.append(point)
+    return front
+
+
+def _train_pipeline(trainer_cls, pipeline_id, csv_path, test_csv_path=None,
+                    search_hyperparams=False, cache_dir=None, random_state=None,
+                    search="random"):
+    # module level so it can run in a process pool
+    trainer = trainer_cls(pipeline_id, cache_dir=cache_dir, random_state=random_state)
+    if search_hyperparams:
+        LOG.info(f"finding best hyperparams for pipeline: {pipeline_id}")
+        return trainer.hyperparam_search(csv_path, test_csv_path, search=search)
+    LOG.info(f"training pipeline: {pipeline_id}")
+    return trainer.train(csv_path, test_csv_path)
 
 
 class BaseTrainer:
 
-    def __init__(self, pipeline_id="raw", featurizer=None):
+    def __init__(self, pipeline_id="raw", featurizer=None, cache_dir=None, random_state=None):
         self.pipeline_id = pipeline_id
         self.featurizer = featurizer
+        # share extracted features between trainers, see FeaturesCache
+        self.features_cache = FeaturesCache(cache_dir) if cache_dir else None
+        self.random_state = random_state
 
     def split_train_test(self, csv_path, test_size=0.6):
-        X, y = self.read_csv(csv_path)
-        X_train, X_test, y_train, y_test = train_test_split(X, y,
-                                                            test_size=test_size,
-                                                            stratify=y)
-        return X_train, X_test, y_train, y_test
+        train, test = CSVDataset(csv_path).train_test_split(test_size=test_size,
+                                                            random_state=self.random_state)
+        # the utterances stay on disk, only the labels are loaded
+        return train.utterances(), test.utterances(), train.labels(), test.labels()
+
+    def featurize(self, X_train, y_train, X_test=None):
+        """ returns (fitted features pipeline, train features, test features)
+
+        with pipeline_id "raw" self.featurizer must already be fitted"""
+        if self.pipeline_id == "raw":
+            pipeline = self.featurizer
+            feats = pipeline.transform(X_train)  # run trough pipeline feature extractor
+        elif self.features_cache is not None:
+            return self.features_cache.fit_transform(get_features_pipeline(self.pipeline_id),
+                                                     X_train, y_train, X_test)
+        else:
+            pipeline = get_features_pipeline(self.pipeline_id)
+            feats = pipeline.fit_transform(X_train, y_train)  # train/prepare feature extractors
+        feats_test = pipeline.transform(X_test) if X_test is not None else None
+        return pipeline, feats, feats_test
+
+    def fitted_classifier(self, features, clf):
+        """ SklearnOVOSClassifier from an already fitted features pipeline and classifier """
+        classifier = SklearnOVOSClassifier(self.pipeline_id, clf)
+        if self.pipeline_id != "raw":
+            classifier.clf = Pipeline([('utils', features), ('clf', clf)])
+        return classifier
+
+    def search_cv(self, estimator, parameter_space, search="random", n_jobs=3,
+                  scoring=None, **halving_kwargs):
+        """ hyperparam search estimator, to be fitted on extracted features
+
+        search="random" evaluates every candidate with the full budget
+        search="halving" uses successive halving, candidates start with a
+        small budget and only the best ones get more (halving_kwargs are
+        passed to HalvingRandomSearchCV, eg. resource="max_iter")
+        scoring is used by both modes, None is the estimator accuracy"""
+        if search == "random":
+            return RandomizedSearchCV(estimator, parameter_space, n_jobs=n_jobs, cv=5,
+                                      scoring=scoring, random_state=self.random_state)
+        if search == "halving":
+            # still experimental in sklearn
+            from sklearn.experimental import enable_halving_search_cv  # noqa
+            from sklearn.model_selection import HalvingRandomSearchCV
+            return HalvingRandomSearchCV(estimator, parameter_space, n_jobs=n_jobs, cv=5,
+                                         scoring=scoring, random_state=self.random_state,
+                                         **halving_kwargs)
+        raise ValueError(f"unknown search: {search}, expected 'random' or 'halving'")
 
     def read_csv(self, csv_paths):
-        if isinstance(csv_paths, str):
-            csv_paths = [csv_paths]
-        data = []
-        for csv_path in csv_paths:
-            with open(csv_path) as f:
-                lines = f.readlines()[1:]
-                data += [line.strip().split(",") for line in lines if "," in line]
-        X = [line[1] for line in data]
-        y = [line[0] for line in data]
-        return X, y
+        dataset = CSVDataset(csv_paths)
+        return dataset.utterances(), dataset.labels()
 
     @abc.abstractmethod
-    def hyperparam_search(self, csv_path, test_csv_path=None, parameter_space=None) -> TrainingRun:
+    def hyperparam_search(self, csv_path, test_csv_path=None, parameter_space=None,
+                          search="random") -> TrainingRun:
         raise NotImplemented
 
     @abc.abstractmethod
@@ -60,47 +146,46 @@ class BaseTrainer:
 
     @classmethod
     def find_best_pipeline(cls, pipelines, csv_path, test_csv_path=None,
-                           search_hyperparams=False, threaded=False, n_threads=4):
-        clfs = {p: None for p in pipelines}
-        trainers = []
-
-        for pipeline_id in pipelines:
-
-            # find the best hyperparams for a classifier with this pipeline
-            def train(pid=pipeline_id):
-                trainer = cls(pid)
-                if search_hyperparams:
-                    LOG.info(f"finding best hyperparams for pipeline: {pid}")
-                    clfs[pid] = trainer.hyperparam_search(csv_path, test_csv_path)
-                else:
-                    LOG.info(f"training pipeline: {pid}")
-                    clfs[pid] = trainer.train(csv_path, test_csv_path)
-
-            train.pid = pipeline_id
-
-            trainers.append(train)
-
-        # start training
-        threads = []
-        for t in trainers:
-            if threaded:
-                # 1 thread for each pipeline id
-                if len(threads) < n_threads:
-                    tr = create_daemon(t)
-                    tr.pipeline_id = t.pid
-                    threads.append(tr)
-                else:
-                    threads[0].join()  # wait
-                    yield clfs[threads[0].pipeline_id]
-                    threads = threads[1:]
-            else:
-                t()
-                yield clfs[t.pid]
-
-        # wait for all pipelines to train
-        for t in threads:
-            t.join()
-            yield clfs[t.pipeline_id]
+                           search_hyperparams=False, threaded=False, n_threads=4,
+                           n_workers=None, cache_dir=None, random_state=None,
+                           search="random"):
+        """ train a classifier for each pipeline, yields a TrainingRun as each one finishes
+
+        pipelines are trained in a pool of n_workers processes (threaded=True
+        means n_threads workers), or one after the other if n_workers is not set
+        pipelines that fail are logged and skipped, they are not yielded
+
+        random_state seeds the train/test split, set it so all pipelines are
+        evaluated on the same data, None gives each pipeline its own split
+        cache_dir enables a FeaturesCache shared by all pipelines (eg.
+        DEFAULT_CACHE_DIR), it is not size limited, entries are a copy of the
+        extracted features of every dataset seen, delete the folder to free space
+        search is the hyperparam_search mode, "random" or "halving"
+        """
+        if threaded and not n_workers:
+            n_workers = n_threads
+        jobs = [(cls, pipeline_id, csv_path, test_csv_path, search_hyperparams,
+                 cache_dir, random_state, search) for pipeline_id in pipelines]
+
+        if not n_workers or n_workers <= 1:
+            for job in jobs:
+                try:
+                    run = _train_pipeline(*job)
+                except Exception as e:
+                    LOG.exception(f"{job[1]} training failed: {e}")
+                    continue
+                yield run
+            return
+
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {pool.submit(_train_pipeline, *job): job[1] for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    run = future.result()
+                except Exception as e:
+                    LOG.exception(f"{futures[future]} training failed: {e}")
+                    continue
+                yield run
 
 
 class MLPTrainer(BaseTrainer):
@@ -113,18 +198,20 @@ class MLPTrainer(BaseTrainer):
         else:
             X_train, X_test, y_train, y_test = self.split_train_test(csv_path, test_size=0.6)
 
+        features, feats, feats_test = self.featurize(X_train, y_train, X_test)
+        featurize_ts = time.time()
+
         c = MLPClassifier(max_iter=max_iter,
                           verbose=True)
         if calibrate:
             c = CalibratedClassifierCV(c)
+        c.fit(feats, y_train)
+        fit_ts = time.time()
 
-        clf = SklearnOVOSClassifier(self.pipeline_id, c)
-        clf.train(X_train, y_train)
+        clf = self.fitted_classifier(features, c)
 
         # test the classifier
-        # Note that we dont feed features here,
-        # the calibrated classifier uses the pipeline_id internally
-        y_pred = clf.predict(X_test)
+        y_pred = c.predict(feats_test)
         acc = balanced_accuracy_score(y_test, y_pred)
         report = f"Balanced Accuracy: {acc}\n" + \
                  classification_report(y_test, y_pred, target_names=c.classes_)
@@ -137,13 +224,20 @@ class MLPTrainer(BaseTrainer):
             accuracy=acc,
             report=report,
             start_ts=start_ts,
-            end_ts=time.time()
+            end_ts=time.time(),
+            featurize_time=featurize_ts - start_ts,
+            fit_time=fit_ts - featurize_ts
         )
 
         return run
 
     def hyperparam_search(self, csv_path, test_csv_path=None, max_iter=100,
-                          parameter_space=None, n_jobs=3, test_size=0.6) -> TrainingRun:
+                          parameter_space=None, n_jobs=3, test_size=0.6,
+                          search="random", n_candidates=27, scoring=None) -> TrainingRun:
+        """ search="halving" trains n_candidates MLPs for a few iterations,
+        only the best third is trained for factor 3 more iterations, until
+        max_iter, MLPs use early stopping
+        scoring ranks the candidates, eg. "balanced_accuracy", default accuracy """
 
         start_ts = time.time()
         if test_csv_path:
@@ -152,11 +246,8 @@ class MLPTrainer(BaseTrainer):
         else:
             X_train, X_test, y_train, y_test = self.split_train_test(csv_path, test_size=test_size)
 
-        if self.pipeline_id == "raw":
-            pipeline = self.featurizer
-        else:
-            pipeline = get_features_pipeline(self.pipeline_id)
-            pipeline.fit(X_train, y_train)  # train/prepare feature extractors
+        features, feats, feats_test = self.featurize(X_train, y_train, X_test)
+        featurize_ts = time.time()
 
         # define random search params
         parameter_space = parameter_space or {
@@ -181,10 +272,18 @@ class MLPTrainer(BaseTrainer):
         mlp_gs = MLPClassifier(max_iter=max_iter,
                                verbose=True)
 
-        # do a random search
-        c = RandomizedSearchCV(mlp_gs, parameter_space, n_jobs=n_jobs, cv=5)
-        feats = pipeline.transform(X_train)  # run trough pipeline feature extractor
-
+        if search == "halving":
+            # the budget is the number of training iterations
+            mlp_gs.set_params(early_stopping=True)
+            parameter_space = {k: v for k, v in parameter_space.items()
+                               if k not in ("early_stopping", "max_iter")}
+            c = self.search_cv(mlp_gs, parameter_space, search, n_jobs=n_jobs,
+                               scoring=scoring, resource="max_iter", max_resources=max_iter,
+                               min_resources="exhaust", n_candidates=n_candidates)
+        else:
+            # do a random search
+            c = self.search_cv(mlp_gs, parameter_space, search, n_jobs=n_jobs,
+                               scoring=scoring)
         c.fit(feats, y_train)
 
         LOG.info(f'Best parameters found:\n {c.best_params_}')
@@ -193,18 +292,13 @@ class MLPTrainer(BaseTrainer):
         # we want the output to be directly interpretable as a probability
         LOG.info("Calibrating classifier")
         calibrated = CalibratedClassifierCV(c.best_estimator_)
-        clf = SklearnOVOSClassifier(self.pipeline_id, calibrated)
-        if self.pipeline_id == "raw":
-            clf.train(feats, y_train)
-            feats = pipeline.transform(X_test)
-            y_pred = clf.predict(feats)
-        else:
-            clf.train(X_train, y_train)
-            y_pred = clf.predict(X_test)
+        calibrated.fit(feats, y_train)
+        fit_ts = time.time()
+
+        clf = self.fitted_classifier(features, calibrated)
 
         # test the classifier
-        # Note that we dont feed features here,
-        # the calibrated classifier uses the pipeline_id internally
+        y_pred = calibrated.predict(feats_test)
         acc = balanced_accuracy_score(y_test, y_pred)
 
         report = f"Balanced Accuracy: {acc}\n" + \
@@ -214,11 +308,14 @@ class MLPTrainer(BaseTrainer):
         run = TrainingRun(
             pipeline_id=self.pipeline_id,
             hyperparams=c.best_params_,
+            pareto_front=pareto_front(c.cv_results_),
             clf=clf,
             accuracy=acc,
             report=report,
             start_ts=start_ts,
-            end_ts=time.time()
+            end_ts=time.time(),
+            featurize_time=featurize_ts - start_ts,
+            fit_time=fit_ts - featurize_ts
         )
 
         return run
@@ -234,30 +331,19 @@ class PerceptronTrainer(BaseTrainer):
         else:
             X_train, X_test, y_train, y_test = self.split_train_test(csv_path, test_size=0.6)
 
-        if self.pipeline_id == "raw":
-            pipeline = self.featurizer
-        else:
-            pipeline = get_features_pipeline(self.pipeline_id)
-            pipeline.fit(X_train, y_train)  # train/prepare feature extractors
+        features, feats, feats_test = self.featurize(X_train, y_train, X_test)
+        featurize_ts = time.time()
 
         c = Perceptron( verbose=True)
         if calibrate:
             c = CalibratedClassifierCV(c)
+        c.fit(feats, y_train)
+        fit_ts = time.time()
 
-        clf = SklearnOVOSClassifier(self.pipeline_id, c)
-
-        if self.pipeline_id == "raw":
-            feats = pipeline.transform(X_train)  # run trough pipeline feature extractor
-            clf.train(feats, y_train)
-            feats = pipeline.transform(X_test)
-            y_pred = clf.predict(feats)
-        else:
-            clf.train(X_train, y_train)
-            y_pred = clf.predict(X_test)
+        clf = self.fitted_classifier(features, c)
 
         # test the classifier
-        # Note that we dont feed features here,
-        # the calibrated classifier uses the pipeline_id internally
+        y_pred = c.predict(feats_test)
         acc = balanced_accuracy_score(y_test, y_pred)
         report = f"Balanced Accuracy: {acc}\n" + \
                  classification_report(y_test, y_pred, target_names=c.classes_)
@@ -270,14 +356,19 @@ class PerceptronTrainer(BaseTrainer):
             accuracy=acc,
             report=report,
             start_ts=start_ts,
-            end_ts=time.time()
+            end_ts=time.time(),
+            featurize_time=featurize_ts - start_ts,
+            fit_time=fit_ts - featurize_ts
         )
 
         return run
 
     def hyperparam_search(self, csv_path, test_csv_path=None,
                           parameter_space=None, n_jobs=3,
-                          test_size=0.6) -> TrainingRun:
+                          test_size=0.6, search="random", scoring=None) -> TrainingRun:
+        """ search="halving" evaluates many candidates on a few samples,
+        only the best third is evaluated on factor 3 more samples
+        scoring ranks the candidates, eg. "balanced_accuracy", default accuracy """
 
         start_ts = time.time()
         if test_csv_path:
@@ -286,11 +377,8 @@ class PerceptronTrainer(BaseTrainer):
         else:
             X_train, X_test, y_train, y_test = self.split_train_test(csv_path, test_size=test_size)
 
-        if self.pipeline_id == "raw":
-            pipeline = self.featurizer
-        else:
-            pipeline = get_features_pipeline(self.pipeline_id)
-            pipeline.fit(X_train, y_train)  # train/prepare feature extractors
+        features, feats, feats_test = self.featurize(X_train, y_train, X_test)
+        featurize_ts = time.time()
 
         # define random search params
         parameter_space = parameter_space or {
@@ -301,10 +389,9 @@ class PerceptronTrainer(BaseTrainer):
         }
         mlp_gs = Perceptron(verbose=True)
 
-        # do a random search
-        c = RandomizedSearchCV(mlp_gs, parameter_space, n_jobs=n_jobs, cv=5)
-        feats = pipeline.transform(X_train)  # run trough pipeline feature extractor
-
+        # do a random search, the halving budget is the number of samples
+        c = self.search_cv(mlp_gs, parameter_space, search, n_jobs=n_jobs,
+                           scoring=scoring)
         c.fit(feats, y_train)
 
         LOG.info(f'Best parameters found:\n {c.best_params_}')
@@ -313,18 +400,13 @@ class PerceptronTrainer(BaseTrainer):
         # we want the output to be directly interpretable as a probability
         LOG.info("Calibrating classifier")
         calibrated = CalibratedClassifierCV(c.best_estimator_)
-        clf = SklearnOVOSClassifier(self.pipeline_id, calibrated)
-        if self.pipeline_id == "raw":
-            clf.train(feats, y_train)
-            feats = pipeline.transform(X_test)
-            y_pred = clf.predict(feats)
-        else:
-            clf.train(X_train, y_train)
-            y_pred = clf.predict(X_test)
+        calibrated.fit(feats, y_train)
+        fit_ts = time.time()
+
+        clf = self.fitted_classifier(features, calibrated)
 
         # test the classifier
-        # Note that we dont feed features here,
-        # the calibrated classifier uses the pipeline_id internally
+        y_pred = calibrated.predict(feats_test)
         acc = balanced_accuracy_score(y_test, y_pred)
 
         report = f"Balanced Accuracy: {acc}\n" + \
@@ -334,11 +416,14 @@ class PerceptronTrainer(BaseTrainer):
         run = TrainingRun(
             pipeline_id=self.pipeline_id,
             hyperparams=c.best_params_,
+            pareto_front=pareto_front(c.cv_results_),
             clf=clf,
             accuracy=acc,
             report=report,
             start_ts=start_ts,
-            end_ts=time.time()
+            end_ts=time.time(),
+            featurize_time=featurize_ts - start_ts,
+            fit_time=fit_ts - featurize_ts
         )
 
         return run
@@ -1,9 +1,9 @@
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer, HashingVectorizer
 from sklearn.pipeline import Pipeline, FeatureUnion
 
 from ovos_classifiers.skovos.features import WordFeaturesVectorizer, POSTaggerVectorizer, \
     PronounTaggerVectorizer, CorefIOBTaggerVectorizer, SingleWordFeaturesVectorizer, TokenizerTransformer, \
-    SkipGramVectorizer, LangFeaturesVectorizer, OCPKeywordFeaturesVectorizer, \
+    SkipGramVectorizer, SkipGramHashingVectorizer, LangFeaturesVectorizer, OCPKeywordFeaturesVectorizer, \
     ClassifierProbaVectorizer
 from ovos_classifiers.skovos.features.en import QuestionFeaturesVectorizerEN, WordNetLemmatizerTransformer
 
@@ -86,85 +86,203 @@ DEFAULT_PIPELINES = {
 """
 
 
+# pipeline_id -> factory returning a new, unfitted pipeline
+# only the requested pipeline is built, expensive components (taggers,
+# keyword automatons) are never instantiated for pipelines that are not used
+_PIPELINE_FACTORIES = {}
+
+
+def register_pipeline(pipeline_id, factory=None):
+    """ register a features pipeline factory under pipeline_id
+
+    can also be used as a decorator, eg.
+
+        @register_pipeline("my_pipeline")
+        def my_pipeline():
+            return Pipeline([("cv2", CountVectorizer())])
+    """
+
+    def decorator(f):
+        _PIPELINE_FACTORIES[pipeline_id] = f
+        return f
+
+    if factory is None:
+        return decorator
+    return decorator(factory)
+
+
+def list_pipelines():
+    return sorted(_PIPELINE_FACTORIES)
+
+
 def get_features_pipeline(pipeline_id="default"):
-    DEFAULT_PIPELINES = {
-        "naive": FeatureUnion([
-            ("word_feats", WordFeaturesVectorizer())
-        ]),
-        "words": FeatureUnion([
-            ("word_feats", SingleWordFeaturesVectorizer())
-        ]),
-        "postag_en": FeatureUnion([
-            ("postag", POSTaggerVectorizer(lang="en"))
-        ]),
-        "pronouns_en": FeatureUnion([
-            ("corefiob", PronounTaggerVectorizer(lang="en"))
-        ]),
-        "coref_en": FeatureUnion([
-            ("corefiob", CorefIOBTaggerVectorizer(lang="en"))
-        ]),
-        "cv2": Pipeline([
-            ("cv2", CountVectorizer(ngram_range=(1, 2)))
-        ]),
-        "lang": Pipeline([
-            ("lang", LangFeaturesVectorizer()),
-            ("word", SingleWordFeaturesVectorizer())
-        ]),
-        "tfidf": Pipeline([
-            ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
-        ]),
-        "skipgram2": Pipeline([
-            ('skipgram2', SkipGramVectorizer(2, 2))
-        ]),
-        "tfidf_lemma": Pipeline([
-            ("tokenize", TokenizerTransformer()),
+    if pipeline_id not in _PIPELINE_FACTORIES:
+        raise KeyError(f"unknown features pipeline: {pipeline_id}")
+    return _PIPELINE_FACTORIES[pipeline_id]()
+
+
+@register_pipeline("naive")
+def _naive():
+    return FeatureUnion([
+        ("word_feats", WordFeaturesVectorizer())
+    ])
+
+
+@register_pipeline("words")
+def _words():
+    return FeatureUnion([
+        ("word_feats", SingleWordFeaturesVectorizer())
+    ])
+
+
+@register_pipeline("postag_en")
+def _postag_en():
+    return FeatureUnion([
+        ("postag", POSTaggerVectorizer(lang="en"))
+    ])
+
+
+@register_pipeline("pronouns_en")
+def _pronouns_en():
+    return FeatureUnion([
+        ("corefiob", PronounTaggerVectorizer(lang="en"))
+    ])
+
+
+@register_pipeline("coref_en")
+def _coref_en():
+    return FeatureUnion([
+        ("corefiob", CorefIOBTaggerVectorizer(lang="en"))
+    ])
+
+
+@register_pipeline("cv2")
+def _cv2():
+    return Pipeline([
+        ("cv2", CountVectorizer(ngram_range=(1, 2)))
+    ])
+
+
+@register_pipeline("lang")
+def _lang():
+    return Pipeline([
+        ("lang", LangFeaturesVectorizer()),
+        ("word", SingleWordFeaturesVectorizer())
+    ])
+
+
+@register_pipeline("tfidf")
+def _tfidf():
+    return Pipeline([
+        ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
+    ])
+
+
+@register_pipeline("skipgram2")
+def _skipgram2():
+    return Pipeline([
+        ('skipgram2', SkipGramVectorizer(2, 2))
+    ])
+
+
+# stateless features, nothing to fit, for incremental training
+# see SklearnOVOSClassifier.partial_train
+@register_pipeline("cv2_hashing")
+def _cv2_hashing():
+    return Pipeline([
+        ("cv2", HashingVectorizer(ngram_range=(1, 2), alternate_sign=False, norm=None))
+    ])
+
+
+@register_pipeline("tfidf_hashing")
+def _tfidf_hashing():
+    # idf is corpus statistics, only the l2 normalized term frequencies are kept
+    return Pipeline([
+        ('tfidf', HashingVectorizer(alternate_sign=False, norm="l2"))
+    ])
+
+
+@register_pipeline("skipgram2_hashing")
+def _skipgram2_hashing():
+    return Pipeline([
+        ('skipgram2', SkipGramHashingVectorizer(2, 2))
+    ])
+
+
+@register_pipeline("tfidf_lemma")
+def _tfidf_lemma():
+    return Pipeline([
+        ("tokenize", TokenizerTransformer()),
+        ("lemma", WordNetLemmatizerTransformer()),
+        ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
+    ])
+
+
+@register_pipeline("cv2_lemma")
+def _cv2_lemma():
+    return Pipeline([
+        ("tokenize", TokenizerTransformer()),
+        ("lemma", WordNetLemmatizerTransformer()),
+        ("cv2", CountVectorizer(ngram_range=(1, 2)))
+    ])
+
+
+# pipelines for question classification
+@register_pipeline("questions_en")
+def _questions_en():
+    return FeatureUnion([
+        ("question_feats", QuestionFeaturesVectorizerEN()),
+        ("cv2", CountVectorizer(ngram_range=(1, 2))),
+        ('tfidf_lemma', Pipeline([
             ("lemma", WordNetLemmatizerTransformer()),
             ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
-        ]),
-        "cv2_lemma": Pipeline([
-            ("tokenize", TokenizerTransformer()),
+        ])),
+        ("postag", POSTaggerVectorizer(lang="en"))
+    ])
+
+
+# pipelines for OCP classification
+# the entity automaton is built once per process and shared by all of them
+@register_pipeline("ocp_kw")
+def _ocp_kw():
+    return Pipeline([
+        ("kw", OCPKeywordFeaturesVectorizer())
+    ])
+
+
+@register_pipeline("ocp_kw_cv2")
+def _ocp_kw_cv2():
+    return FeatureUnion([
+        ("kw", OCPKeywordFeaturesVectorizer()),
+        ("cv2", CountVectorizer(ngram_range=(1, 2)))
+    ])
+
+
+@register_pipeline("ocp_kw_tfidf")
+def _ocp_kw_tfidf():
+    return FeatureUnion([
+        ("kw", OCPKeywordFeaturesVectorizer()),
+        ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
+    ])
+
+
+@register_pipeline("ocp_kw_cv2_lemma")
+def _ocp_kw_cv2_lemma():
+    return FeatureUnion([
+        ("kw", OCPKeywordFeaturesVectorizer()),
+        ("cv2_lemma", Pipeline([
             ("lemma", WordNetLemmatizerTransformer()),
             ("cv2", CountVectorizer(ngram_range=(1, 2)))
-        ]),
-        # pipelines for question classification
-        "questions_en": FeatureUnion([
-            ("question_feats", QuestionFeaturesVectorizerEN()),
-            ("cv2", CountVectorizer(ngram_range=(1, 2))),
-            ('tfidf_lemma', Pipeline([
-                ("lemma", WordNetLemmatizerTransformer()),
-                ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
-            ])),
-            ("postag", POSTaggerVectorizer(lang="en"))
-        ]),
+        ]))
+    ])
 
-        # pipelines for OCP classification
-        "ocp_kw": Pipeline([
-            ("kw", OCPKeywordFeaturesVectorizer())
-        ]),
-        "ocp_kw_cv2": FeatureUnion([
-            ("kw", OCPKeywordFeaturesVectorizer()),
-            ("cv2", CountVectorizer(ngram_range=(1, 2)) )
-        ]),
-        "ocp_kw_tfidf": FeatureUnion([
-            ("kw", OCPKeywordFeaturesVectorizer()),
-            ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
-        ]),
-        "ocp_kw_cv2_lemma": FeatureUnion([
-            ("kw", OCPKeywordFeaturesVectorizer()),
-            ("cv2_lemma", Pipeline([
-                ("lemma", WordNetLemmatizerTransformer()),
-                ("cv2", CountVectorizer(ngram_range=(1, 2)))
-            ])
-             )
-        ]),
-        "ocp_kw_tfidf_lemma": FeatureUnion([
-            ("kw", OCPKeywordFeaturesVectorizer()),
-            ("tfidf_lemma", Pipeline([
-                ("lemma", WordNetLemmatizerTransformer()),
-                ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
-            ])
-             )
-        ])
-    }
 
-    return DEFAULT_PIPELINES[pipeline_id]
+@register_pipeline("ocp_kw_tfidf_lemma")
+def _ocp_kw_tfidf_lemma():
+    return FeatureUnion([
+        ("kw", OCPKeywordFeaturesVectorizer()),
+        ("tfidf_lemma", Pipeline([
+            ("lemma", WordNetLemmatizerTransformer()),
+            ('tfidf', TfidfVectorizer(min_df=.05, max_df=.4))
+        ]))
+    ])
@@ -1,7 +1,51 @@
+import numpy as np
+from scipy import sparse
+from sklearn.pipeline import Pipeline
+
+from ovos_classifiers.heuristics.tokenize import word_tokenize
 from ovos_classifiers.skovos.classifier import SklearnOVOSVotingClassifier, SklearnOVOSClassifier
 from ovos_classifiers.tasks.tagger import OVOSAbstractClassifierTagger
 
 
+def tag_sents_batched(tagger, sentences):
+    """ tag many sentences with a single predict call
+
+    features are extracted per sentence, so word windows do not cross
+    sentence boundaries, then stacked into one matrix for the classifier
+    """
+    sentences = [word_tokenize(s) if isinstance(s, str) else list(s)
+                 for s in sentences]
+    clf = tagger.clf
+    if not isinstance(clf, Pipeline) or len(clf.steps) < 2:
+        return [tagger.predict(words) for words in sentences]
+
+    # apply the fitted steps directly, a sliced Pipeline is a new
+    # unfitted estimator for sklearn's checks
+    steps = [step for _, step in clf.steps[:-1]
+             if step is not None and step != "passthrough"]
+
+    def featurize(words):
+        for step in steps:
+            words = step.transform(words)
+        return words
+
+    X = [featurize(words) for words in sentences if words]
+    if not X:
+        return [[] for _ in sentences]
+    if sparse.issparse(X[0]):
+        X = sparse.vstack(X, format="csr")
+    else:
+        X = np.vstack(X)
+    y = clf[-1].predict(X)
+
+    tags = []
+    start = 0
+    for words in sentences:
+        tags.append(y[start:start + len(words)])
+        start += len(words)
+    return tags
+
+
 class SklearnOVOSClassifierTagger(SklearnOVOSClassifier, OVOSAbstractClassifierTagger):
     def __init__(self, pipeline_clf=None, pipeline_id="naive"):
         super().__init__(pipeline_clf=pipeline_clf, pipeline_id=pipeline_id)
@@ -9,10 +53,16 @@ class SklearnOVOSClassifierTagger(SklearnOVOSClassifier, OVOSAbstractClassifierT
     def score(self, X_test, y_test):
         return self.clf.score(X_test, y_test)
 
+    def tag_sents(self, sentences):
+        return tag_sents_batched(self, sentences)
+
 
 class SklearnOVOSVotingClassifierTagger(SklearnOVOSVotingClassifier, OVOSAbstractClassifierTagger):
-    def __init__(self, voter_clfs, pipeline_id="naive", voting='hard', weights=None):
-        super().__init__(voter_clfs, pipeline_id, voting, weights)
+    def __init__(self, voter_clfs, pipeline_id="naive", voting='hard', weights=None, n_jobs=None):
+        super().__init__(voter_clfs, pipeline_id, voting, weights, n_jobs)
 
     def score(self, X_test, y_test):
         return self.clf.score(X_test, y_test)
+
+    def tag_sents(self, sentences):
+        return tag_sents_batched(self, sentences)
@@ -1,8 +1,9 @@
 import os
 import abc
-import joblib
 from ovos_utils.xdg_utils import xdg_data_home
 
+from ovos_classifiers.utils.serialization import save_model, load_model
+
 
 class OVOSAbstractClassifier:
     def __init__(self, pipeline_id="raw", pipeline_clf=None):
@@ -35,15 +36,20 @@ class OVOSAbstractClassifier:
     def predict(self, text):
         raise NotImplemented
 
-    def save(self, path):
-        joblib.dump(self.clf, path)
+    def save(self, path, compress=None):
+        """ compress=None keeps the model memory mappable,
+        see ovos_classifiers.utils.serialization for the file format"""
+        save_model(self.clf, path, compress=compress, pipeline_id=self.pipeline_id)
 
-    def load_from_file(self, path=None):
+    def load_from_file(self, path=None, mmap_mode=None, verify=False):
+        """ mmap_mode="r" shares the model arrays between processes, read only,
+        the model can not be updated in place (partial_train, coef_ *= ...)
+        verify=True checks the sha256 of the model file"""
         if not path:
             if self.pipeline_id == "raw":
                 raise FileNotFoundError("no model path provided")
             os.makedirs(f"{xdg_data_home()}/OpenVoiceOS/classifiers", exist_ok=True)
             path = f"{xdg_data_home()}/OpenVoiceOS/classifiers/{self.pipeline_id}"
-        self.clf = joblib.load(path)
+        self.clf = load_model(path, mmap_mode=mmap_mode, verify=verify)
         return self
 
@@ -27,6 +27,10 @@ class OVOSAbstractClassifierTagger(OVOSAbstractClassifier):
             words = sentence
         return self.predict(words)
 
+    def tag_sents(self, sentences):
+        """ tag a list of sentences, returns one list of tags per sentence """
+        return [self.tag(s) for s in sentences]
+
 
 class OVOSNgramTagger(OVOSAbstractClassifierTagger):
     def __init__(self, regex_patterns=None, default_tag=None, pipeline_id="ngram"):
@@ -67,6 +71,11 @@ class OVOSNgramTagger(OVOSAbstractClassifierTagger):
             text = word_tokenize(text)
         return self.clf.tag(text)
 
+    def tag_sents(self, sentences):
+        sentences = [word_tokenize(s) if isinstance(s, str) else s
+                     for s in sentences]
+        return self.clf.tag_sents(sentences)
+
     def score(self, tagged_data):
         return self.clf.evaluate(tagged_data)
 
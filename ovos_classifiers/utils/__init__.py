@@ -1,10 +1,13 @@
-import nltk
 import re
-from nltk.stem.snowball import SnowballStemmer
+from functools import lru_cache
 
+# nltk takes over a second to import, it is only imported when used
+from ovos_classifiers.utils.nltk_resources import ensure_resource
 
+
+@lru_cache(maxsize=None)
 def get_stopwords(lang):
-    nltk.download("stopwords")
+    """ nltk stopwords for lang, loaded once per lang """
     langmap = {
         "en": "english",
         "ar": "arabic",
@@ -27,8 +30,10 @@ def get_stopwords(lang):
     }
     lang = langmap.get(lang.lower().split("-")[0])
     if not lang:
-        return []
-    stopwords = nltk.corpus.stopwords.words(lang)
+        return frozenset()
+    import nltk
+    ensure_resource("stopwords")
+    stopwords = frozenset(nltk.corpus.stopwords.words(lang))
     return stopwords
 
 
@@ -71,7 +76,9 @@ def load_classifier(data, model_path):
     return data, clf
 
 
+@lru_cache(maxsize=None)
 def get_stemmer(lang="porter"):
+    """ shared, memoized stemmer for lang """
     languages = {
         "ar": "arabic",
         "da": "danish",
@@ -90,40 +97,44 @@ def get_stemmer(lang="porter"):
         "sw": "swedish",
     }
     if lang == "dummy":
-        return DummyStemmer()
+        return CachedStemmer(DummyStemmer())
+    from nltk.stem.snowball import SnowballStemmer
     lang = lang.split("-")[0]
     if lang in languages:
-        return SnowballStemmer(languages[lang])
+        return CachedStemmer(SnowballStemmer(languages[lang]))
     else:
-        return SnowballStemmer('porter')
+        return CachedStemmer(SnowballStemmer('porter'))
+
+
+@lru_cache(maxsize=None)
+def get_lemmatizer():
+    """ shared, memoized wordnet lemmatizer """
+    from nltk.stem import WordNetLemmatizer
+    return CachedStemmer(WordNetLemmatizer())
+
 
+# one alternative per shape, tried in order, first match wins
+_WORD_SHAPE_REGEX = re.compile("|".join([
+    r'(?P<number>[0-9]+(?:\.[0-9]*)?|[0-9]*\.[0-9]+$)',
+    r'(?P<punct>\W+$)',
+    r'(?P<capitalized>[A-Z][a-z]+$)',
+    r'(?P<uppercase>[A-Z]+$)',
+    r'(?P<lowercase>[a-z]+$)',
+    r'(?P<camelcase>[A-Z][a-z]+[A-Z][a-z]+[A-Za-z]*$)',
+    r'(?P<mixedcase>[A-Za-z]+$)',
+    r'(?P<wildcard>__.+__$)',
+    r'(?P<ending_dot>[A-Za-z0-9]+\.$)',
+    r'(?P<abbreviation>[A-Za-z0-9]+\.[A-Za-z0-9\.]+\.$)',
+    r'(?P<contains_hyphen>[A-Za-z0-9]+\-[A-Za-z0-9\-]+.*$)'
+]))
 
+
+@lru_cache(maxsize=65536)
 def get_word_shape(word):
-    word_shape = 'other'
-    if re.match(r'[0-9]+(\.[0-9]*)?|[0-9]*\.[0-9]+$', word):
-        word_shape = 'number'
-    elif re.match(r'\W+$', word):
-        word_shape = 'punct'
-    elif re.match('[A-Z][a-z]+$', word):
-        word_shape = 'capitalized'
-    elif re.match('[A-Z]+$', word):
-        word_shape = 'uppercase'
-    elif re.match('[a-z]+$', word):
-        word_shape = 'lowercase'
-    elif re.match('[A-Z][a-z]+[A-Z][a-z]+[A-Za-z]*$', word):
-        word_shape = 'camelcase'
-    elif re.match('[A-Za-z]+$', word):
-        word_shape = 'mixedcase'
-    elif re.match('__.+__$', word):
-        word_shape = 'wildcard'
-    elif re.match(r'[A-Za-z0-9]+\.$', word):
-        word_shape = 'ending-dot'
-    elif re.match(r'[A-Za-z0-9]+\.[A-Za-z0-9\.]+\.$', word):
-        word_shape = 'abbreviation'
-    elif re.match(r'[A-Za-z0-9]+\-[A-Za-z0-9\-]+.*$', word):
-        word_shape = 'contains-hyphen'
-
-    return word_shape
+    match = _WORD_SHAPE_REGEX.match(word)
+    if match is None:
+        return 'other'
+    return match.lastgroup.replace("_", "-")
 
 
 def extract_iob_features(tokens, index, history, stemmer=None, memory=2):
@@ -237,6 +248,82 @@ def extract_word_features(tokens, index=0, stemmer=None, memory=2):
     return feat_dict
 
 
+def extract_sentence_word_features(tokens, stemmer=None, memory=2):
+    """
+    same as calling extract_word_features for every index of `tokens`,
+    but each token is only stemmed and shaped once
+    `tokens`  = a tokenized sentence [w1, w2, ...]
+    """
+    stemmer = stemmer or get_stemmer()
+    if isinstance(tokens, str):
+        tokens = [tokens]
+
+    # Pad the sequence with placeholders
+    tokens = [f'__START{i}__' for i in range(memory, 0, -1)] + \
+             list(tokens) + \
+             [f'__END{i}__' for i in range(1, memory + 1)]
+
+    stems = {}
+    lemmas = []
+    shapes = []
+    for word in tokens:
+        if word not in stems:
+            stems[word] = (stemmer.stem(word), get_word_shape(word))
+        lemma, shape = stems[word]
+        lemmas.append(lemma)
+        shapes.append(shape)
+
+    feats = []
+    for index in range(memory, len(tokens) - memory):
+        word = tokens[index]
+        feat_dict = extract_single_word_features(word)
+        feat_dict["word"] = word
+        feat_dict["shape"] = shapes[index]
+        feat_dict["lemma"] = lemmas[index]
+
+        # look ahead N words
+        for i in range(1, memory + 1):
+            k = "next-" * i
+            feat_dict[k + "word"] = tokens[index + i]
+            feat_dict[k + "lemma"] = lemmas[index + i]
+            feat_dict[k + "shape"] = shapes[index + i]
+
+        # look back N words
+        for i in range(1, memory + 1):
+            k = "prev-" * i
+            feat_dict[k + "word"] = tokens[index - i]
+            feat_dict[k + "lemma"] = lemmas[index - i]
+            feat_dict[k + "shape"] = shapes[index - i]
+
+        feats.append(feat_dict)
+    return feats
+
+
+def extract_sentence_postag_features(tokens, stemmer=None, memory=2):
+    """
+    same as calling extract_postag_features for every index of `tokens`
+    `tokens`  = a POS-tagged sentence [(w1, t1), ...]
+    """
+    original_toks = list(tokens)
+    feats = extract_sentence_word_features([t[0] for t in original_toks],
+                                           stemmer, memory=memory)
+
+    # Pad the sequence with placeholders
+    tags = [f'__START{i}__' for i in range(memory, 0, -1)] + \
+           [t[1] for t in original_toks] + \
+           [f'__END{i}__' for i in range(1, memory + 1)]
+
+    for index, feat_dict in enumerate(feats, start=memory):
+        feat_dict["pos"] = tags[index]
+        # look ahead N words
+        for i in range(1, memory + 1):
+            feat_dict["next-" * i + "pos"] = tags[index + i]
+        # look back N words
+        for i in range(1, memory + 1):
+            feat_dict["prev-" * i + "pos"] = tags[index - i]
+    return feats
+
+
 def extract_single_word_features(word, lowercase=True):
     if lowercase:
         word = word.lower()
@@ -252,6 +339,7 @@ def extract_single_word_features(word, lowercase=True):
 
 
 def extract_rte_features(rtepair):
+    import nltk
     extractor = nltk.RTEFeatureExtractor(rtepair)
     features = {}
     features['word_overlap'] = len(extractor.overlap('word'))
@@ -304,3 +392,70 @@ class DummyStemmer:
 
     def lemmatize(self, word):
         return self.stem(word)
+
+
+class CachedStemmer:
+    """ wraps a stemmer/lemmatizer and memoizes stem/lemmatize
+
+    only the methods the wrapped object has are exposed,
+    eg. a SnowballStemmer wrapper has no .lemmatize
+    the caches are not pickled, they are rebuilt empty when loaded
+    """
+
+    def __init__(self, stemmer, maxsize=65536):
+        self.stemmer = stemmer
+        self.maxsize = maxsize
+        self._build_caches()
+
+    def _build_caches(self):
+        self._stem = self._lemmatize = None
+        if hasattr(self.stemmer, "stem"):
+            self._stem = lru_cache(maxsize=self.maxsize)(self.stemmer.stem)
+        if hasattr(self.stemmer, "lemmatize"):
+            self._lemmatize = lru_cache(maxsize=self.maxsize)(self.stemmer.lemmatize)
+
+    @property
+    def stem(self):
+        if self._stem is None:
+            raise AttributeError(f"{type(self.stemmer).__name__} has no attribute 'stem'")
+        return self._stem
+
+    @property
+    def lemmatize(self):
+        if self._lemmatize is None:
+            raise AttributeError(f"{type(self.stemmer).__name__} has no attribute 'lemmatize'")
+        return self._lemmatize
+
+    @property
+    def stats(self):
+        hits = misses = size = 0
+        for cache in (self._stem, self._lemmatize):
+            if cache is not None:
+                info = cache.cache_info()
+                hits += info.hits
+                misses += info.misses
+                size += info.currsize
+        total = hits + misses
+        return {"hits": hits,
+                "misses": misses,
+                "size": size,
+                "hit_rate": hits / total if total else 0.0}
+
+    def cache_clear(self):
+        for cache in (self._stem, self._lemmatize):
+            if cache is not None:
+                cache.cache_clear()
+
+    def __getattr__(self, item):
+        # only called for attributes not found on the wrapper
+        if item.startswith("_") or item == "stemmer":
+            raise AttributeError(item)
+        return getattr(self.stemmer, item)
+
+    def __getstate__(self):
+        return {"stemmer": self.stemmer, "maxsize": self.maxsize}
+
+    def __setstate__(self, state):
+        self.stemmer = state["stemmer"]
+        self.maxsize = state["maxsize"]
+        self._build_caches()
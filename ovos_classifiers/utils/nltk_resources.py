@@ -0,0 +1,84 @@
+# central place to check for nltk data
+# nltk.download does index/filesystem lookups (and may try the network) on every call,
+# here each resource is verified once per process and only downloaded if missing
+import threading
+
+# where nltk.download places each package
+_RESOURCE_PATHS = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger",
+    "universal_tagset": "taggers/universal_tagset",
+    "stopwords": "corpora/stopwords",
+    "udhr": "corpora/udhr",
+    "treebank": "corpora/treebank",
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+    "reuters": "corpora/reuters",
+    "rslp": "stemmers/rslp"
+}
+_CATEGORIES = ("corpora", "tokenizers", "taggers", "stemmers", "models",
+               "chunkers", "grammars", "misc", "sentiment")
+
+_found = set()
+_lock = threading.Lock()
+_offline = None
+
+
+def set_offline(offline=True):
+    """ never download missing resources, overrides the config """
+    global _offline
+    _offline = offline
+
+
+def is_offline():
+    if _offline is None:
+        from ovos_config import Configuration
+        cfg = Configuration().get("classifiers", {}).get("nltk", {})
+        return bool(cfg.get("offline", False))
+    return _offline
+
+
+def _find(resource):
+    import nltk
+    if resource in _RESOURCE_PATHS:
+        paths = [_RESOURCE_PATHS[resource]]
+    else:
+        paths = [f"{c}/{resource}" for c in _CATEGORIES]
+    for path in paths:
+        try:
+            nltk.data.find(path)
+            return True
+        except LookupError:
+            continue
+    return False
+
+
+def ensure_resource(resource):
+    """ return True if the nltk resource is available, downloading it if needed
+
+    found resources are remembered for the lifetime of the process,
+    missing ones are checked again on the next call (eg. network came back)
+    """
+    if resource in _found:
+        return True
+    with _lock:
+        if resource not in _found:
+            found = _find(resource)
+            if not found and not is_offline():
+                import nltk
+                nltk.download(resource)
+                found = _find(resource)
+            if found:
+                _found.add(resource)
+    return resource in _found
+
+
+def ensure_resources(*resources):
+    return all([ensure_resource(r) for r in resources])
+
+
+def reset():
+    """ forget verified resources, they will be checked again on next use """
+    with _lock:
+        _found.clear()
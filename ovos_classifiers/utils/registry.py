@@ -0,0 +1,128 @@
+# process wide cache for loaded models
+# loading a tagger can mean reading ovos-config, downloading metadata and
+# unpickling several MB, entrypoints should only pay that price once per model
+import threading
+from collections import OrderedDict
+from os.path import getsize, isfile
+
+
+def model_file_size(model_path):
+    """size in bytes of a model file, heuristic models (classes) count as 0"""
+    if isinstance(model_path, str) and isfile(model_path):
+        return getsize(model_path)
+    return 0
+
+
+class ModelRegistry:
+    """thread safe LRU cache of loaded models
+
+    entries are keyed by a tuple, eg. ("postag", model_id, lang)
+    a memory budget can be set in bytes, the size of an entry is
+    the size reported by the loader (usually the model file size)
+    """
+
+    def __init__(self, max_models=8, max_bytes=512 * 1024 * 1024):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._models = OrderedDict()  # key: (model, nbytes)
+        self._lock = threading.RLock()
+        self._loading = {}  # key: Lock, avoids loading the same model twice
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._models
+
+    def __len__(self):
+        with self._lock:
+            return len(self._models)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(n for _, n in self._models.values())
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "models": len(self._models),
+                    "bytes": sum(n for _, n in self._models.values())}
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            return default
+
+    def put(self, key, model, nbytes=0):
+        with self._lock:
+            self._models[key] = (model, nbytes)
+            self._models.move_to_end(key)
+            self._evict()
+
+    def get_or_load(self, key, loader):
+        """return a cached model or call loader() and cache the result
+
+        loader must return a tuple (model, nbytes)
+        """
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            lock = self._loading.setdefault(key, threading.Lock())
+
+        with lock:
+            # another thread may have loaded it while we waited
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return self._models[key][0]
+                self.misses += 1
+            try:
+                model, nbytes = loader()
+                self.put(key, model, nbytes)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return model
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._models.pop(key, None)
+        return entry[0] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def resize(self, max_models=None, max_bytes=None):
+        with self._lock:
+            if max_models is not None:
+                self.max_models = max_models
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        # the most recently used model is never evicted,
+        # even if it alone is over the memory budget
+        while len(self._models) > 1:
+            over_count = self.max_models and len(self._models) > self.max_models
+            over_size = self.max_bytes and self.nbytes > self.max_bytes
+            if not over_count and not over_size:
+                break
+            self._models.popitem(last=False)
+            self.evictions += 1
+
+
+# shared by OVOSPostag, OVOSCorefIOBTagger and OVOSUtteranceTagger
+MODEL_REGISTRY = ModelRegistry()
@@ -0,0 +1,163 @@
+# model container, a joblib payload followed by a json trailer
+#
+#   [joblib payload][json header][8 bytes header length][MAGIC]
+#
+# joblib stops reading at the end of the pickle, so the payload is still a
+# regular joblib file: uncompressed payloads can optionally be memory mapped
+# (mmap_mode="r") and every process loading the model shares the same pages
+# the header is read from the end of the file without unpickling anything
+import hashlib
+import io
+import json
+import os
+import struct
+
+import joblib
+from ovos_utils.log import LOG
+
+MAGIC = b"OVOSCLF1"
+FORMAT_VERSION = 1
+_TRAILER = struct.Struct("<Q8s")  # header length, magic
+
+# zlib, gzip, bz2, lzma, xz are builtin, lz4 needs `pip install lz4`
+# and zstd `pip install zstandard`
+COMPRESSION_METHODS = ("zlib", "gzip", "bz2", "lzma", "xz", "lz4", "zstd")
+
+
+def _register_zstd():
+    from joblib.compressor import CompressorWrapper, register_compressor, _COMPRESSORS
+    if "zstd" in _COMPRESSORS:
+        return
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd compression needs the zstandard package, "
+                          "pip install zstandard") from e
+
+    class ZstdCompressorWrapper(CompressorWrapper):
+        def compressor_file(self, fileobj, compresslevel=None):
+            cctx = zstandard.ZstdCompressor(level=compresslevel or 3)
+            return zstandard.open(fileobj, "wb", cctx=cctx)
+
+        def decompressor_file(self, fileobj):
+            return zstandard.open(fileobj, "rb")
+
+    # prefix is the zstd frame magic number
+    register_compressor("zstd", ZstdCompressorWrapper(zstandard.open, prefix=b"\x28\xb5\x2f\xfd",
+                                                      extension=".zst"))
+
+
+def model_metadata(clf):
+    """ label set and input feature count of a fitted estimator/pipeline """
+    labels = getattr(clf, "classes_", None)
+    if labels is not None:
+        labels = [str(l) for l in labels]
+    final = clf.steps[-1][1] if hasattr(clf, "steps") else clf
+    n_features = getattr(final, "n_features_in_", None)
+    return {"labels": labels,
+            "n_features": int(n_features) if n_features is not None else None}
+
+
+def _sha256(path, size):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while size > 0:
+            chunk = f.read(min(size, 1024 * 1024))
+            if not chunk:
+                break
+            sha.update(chunk)
+            size -= len(chunk)
+    return sha.hexdigest()
+
+
+def save_model(clf, path, compress=None, compresslevel=3, **metadata):
+    """ save clf in the model container format, returns the header
+
+    compress: None to keep arrays uncompressed and memory mappable,
+              or one of COMPRESSION_METHODS for distribution
+    metadata: extra json serializable header fields, eg. pipeline_id
+    """
+    if compress and compress not in COMPRESSION_METHODS:
+        raise ValueError(f"unknown compression: {compress}, expected one of {COMPRESSION_METHODS}")
+    if compress == "zstd":
+        _register_zstd()
+
+    import sklearn
+    header = {"format_version": FORMAT_VERSION,
+              "sklearn_version": sklearn.__version__,
+              "joblib_version": joblib.__version__,
+              "compress": compress or None}
+    header.update(model_metadata(clf))
+    header.update(metadata)
+
+    # write + rename, the old model may be in use (mmaped) by other processes
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(clf, tmp, compress=(compress, compresslevel) if compress else 0)
+        size = os.path.getsize(tmp)
+        header["payload_size"] = size
+        header["sha256"] = _sha256(tmp, size)
+        data = json.dumps(header).encode("utf-8")
+        with open(tmp, "ab") as f:
+            f.write(data)
+            f.write(_TRAILER.pack(len(data), MAGIC))
+        os.replace(tmp, path)
+    finally:
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+    return header
+
+
+def _read_header(path):
+    """ (header, payload size on disk), header is None for plain joblib files """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if end < _TRAILER.size:
+            return None, end
+        f.seek(end - _TRAILER.size)
+        size, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+        if magic != MAGIC or size > end - _TRAILER.size:
+            return None, end
+        payload_size = end - _TRAILER.size - size
+        f.seek(payload_size)
+        return json.loads(f.read(size).decode("utf-8")), payload_size
+
+
+def read_model_header(path):
+    """ metadata of a model file without unpickling it
+
+    returns None for plain joblib/pickle files (saved by older versions)"""
+    return _read_header(path)[0]
+
+
+def load_model(path, mmap_mode=None, verify=False):
+    """ load a model saved with save_model, or a plain joblib/pickle file
+
+    mmap_mode="r" memory maps the arrays of uncompressed models, they are
+    shared between processes but read only (no in place updates, partial_train)
+    the payload size is always checked against the header, verify=True also
+    checks the sha256 of the payload (reads the whole file),
+    raises ValueError on mismatch
+    """
+    header, payload_size = _read_header(path)
+    if header is None:
+        return joblib.load(path, mmap_mode=mmap_mode)
+
+    if payload_size != header["payload_size"]:
+        raise ValueError(f"corrupted model file, expected {header['payload_size']} "
+                         f"payload bytes, found {payload_size}: {path}")
+    if verify and _sha256(path, payload_size) != header["sha256"]:
+        raise ValueError(f"corrupted model file, sha256 mismatch: {path}")
+    if header.get("compress") == "zstd":
+        _register_zstd()
+    import sklearn
+    if header.get("sklearn_version") != sklearn.__version__:
+        LOG.warning(f"{path} was saved with scikit-learn {header.get('sklearn_version')}, "
+                    f"running {sklearn.__version__}")
+    if header.get("compress"):
+        # compressed payloads are loaded in memory anyway, decompressors
+        # would also try to read the trailer as another compressed stream
+        with open(path, "rb") as f:
+            return joblib.load(io.BytesIO(f.read(payload_size)))
+    return joblib.load(path, mmap_mode=mmap_mode)
@@ -8,6 +8,7 @@ from ovos_utils.xdg_utils import xdg_data_home
 
 from ovos_classifiers.heuristics.utttags import HeuristicUtteranceTagger
 from ovos_classifiers.utils import load_classifier
+from ovos_classifiers.utils.registry import MODEL_REGISTRY, model_file_size
 
 # TODO - benchmark and choose based on performance/model size
 # TODO - ensure all langs have 1 model
@@ -30,7 +31,6 @@ class OVOSUtteranceTagger:
     _XDG_PATH = f"{xdg_data_home()}/OpenVoiceOS/classifiers"
     _BASE_METADATA_URL = "https://github.com/OpenVoiceOS/ovos-classifiers/raw/dev/models/metadata"
     _BASE_MODEL_URL = "https://github.com/OpenVoiceOS/ovos-classifiers/raw/dev/models/utttags"
-    makedirs(_XDG_PATH, exist_ok=True)
 
     def __init__(self, model_id=None):
         config_core = Configuration()
@@ -61,6 +61,7 @@ class OVOSUtteranceTagger:
             with open(meta_path) as f:
                 meta = json.load(f)
         else:
+            makedirs(self._XDG_PATH, exist_ok=True)
             url = f"{self._BASE_METADATA_URL}/{model_id}.json"
             meta = requests.get(url).json()
             with open(meta_path, "wb") as f:
@@ -68,6 +69,7 @@ class OVOSUtteranceTagger:
 
         model_path = f"{self._XDG_PATH}/{model_id}.pkl"
         if not isfile(model_path):
+            makedirs(self._XDG_PATH, exist_ok=True)
             url = f"{self._BASE_MODEL_URL}/{model_id}.pkl"
             model = requests.get(url).content
             with open(model_path, "wb") as f:
@@ -76,8 +78,13 @@ class OVOSUtteranceTagger:
         return meta, model_path
 
     def load_model(self, model_id):
+        # models are shared process wide, see utils.registry
+        return MODEL_REGISTRY.get_or_load(("utttags", model_id, self.lang),
+                                          lambda: self._load_model(model_id))
+
+    def _load_model(self, model_id):
         data, model_path = self.get_model(model_id)
-        return load_classifier(data, model_path)
+        return load_classifier(data, model_path), model_file_size(model_path)
 
     def predict(self, utterances):
         if isinstance(utterances, str):
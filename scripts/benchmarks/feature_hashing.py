@@ -0,0 +1,144 @@
+""" DictVectorizer vs FeatureHasher backends for the word window tagger features
+
+trains the same postag model with every WordFeaturesVectorizer backend
+and compares model size, peak RAM while training and accuracy
+
+hashing removes the vocabulary from the model, but the classifier
+coefficients are (n_classes, n_features), sparsify() them to only store
+the hash buckets that were actually seen
+
+"ocp_sentences" needs no downloads, the bundled OCP utterances are tagged
+with the bundled brown+treebank brill tagger (silver labels, the accuracy
+is agreement with that tagger), treebank and brown are only benchmarked
+if the nltk corpora can be downloaded
+"""
+import copy
+import csv
+import pickle
+import random
+import time
+import tracemalloc
+from os import makedirs
+from os.path import join, dirname
+
+import nltk
+from nltk.corpus import treebank, brown
+from sklearn.linear_model import Perceptron
+from sklearn.pipeline import Pipeline
+
+from ovos_classifiers.skovos.features import WordFeaturesVectorizer
+from ovos_classifiers.skovos.tagger import SklearnOVOSClassifierTagger
+
+ROOT = dirname(dirname(dirname(__file__)))
+BENCHMARKS = join(ROOT, "models", "benchmarks", "postag")
+OCP_SENTENCES = join(ROOT, "scripts", "training", "ocp", "datasets", "ocp_sentences_v0.csv")
+SILVER_TAGGER = join(ROOT, "models", "postag", "nltk-brown+treebank-udep-brill-postag.pkl")
+makedirs(BENCHMARKS, exist_ok=True)
+
+# HACK - avoid run out of memory with the dense baseline
+N_TRAIN = 50000
+N_TEST = 10000
+
+BACKENDS = {
+    "DictVectorizer": {},
+    "FeatureHasher 2^16": {"n_features": 2 ** 16},
+    "FeatureHasher 2^18": {"n_features": 2 ** 18},
+    "FeatureHasher 2^20": {"n_features": 2 ** 20},
+    "FeatureHasher 2^20 unsigned": {"n_features": 2 ** 20, "alternate_sign": False}
+}
+
+
+def ocp_tagged_sents():
+    with open(SILVER_TAGGER, "rb") as f:
+        tagger = pickle.load(f)
+    with open(OCP_SENTENCES) as f:
+        reader = csv.reader(f)
+        next(reader)
+        sents = [",".join(row[1:]).strip().lower().split() for row in reader]
+    return [tagger.tag(s) for s in sents if s]
+
+
+corpora = [("ocp_sentences", ocp_tagged_sents,
+            "bundled OCP utterances, silver udep tags from nltk-brown+treebank-udep-brill-postag, "
+            "accuracy is agreement with that tagger")]
+missing_corpora = []
+if all(nltk.download(c) for c in ('treebank', 'brown', 'universal_tagset')):
+    corpora += [("treebank", lambda: treebank.tagged_sents(tagset="universal"),
+                 "nltk treebank, universal tagset"),
+                ("brown", lambda: brown.tagged_sents(tagset="universal"),
+                 "nltk brown, universal tagset")]
+else:
+    missing_corpora = ["treebank", "brown"]
+
+
+def transform_to_dataset(tagged_sentences):
+    X, y = [], []
+
+    for tagged in tagged_sentences:
+        for index in range(len(tagged)):
+            X.append(tagged[index][0])
+            y.append(tagged[index][1])
+
+    return X, y
+
+
+def benchmark(corpus):
+    random.seed(42)
+    corpus = list(corpus)
+    random.shuffle(corpus)
+    X, y = transform_to_dataset(corpus)
+    X_train, y_train = X[:N_TRAIN], y[:N_TRAIN]
+    X_test, y_test = X[N_TRAIN:N_TRAIN + N_TEST], y[N_TRAIN:N_TRAIN + N_TEST]
+
+    results = []
+    for name, kwargs in BACKENDS.items():
+        pipeline = Pipeline([
+            ("feats", WordFeaturesVectorizer(lang="en", **kwargs)),
+            ("clf", Perceptron(random_state=42))
+        ])
+        clf = SklearnOVOSClassifierTagger(pipeline, pipeline_id="raw")
+
+        tracemalloc.start()
+        start = time.time()
+        clf.train(X_train, y_train)
+        train_time = time.time() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        acc = clf.score(X_test, y_test)
+        size = len(pickle.dumps(clf.clf))
+        sparsified = copy.deepcopy(clf.clf)
+        sparsified.steps[-1][1].sparsify()
+        sparse_size = len(pickle.dumps(sparsified))
+        results.append((name, round(size / 1000000, 3), round(sparse_size / 1000000, 3),
+                        round(peak / 1000000, 1), round(train_time, 1), round(acc, 4)))
+        print(results[-1])
+    return results
+
+
+readme = f"""
+
+## Benchmark - FeatureHasher word features
+
+Perceptron postag models, {N_TRAIN} training tokens, {N_TEST} test tokens
+"""
+if missing_corpora:
+    readme += f"""
+{" and ".join(missing_corpora)} were not benchmarked, the nltk corpora could not be downloaded
+"""
+for corpus_name, corpus, description in corpora:
+    readme += f"""
+### {corpus_name}
+
+{description}
+
+| Features | Model size (MB) | Sparsified size (MB) | Peak training RAM (MB) | Training time (s) | Accuracy |
+|----------|-----------------|----------------------|------------------------|-------------------|----------|"""
+    for name, size, sparse_size, ram, train_time, acc in benchmark(corpus()):
+        readme += f"\n| {name} | {size} | {sparse_size} | {ram} | {train_time} | {acc} |"
+    readme += "\n"
+
+print(readme)
+
+with open(f"{BENCHMARKS}/feature_hashing.md", "w") as f:
+    f.write(readme)
@@ -0,0 +1,104 @@
+import os
+import random
+import tempfile
+import unittest
+
+from ovos_classifiers.heuristics.machine_comprehension import BM25, BM25Corpus, get_best_answer
+
+
+random.seed(42)
+VOCAB = ["w%d" % i for i in range(50)]
+CORPUS = [[random.choice(VOCAB) for _ in range(random.randint(1, 30))]
+          for _ in range(200)]
+QUERIES = [[random.choice(VOCAB) for _ in range(random.randint(1, 5))]
+           for _ in range(20)]
+QUERIES.append(["w1", "w1", "w1"])  # repeated terms
+QUERIES.append(["unknown"])
+
+
+class TestBM25(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = CORPUS
+        cls.queries = QUERIES
+        cls.bm25 = BM25().fit(cls.corpus)
+
+    def test_search(self):
+        for q in self.queries:
+            scores = self.bm25.search(q)
+            expected = [self.bm25._score(q, i) for i in range(len(self.corpus))]
+            self.assertEqual(len(scores), len(expected))
+            for a, b in zip(scores, expected):
+                self.assertAlmostEqual(a, b)
+
+    def test_search_batch(self):
+        batch = self.bm25.search_batch(self.queries)
+        self.assertEqual(len(batch), len(self.queries))
+        for q, scores in zip(self.queries, batch):
+            for a, b in zip(scores, self.bm25.search(q)):
+                self.assertAlmostEqual(a, b)
+
+    def test_empty_documents(self):
+        bm25 = BM25().fit([[], []])
+        self.assertEqual(list(bm25.search(["w1"])), [0, 0])
+        self.assertEqual(bm25.get_top_n(["w1"]), [])
+
+    def test_top_n(self):
+        for q in self.queries:
+            scores = self.bm25.search(q)
+            top = self.bm25.get_top_n(q, 5)
+            expected = sorted([i for i, s in enumerate(scores) if s > 0],
+                              key=lambda i: (-scores[i], i))[:5]
+            self.assertEqual([i for i, _ in top], expected)
+        self.assertEqual(self.bm25.get_top_n(["unknown"]), [])
+
+    def test_best_answer(self):
+        q = "who invented the telephone"
+        ans = [
+            "A telephone is a telecommunications device that permits two or more users to conduct a conversation when they are too far apart to be easily heard directly.",
+            "The telephone was invented by Alexander Graham Bell and Antonio Meucci"
+        ]
+        self.assertEqual(get_best_answer(q, ans, ["the", "who", "is", "a"]), ans[1])
+
+
+class TestBM25Corpus(unittest.TestCase):
+
+    def assertSameIndex(self, a, b, queries):
+        self.assertEqual(a.df_, b.df_)
+        self.assertEqual(a.corpus_size_, b.corpus_size_)
+        self.assertAlmostEqual(a.avg_doc_len_, b.avg_doc_len_)
+        for q in queries:
+            for x, y in zip(a.search(q), b.search(q)):
+                self.assertAlmostEqual(x, y)
+
+    def test_add_remove(self):
+        corpus = CORPUS
+        queries = QUERIES
+        idx = BM25Corpus(corpus[:50])
+        idx.search(queries[0])  # build the index before updating it
+        idx.add_documents(corpus[50:])
+        self.assertSameIndex(idx, BM25().fit(corpus), queries)
+
+        removed = [0, 10, 199, 50]
+        idx.remove_documents(removed)
+        # the last documents were swapped into the freed slots
+        self.assertEqual(sorted(map(tuple, idx.corpus_)),
+                         sorted(tuple(d) for i, d in enumerate(corpus) if i not in removed))
+        self.assertSameIndex(idx, BM25().fit(idx.corpus_), queries)
+
+    def test_empty(self):
+        idx = BM25Corpus()
+        self.assertEqual(idx.search(["w1"]), [])
+        idx.add_documents([["w1", "w2"]])
+        self.assertGreater(idx.search(["w1"])[0], 0)
+        idx.remove_documents([0])
+        self.assertEqual(idx.search(["w1"]), [])
+        self.assertEqual(idx.df_, {})
+
+    def test_save_load(self):
+        idx = BM25Corpus(CORPUS)
+        path = os.path.join(tempfile.mkdtemp(), "bm25.pkl")
+        idx.save(path)
+        idx2 = BM25Corpus.load(path)
+        self.assertSameIndex(idx, idx2, QUERIES)
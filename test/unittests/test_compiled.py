@@ -0,0 +1,125 @@
+import pickle
+import unittest
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.linear_model import Perceptron, LogisticRegression
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import Pipeline, FeatureUnion
+
+from ovos_classifiers.skovos.classifier import SklearnOVOSClassifier
+from ovos_classifiers.skovos.compiled import SklearnModel, proba_to_labels
+
+X = ["play metallica", "play some jazz music", "play the matrix movie",
+     "watch a horror movie", "put on rock music", "play rob zombie",
+     "i want to watch a film", "play a podcast about science",
+     "listen to the news podcast", "play the radio", "tune in to jazz radio",
+     "what is the weather", "tell me a joke", "set an alarm",
+     "what time is it", "turn off the lights"] * 3
+Y3 = (["music"] * 2 + ["movie"] * 2 + ["music"] * 2 + ["movie"] +
+      ["podcast"] * 2 + ["radio"] * 2 + ["other"] * 5) * 3
+Y2 = ["media" if y != "other" else "other" for y in Y3]
+TEST = ["play some metallica", "watch the matrix", "what is a podcast",
+        "unknown words only", "", "turn on the radio"]
+
+
+def _pipeline(clf, tfidf=False):
+    features = FeatureUnion([
+        ("cv", CountVectorizer(ngram_range=(1, 2))),
+        ("tfidf", TfidfVectorizer(sublinear_tf=True) if tfidf
+         else CountVectorizer(binary=True, analyzer="char_wb", ngram_range=(2, 3)))
+    ])
+    return Pipeline([("features", features), ("clf", clf)])
+
+
+class TestCompiledClassifier(unittest.TestCase):
+
+    def assertSameModel(self, pipeline, y):
+        clf = SklearnOVOSClassifier("raw", pipeline)
+        clf.train(X, y)
+        compiled = clf.compile()
+        np.testing.assert_array_equal(compiled.predict_proba(TEST),
+                                      clf.clf.predict_proba(TEST))
+        np.testing.assert_array_equal(compiled.predict(TEST),
+                                      clf.clf.predict(TEST))
+        self.assertEqual(compiled.predict_labels(TEST), clf.predict_labels(TEST))
+
+        compiled = pickle.loads(pickle.dumps(compiled))
+        np.testing.assert_array_equal(compiled.predict_proba(TEST),
+                                      clf.clf.predict_proba(TEST))
+
+    def test_sigmoid(self):
+        for y in (Y2, Y3):
+            self.assertSameModel(_pipeline(CalibratedClassifierCV(Perceptron(), cv=3)), y)
+
+    def test_isotonic(self):
+        for y in (Y2, Y3):
+            self.assertSameModel(_pipeline(CalibratedClassifierCV(
+                Perceptron(), cv=3, method="isotonic"), tfidf=True), y)
+
+    def test_logistic(self):
+        self.assertSameModel(_pipeline(CalibratedClassifierCV(
+            LogisticRegression(), cv=3), tfidf=True), Y3)
+
+    def test_uncalibrated(self):
+        clf = SklearnOVOSClassifier("raw", _pipeline(Perceptron()))
+        clf.train(X, Y3)
+        compiled = clf.compile()
+        np.testing.assert_array_equal(compiled.predict(TEST), clf.predict(TEST))
+        np.testing.assert_array_equal(compiled.decision_function(TEST),
+                                      clf.clf.decision_function(TEST))
+
+    def test_not_linear(self):
+        clf = SklearnOVOSClassifier("raw", _pipeline(CalibratedClassifierCV(
+            MLPClassifier(max_iter=5), cv=3)))
+        clf.train(X, Y2)
+        with self.assertRaises(ValueError):
+            clf.compile()
+
+    def test_missing_internals(self):
+        # a sklearn version without the private attributes used by the compiler
+        class Fold:
+            def __init__(self, fold):
+                self.predict_proba = fold.predict_proba
+
+        clf = SklearnOVOSClassifier("raw", _pipeline(CalibratedClassifierCV(Perceptron(), cv=3)))
+        clf.train(X, Y3)
+        calibrated = clf.clf.steps[-1][1]
+        calibrated.calibrated_classifiers_ = [Fold(f) for f in calibrated.calibrated_classifiers_]
+        compiled = clf.compile()
+        self.assertIsInstance(compiled.model, SklearnModel)
+        np.testing.assert_array_equal(compiled.predict_proba(TEST),
+                                      clf.clf.predict_proba(TEST))
+        self.assertEqual(compiled.predict_labels(TEST), clf.predict_labels(TEST))
+
+
+class TestProbaToLabels(unittest.TestCase):
+    classes = np.array(["audio", "external", "video"])
+    proba = np.array([[0.5, 0.1, 0.4],
+                      [0.2, 0.2, 0.6]])
+
+    def test_dicts(self):
+        self.assertEqual(proba_to_labels(self.classes, self.proba),
+                         [{"audio": 0.5, "external": 0.1, "video": 0.4},
+                          {"audio": 0.2, "external": 0.2, "video": 0.6}])
+        preds = proba_to_labels(self.classes, self.proba, top_k=2)
+        self.assertEqual(preds, [{"audio": 0.5, "video": 0.4},
+                                 {"video": 0.6, "audio": 0.2}])
+        self.assertEqual(list(preds[1]), ["video", "audio"])  # most likely first
+        self.assertEqual(proba_to_labels(self.classes, self.proba, threshold=0.4),
+                         [{"audio": 0.5, "video": 0.4}, {"video": 0.6}])
+        self.assertEqual(proba_to_labels(self.classes, self.proba, top_k=1, threshold=0.55),
+                         [{}, {"video": 0.6}])
+
+    def test_columnar(self):
+        classes, proba = proba_to_labels(self.classes, self.proba, columnar=True)
+        np.testing.assert_array_equal(classes, self.classes)
+        np.testing.assert_array_equal(proba, self.proba)
+
+        _, proba = proba_to_labels(self.classes, self.proba, columnar=True, threshold=0.4)
+        np.testing.assert_array_equal(proba, [[0.5, 0, 0.4], [0, 0, 0.6]])
+
+        labels, proba = proba_to_labels(self.classes, self.proba, columnar=True, top_k=2)
+        np.testing.assert_array_equal(labels, [["audio", "video"], ["video", "audio"]])
+        np.testing.assert_array_equal(proba, [[0.5, 0.4], [0.6, 0.2]])
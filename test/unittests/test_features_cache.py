@@ -0,0 +1,127 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+from sklearn.pipeline import Pipeline, FeatureUnion
+
+from ovos_classifiers.datasets.streaming import CSVDataset
+from ovos_classifiers.skovos.features import SingleWordFeaturesVectorizer
+from ovos_classifiers.skovos.features.cache import FeaturesCache
+from ovos_classifiers.skovos.nn import PerceptronTrainer, TrainingRun
+
+X = ["play metallica", "play some jazz music", "play the matrix movie",
+     "watch a horror movie", "put on rock music", "tell me a joke"] * 3
+Y = ["music", "music", "movie", "movie", "music", "other"] * 3
+TEST = ["play some metallica", "watch the matrix"]
+
+
+def _union():
+    return FeatureUnion([("cv2", CountVectorizer(ngram_range=(1, 2))),
+                         ("words", SingleWordFeaturesVectorizer())])
+
+
+class TestFeaturesCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = FeaturesCache(tempfile.mkdtemp())
+
+    def test_same_features(self):
+        expected = _union().fit(X, Y)
+        fitted, feats, feats_test = self.cache.fit_transform(_union(), X, Y, TEST)
+        np.testing.assert_array_equal(feats.toarray(), expected.transform(X).toarray())
+        np.testing.assert_array_equal(feats_test.toarray(), expected.transform(TEST).toarray())
+        np.testing.assert_array_equal(fitted.transform(TEST).toarray(), feats_test.toarray())
+        self.assertEqual(self.cache.misses, 2)
+
+        # cached
+        fitted, feats2, feats_test2 = self.cache.fit_transform(_union(), X, Y, TEST)
+        self.assertEqual(self.cache.hits, 2)
+        np.testing.assert_array_equal(feats2.toarray(), feats.toarray())
+        np.testing.assert_array_equal(feats_test2.toarray(), feats_test.toarray())
+        np.testing.assert_array_equal(fitted.transform(TEST).toarray(), feats_test.toarray())
+
+    def test_shared_components(self):
+        self.cache.fit_transform(_union(), X, Y)
+        # same CountVectorizer in a different pipeline
+        pipe, feats, _ = self.cache.fit_transform(
+            Pipeline([("cv2", CountVectorizer(ngram_range=(1, 2)))]), X, Y)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertIsInstance(pipe.steps[0][1], CountVectorizer)
+        # different params or data are not shared
+        self.cache.fit_transform(Pipeline([("cv1", CountVectorizer())]), X, Y)
+        self.cache.fit_transform(Pipeline([("cv2", CountVectorizer(ngram_range=(1, 2)))]), X[:6], Y[:6])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_chained_steps(self):
+        def pipe():
+            return Pipeline([("cv", CountVectorizer()), ("skip", "passthrough"),
+                             ("tfidf", TfidfTransformer())])
+
+        expected = pipe().fit(X, Y).transform(TEST)
+        _, _, feats_test = self.cache.fit_transform(pipe(), X, Y, TEST)
+        np.testing.assert_allclose(feats_test.toarray(), expected.toarray())
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_lazy_input(self):
+        # lazy datasets are hashed by content, not by file path
+        csv_path = os.path.join(self.cache.cache_dir, "data.csv")
+
+        def utterances(samples):
+            with open(csv_path, "w") as f:
+                f.write("label,utterance\n")
+                f.writelines(f"{label},{utt}\n" for utt, label in samples)
+            return CSVDataset(csv_path).utterances()
+
+        pipe, feats, _ = self.cache.fit_transform(Pipeline([("cv", CountVectorizer())]),
+                                                  utterances(zip(X, Y)), Y)
+        self.assertEqual(feats.shape[0], len(X))
+        self.cache.fit_transform(Pipeline([("cv", CountVectorizer())]),
+                                 utterances(zip(X, Y)), Y)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+        self.cache.fit_transform(Pipeline([("cv", CountVectorizer())]),
+                                 utterances(zip(X[:6], Y)), Y[:6])
+        self.assertEqual(self.cache.misses, 2)
+
+
+class TestTrainer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.csv = os.path.join(cls.tmp, "data.csv")
+        random.seed(0)
+        with open(cls.csv, "w") as f:
+            f.write("label,utterance\n")
+            for _ in range(10):
+                for x, y in zip(X, Y):
+                    f.write(f"{y},{x} {random.choice(['now', 'please', ''])}\n")
+
+    def test_train(self):
+        cache_dir = os.path.join(self.tmp, "cache")
+        run = PerceptronTrainer("cv2", cache_dir=cache_dir, random_state=0).train(self.csv)
+        self.assertIsInstance(run, TrainingRun)
+        self.assertGreater(run.accuracy, 0.5)
+        self.assertGreater(run.wall_time, 0)
+        self.assertGreaterEqual(run.wall_time, run.featurize_time + run.fit_time)
+        self.assertEqual(len(run.clf.predict(TEST)), 2)
+
+        run2 = PerceptronTrainer("cv2", cache_dir=cache_dir, random_state=0).train(self.csv)
+        self.assertEqual(run2.accuracy, run.accuracy)
+
+    def test_find_best_pipeline(self):
+        runs = list(PerceptronTrainer.find_best_pipeline(
+            ["cv2", "tfidf"], self.csv, n_workers=2, random_state=0,
+            cache_dir=os.path.join(self.tmp, "cache")))
+        self.assertEqual(sorted(r.pipeline_id for r in runs), ["cv2", "tfidf"])
+        for run in runs:
+            self.assertEqual(len(run.clf.predict(TEST)), 2)
+
+    def test_find_best_pipeline_failures(self):
+        # failed pipelines are skipped the same way with and without a pool
+        for n_workers in (None, 2):
+            runs = list(PerceptronTrainer.find_best_pipeline(
+                ["cv2", "not_a_pipeline"], self.csv, n_workers=n_workers))
+            self.assertEqual([r.pipeline_id for r in runs], ["cv2"])
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from sklearn.linear_model import Perceptron
+
+from ovos_classifiers.skovos.nn import PerceptronTrainer, MLPTrainer, pareto_front
+
+X = ["play metallica", "play some jazz music", "play the matrix movie",
+     "watch a horror movie", "put on rock music", "tell me a joke"]
+Y = ["music", "music", "movie", "movie", "music", "other"]
+
+
+class TestParetoFront(unittest.TestCase):
+
+    def test_front(self):
+        cv_results = {
+            "params": [{"a": 1}, {"a": 2}, {"a": 3}, {"a": 4}, {"a": 5}],
+            "mean_fit_time": [0.1, 0.2, 0.3, 0.4, 0.05],
+            "mean_test_score": [0.5, 0.9, 0.8, 0.95, float("nan")],
+            "n_resources": [10, 30, 30, 90, 10]
+        }
+        front = pareto_front(cv_results)
+        self.assertEqual([p["params"]["a"] for p in front], [1, 2, 4])
+        self.assertEqual(front[-1], {"params": {"a": 4}, "fit_time": 0.4,
+                                     "score": 0.95, "n_resources": 90})
+
+
+class TestHalvingSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.csv = os.path.join(tempfile.mkdtemp(), "data.csv")
+        with open(cls.csv, "w") as f:
+            f.write("label,utterance\n")
+            for i in range(15):
+                for x, y in zip(X, Y):
+                    f.write(f"{y},{x} {i}\n")
+
+    def test_perceptron(self):
+        run = PerceptronTrainer("cv2", random_state=0).hyperparam_search(
+            self.csv, search="halving", n_jobs=1)
+        self.assertTrue(run.pareto_front)
+        self.assertIn("n_resources", run.pareto_front[0])
+        self.assertGreater(run.accuracy, 0.5)
+
+    def test_mlp(self):
+        run = MLPTrainer("cv2", random_state=0).hyperparam_search(
+            self.csv, search="halving", max_iter=9, n_candidates=9, n_jobs=1)
+        # budget is the number of iterations, 9 candidates -> 3 -> 1
+        self.assertEqual(run.hyperparams["max_iter"], 9)
+        for point in run.pareto_front:
+            self.assertIn(point["n_resources"], (1, 3, 9))
+
+    def test_scoring(self):
+        trainer = PerceptronTrainer("cv2", random_state=0)
+        for search in ("random", "halving"):
+            self.assertIsNone(trainer.search_cv(Perceptron(), {}, search).scoring)
+            c = trainer.search_cv(Perceptron(), {}, search, scoring="balanced_accuracy")
+            self.assertEqual(c.scoring, "balanced_accuracy")
+
+    def test_unknown_search(self):
+        with self.assertRaises(ValueError):
+            PerceptronTrainer("cv2").hyperparam_search(self.csv, search="grid")
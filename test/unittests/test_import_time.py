@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# plugin discovery imports every entrypoint at boot,
+# this is the time budget for ovos-classifiers itself on top of its dependencies
+IMPORT_BUDGET = 0.5
+
+_SCRIPT = """
+import json, sys, time
+# third party dependencies, not ovos-classifiers time
+import numpy, requests, quebra_frases, ovos_config, ovos_utils.lang.visimes
+import ovos_plugin_manager.templates.coreference, ovos_plugin_manager.templates.g2p, \\
+    ovos_plugin_manager.templates.keywords, ovos_plugin_manager.templates.postag, \\
+    ovos_plugin_manager.templates.solvers, ovos_plugin_manager.templates.transformers
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted({{m.split(".")[0] for m in sys.modules}} & {{"nltk", "sklearn", "scipy", "ahocorasick"}})
+print(json.dumps({{"elapsed": elapsed, "heavy": heavy}}))
+"""
+
+
+def _import(module):
+    out = subprocess.check_output([sys.executable, "-c", _SCRIPT.format(module=module)])
+    return json.loads(out.decode("utf-8").strip().split("\n")[-1])
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_opm_heuristics(self):
+        result = _import("ovos_classifiers.opm.heuristics")
+        self.assertEqual(result["heavy"], [])
+        self.assertLess(result["elapsed"], IMPORT_BUDGET)
+
+    def test_skovos_pipelines(self):
+        # sklearn is needed, but taggers/nltk only when a pipeline uses them
+        result = _import("ovos_classifiers.skovos.pipelines")
+        self.assertNotIn("nltk", result["heavy"])
+        self.assertNotIn("ahocorasick", result["heavy"])
@@ -0,0 +1,76 @@
+import pickle
+import unittest
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import Perceptron, PassiveAggressiveClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from ovos_classifiers.skovos.classifier import SklearnOVOSClassifier
+
+X = ["play metallica", "play some jazz music", "play the matrix movie",
+     "watch a horror movie", "put on rock music", "play rob zombie",
+     "i want to watch a film", "what is the weather", "tell me a joke",
+     "set an alarm"] * 3
+Y = ["music", "music", "movie", "movie", "music", "music", "movie",
+     "other", "other", "other"] * 3
+TEST = ["play some metallica", "watch the matrix", "tell me the weather"]
+CLASSES = ["movie", "music", "other"]
+
+
+def _batches(size=7):
+    for i in range(0, len(X), size):
+        yield X[i:i + size], Y[i:i + size]
+
+
+class TestPartialTrain(unittest.TestCase):
+
+    def test_same_as_full_fit(self):
+        # naive bayes counts are additive, minibatches give the same model
+        clf = SklearnOVOSClassifier("cv2_hashing", MultinomialNB())
+        for x, y in _batches():
+            clf.partial_train(x, y, classes=CLASSES)
+        full = SklearnOVOSClassifier("cv2_hashing", MultinomialNB())
+        full.train(X, Y)
+        np.testing.assert_allclose(clf.clf.predict_proba(TEST), full.clf.predict_proba(TEST))
+        self.assertEqual(list(clf.predict(TEST)), ["music", "movie", "other"])
+
+    def test_update_loaded_model(self):
+        clf = SklearnOVOSClassifier("tfidf_hashing", PassiveAggressiveClassifier(random_state=0))
+        for _ in range(5):
+            for x, y in _batches():
+                clf.partial_train(x, y, classes=CLASSES)
+        clf2 = SklearnOVOSClassifier("tfidf_hashing", PassiveAggressiveClassifier())
+        clf2.clf = pickle.loads(pickle.dumps(clf.clf))
+        # new label data, classes already known
+        clf2.partial_train(["play the radio"], ["music"])
+        self.assertEqual(list(clf2.clf.classes_), CLASSES)
+
+    def test_skipgrams(self):
+        clf = SklearnOVOSClassifier("skipgram2_hashing", Perceptron(random_state=0))
+        for _ in range(3):
+            for x, y in _batches():
+                clf.partial_train(x, y, classes=CLASSES)
+        self.assertEqual(len(clf.predict(TEST)), 3)
+
+    def test_not_incremental(self):
+        with self.assertRaises(ValueError):
+            SklearnOVOSClassifier("cv2", MultinomialNB()).partial_train(X, Y, classes=CLASSES)
+        with self.assertRaises(ValueError):
+            SklearnOVOSClassifier("cv2_hashing", CalibratedClassifierCV(Perceptron())).partial_train(
+                X, Y, classes=CLASSES)
+
+    def test_raw(self):
+        # raw classifiers are trained on already extracted features
+        feats = HashingVectorizer(n_features=2 ** 10).transform(X)
+        clf = SklearnOVOSClassifier("raw", Perceptron(random_state=0))
+        clf.partial_train(feats, Y, classes=CLASSES)
+        self.assertEqual(list(clf.clf.classes_), CLASSES)
+
+        pipe = Pipeline([("feats", HashingVectorizer()), ("clf", Perceptron())])
+        clf = SklearnOVOSClassifier("raw", pipe)
+        with self.assertRaises(ValueError) as e:
+            clf.partial_train(X, Y, classes=CLASSES)
+        self.assertIn("cv2_hashing", str(e.exception))
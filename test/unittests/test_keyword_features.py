@@ -0,0 +1,173 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from ovos_classifiers.skovos.features import KeywordFeatures, KEYWORD_INDEXES, KeywordFeaturesVectorizer
+
+
+class TestKeywordFeatures(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.csv = os.path.join(cls.tmp, "entities.csv")
+        with open(cls.csv, "w") as f:
+            f.write("label,entity\n"
+                    "artist_name,Metallica\n"
+                    "album_name,Metallica\n"
+                    "artist_name,Rob Zombie\n"
+                    "movie_name,Zombie\n"
+                    "film_genre,Horror\n"
+                    "movie_name,Horror Movie\n"
+                    "music_genre,Jazz\n"
+                    "music_genre,Rock\n"
+                    "book_name,ab\n")
+
+    def test_extract(self):
+        kw = KeywordFeatures(self.csv)
+        self.assertEqual(kw.extract("play metallica"),
+                         {'artist_name': 'Metallica', 'album_name': 'Metallica'})
+        self.assertEqual(kw.extract("play rob zombie"),
+                         {'artist_name': 'Rob Zombie', 'movie_name': 'Zombie'})
+        self.assertEqual(kw.extract("play a horror movie"),
+                         {'film_genre': 'Horror', 'movie_name': 'Horror Movie'})
+
+    def test_partial_words(self):
+        kw = KeywordFeatures(self.csv)
+        # "rock" inside "rocks" is not a word match
+        self.assertEqual(kw.extract("play rocks"), {})
+        # but a full word anywhere in the utterance is
+        self.assertEqual(kw.extract("rocks and rock"), {'music_genre': 'Rock'})
+        # samples shorter than 3 chars are ignored
+        self.assertEqual(kw.extract("ab"), {})
+
+    def test_count(self):
+        kw = KeywordFeatures(self.csv)
+        counts = kw.count("play metallica jazz")
+        self.assertEqual(counts["artist_name"], 1)
+        self.assertEqual(counts["album_name"], 1)
+        self.assertEqual(counts["music_genre"], 1)
+        self.assertEqual(counts["movie_name"], 0)
+        self.assertEqual(set(counts), set(kw.entities))
+
+    def test_ignore_list(self):
+        kw = KeywordFeatures(self.csv, ignore_list=["metallica"])
+        self.assertEqual(kw.extract("play metallica"), {})
+
+    def test_register_entity(self):
+        kw = KeywordFeatures(self.csv)
+        kw.register_entity("playlist_name", ["Morning Jams"])
+        self.assertEqual(kw.extract("play my morning jams"),
+                         {'playlist_name': 'Morning Jams'})
+        # runtime entities are biased
+        self.assertEqual(kw.count("play my morning jams")["playlist_name"], 2)
+        kw.deregister_entity("playlist_name")
+        self.assertEqual(kw.extract("play my morning jams"), {})
+        self.assertNotIn("playlist_name", kw.count("play my morning jams"))
+
+    def test_pickle(self):
+        kw = KeywordFeatures(self.csv)
+        kw.extract("warm up")
+        kw2 = pickle.loads(pickle.dumps(kw))
+        self.assertEqual(kw2.extract("play rob zombie"),
+                         kw.extract("play rob zombie"))
+
+    def test_register_entities(self):
+        kw = KeywordFeatures(self.csv)
+        kw.extract("warm up")
+        kw.register_entities({"playlist_name": ["Morning Jams", "Chill Vibes"],
+                              "artist_name": ["Queen"]})
+        self.assertEqual(kw._dirty, {"playlist_name", "artist_name"})
+        self.assertEqual(kw.extract("play chill vibes by queen"),
+                         {'artist_name': 'Queen', 'playlist_name': 'Chill Vibes'})
+        self.assertEqual(kw._dirty, set())
+        kw.deregister_entities(["playlist_name", "artist_name"])
+        self.assertEqual(kw.extract("play chill vibes by queen"), {})
+
+    def test_background_rebuild(self):
+        kw = KeywordFeatures(self.csv, background_rebuild=True)
+        # the first build always happens in the foreground
+        self.assertEqual(kw.extract("play metallica"),
+                         {'artist_name': 'Metallica', 'album_name': 'Metallica'})
+        kw.register_entity("playlist_name", ["Morning Jams"])
+        # readers keep using the previous snapshot until the rebuild is done
+        self.assertIn(kw.extract("play my morning jams"),
+                      [{}, {'playlist_name': 'Morning Jams'}])
+        kw.rebuild()
+        self.assertEqual(kw.extract("play my morning jams"),
+                         {'playlist_name': 'Morning Jams'})
+
+    def test_vectorizer_background_rebuild(self):
+        vec = KeywordFeaturesVectorizer(self.csv, background_rebuild=True)
+        self.assertTrue(vec.background_rebuild)
+        self.assertEqual(vec.csv_path, self.csv)
+        self.assertTrue(vec._transformer.wordlist.background_rebuild)
+        # pickled before the params were stored
+        for k in ("csv_path", "ignore_list", "background_rebuild"):
+            del vec.__dict__[k]
+        vec = pickle.loads(pickle.dumps(vec))
+        self.assertFalse(vec.background_rebuild)
+
+    def test_vectorizer_params(self):
+        from sklearn.base import clone
+        cache_dir = os.path.join(self.tmp, "paramcache")
+        vec = KeywordFeaturesVectorizer(self.csv, background_rebuild=True, cache_dir=cache_dir)
+        params = vec.get_params()
+        self.assertEqual(params["cache_dir"], cache_dir)
+        self.assertTrue(params["background_rebuild"])
+        vec2 = clone(vec)
+        self.assertEqual(vec2.cache_dir, cache_dir)
+        self.assertEqual(vec2._transformer.wordlist.cache_dir, cache_dir)
+        self.assertEqual(vec2.fit().transform(["play metallica"]).shape,
+                         vec.fit().transform(["play metallica"]).shape)
+
+    def test_compiled_index(self):
+        cache_dir = os.path.join(self.tmp, "kwcache")
+        kw = KeywordFeatures(self.csv, cache_dir=cache_dir)
+        files = os.listdir(cache_dir)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith(".kwidx"))
+
+        # second load comes from disk, no rebuild needed
+        KEYWORD_INDEXES.clear()
+        kw2 = KeywordFeatures(self.csv, cache_dir=cache_dir)
+        self.assertEqual(kw2._dirty, set())
+        self.assertIsNotNone(kw2._snapshot)
+        self.assertEqual(kw2.entities, kw.entities)
+        self.assertEqual(kw2.extract("play rob zombie"),
+                         kw.extract("play rob zombie"))
+        kw2.register_entity("playlist_name", ["Morning Jams"])
+        self.assertEqual(kw2.extract("play my morning jams"),
+                         {'playlist_name': 'Morning Jams'})
+
+        # a corrupt index is ignored and rebuilt
+        KEYWORD_INDEXES.clear()
+        path = os.path.join(cache_dir, files[0])
+        with open(path, "wb") as f:
+            f.write(b"garbage")
+        kw3 = KeywordFeatures(self.csv, cache_dir=cache_dir)
+        self.assertEqual(kw3.extract("play metallica"),
+                         {'artist_name': 'Metallica', 'album_name': 'Metallica'})
+        with open(path, "rb") as f:
+            self.assertNotEqual(f.read(), b"garbage")
+
+    def test_shared_index(self):
+        KEYWORD_INDEXES.clear()
+        kw = KeywordFeatures(self.csv)
+        kw2 = KeywordFeatures(self.csv)
+        # parsed and compiled once per process
+        self.assertIs(kw2._index, kw._index)
+        self.assertIs(kw2._snapshot, kw._snapshot)
+
+        # copy on write, registrations do not leak into other instances
+        kw2.register_entity("artist_name", ["Queen"])
+        kw2.deregister_entity("movie_name")
+        self.assertIsNot(kw2._index, kw._index)
+        self.assertEqual(kw2.extract("play queen"), {'artist_name': 'Queen'})
+        self.assertEqual(kw.extract("play queen"), {})
+        self.assertEqual(kw.extract("play rob zombie"),
+                         {'artist_name': 'Rob Zombie', 'movie_name': 'Zombie'})
+        self.assertNotIn("Queen", kw.entities["artist_name"])
+        kw3 = KeywordFeatures(self.csv)
+        self.assertEqual(kw3.extract("play queen"), {})
@@ -0,0 +1,95 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from ovos_classifiers.heuristics import lang_detect
+from ovos_classifiers.heuristics.lang_detect import LMLangClassifier
+
+
+class TestLMLangClassifier(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        texts = {
+            "en": "the quick brown fox jumps over the lazy dog and the cat",
+            "pt": "o rato roeu a rolha da garrafa do rei da rússia",
+            "de": "der schnelle braune fuchs springt über den faulen hund"
+        }
+        cls.clf = LMLangClassifier.__new__(LMLangClassifier)
+        cls.clf.language_models = {l: LMLangClassifier.build_model(t)
+                                   for l, t in texts.items()}
+
+    def reference(self, text):
+        text_model = LMLangClassifier.build_model(text)
+        return {m: LMLangClassifier.calculate_cosine(lm, text_model)
+                for m, lm in self.clf.language_models.items()}
+
+    def test_predict(self):
+        for text in ["the dog is lazy", "a garrafa do rato", "über den hund",
+                     "xyz qqq"]:
+            scores = self.clf.predict(text)
+            expected = self.reference(text)
+            self.assertEqual(list(scores), list(expected))
+            for lang in expected:
+                self.assertAlmostEqual(scores[lang], expected[lang])
+        self.assertEqual(self.clf.identify_language("the lazy dog"), "en")
+        self.assertEqual(self.clf.identify_language("o rato do rei"), "pt")
+
+    def test_predict_batch(self):
+        texts = ["the dog is lazy", "a garrafa do rato", "", "über den hund"]
+        batch = self.clf.predict_batch(texts)
+        self.assertEqual(len(batch), len(texts))
+        for text, scores in zip(texts, batch):
+            if not text:
+                self.assertEqual(set(scores.values()), {0.0})
+                continue
+            self.assertEqual(scores, self.clf.predict(text))
+
+    def test_norms(self):
+        norms = self.clf.norms
+        for lang, lm in self.clf.language_models.items():
+            self.assertAlmostEqual(norms[lang],
+                                   sum(v ** 2 for v in lm.values()) ** 0.5)
+
+    def test_pickle(self):
+        self.clf.predict("warm up")
+        clf = pickle.loads(pickle.dumps(self.clf))
+        self.assertIsNone(clf._compiled)
+        self.assertEqual(clf.predict("the lazy dog"),
+                         self.clf.predict("the lazy dog"))
+        # pickles from before the compiled mode
+        old = LMLangClassifier.__new__(LMLangClassifier)
+        old.__setstate__({"language_models": self.clf.language_models})
+        self.assertEqual(old.predict("the lazy dog"),
+                         self.clf.predict("the lazy dog"))
+
+
+class TestLMLangClassifierConstructor(unittest.TestCase):
+
+    def test_fit(self):
+        texts = {"English-Latin1": "the quick brown fox jumps over the lazy dog",
+                 "Portuguese_Portugues-Latin1": "o rato roeu a rolha da garrafa do rei"}
+        # udhr is a lazy corpus loader, replaced in the module namespace so
+        # the (missing) corpus is never loaded
+        udhr = Mock()
+        udhr.raw.side_effect = lambda lang_id: texts.get(lang_id, "xyz")
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(lang_detect, "xdg_data_home", return_value=tmp), \
+                patch.object(lang_detect, "ensure_resource"), \
+                patch.dict(lang_detect.__dict__, {"udhr": udhr}):
+            clf = LMLangClassifier()
+            self.assertIsNotNone(clf._compiled)
+            self.assertEqual(clf.identify_language("the lazy dog"), "en")
+            model = f"{tmp}/ovos-classifiers/lang_lms.pkl"
+            self.assertTrue(os.path.isfile(model))
+
+            # second instance loads the saved models instead of fitting again
+            clf2 = LMLangClassifier()
+            self.assertEqual(clf2.language_models, clf.language_models)
+            self.assertEqual(clf2.predict("o rato do rei"),
+                             clf.predict("o rato do rei"))
+
+            clf3 = LMLangClassifier(path=model)
+            self.assertEqual(clf3.identify_language("o rato do rei"), "pt")
@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import nltk
+
+from ovos_classifiers.utils import get_stopwords, nltk_resources
+
+
+class TestNltkResources(unittest.TestCase):
+
+    def setUp(self):
+        nltk_resources.reset()
+        nltk_resources.set_offline(False)
+        get_stopwords.cache_clear()
+
+    def tearDown(self):
+        nltk_resources.reset()
+        nltk_resources.set_offline(None)
+        get_stopwords.cache_clear()
+
+    @patch("nltk.download")
+    @patch("nltk.data.find")
+    def test_checked_once(self, find, download):
+        self.assertTrue(nltk_resources.ensure_resource("punkt"))
+        self.assertTrue(nltk_resources.ensure_resources("punkt", "stopwords"))
+        find.assert_any_call("tokenizers/punkt")
+        find.assert_any_call("corpora/stopwords")
+        self.assertEqual(find.call_count, 2)
+        download.assert_not_called()
+
+    @patch("nltk.download")
+    @patch("nltk.data.find", side_effect=LookupError)
+    def test_offline(self, find, download):
+        nltk_resources.set_offline(True)
+        self.assertFalse(nltk_resources.ensure_resource("punkt"))
+        download.assert_not_called()
+
+    @patch("nltk.download")
+    @patch("nltk.data.find", side_effect=LookupError)
+    def test_download_missing(self, find, download):
+        self.assertFalse(nltk_resources.ensure_resource("rslp"))
+        download.assert_called_once_with("rslp")
+        # failures are not remembered, the download is retried
+        self.assertFalse(nltk_resources.ensure_resource("rslp"))
+        self.assertEqual(download.call_count, 2)
+
+    @patch("nltk.data.find")
+    def test_stopwords_memoized(self, find):
+        corpus = MagicMock()
+        corpus.words.return_value = ["the", "a"]
+        with patch.object(nltk.corpus, "stopwords", corpus):
+            sw = get_stopwords("en-us")
+            self.assertEqual(sw, frozenset(["the", "a"]))
+            self.assertIs(get_stopwords("en-us"), sw)
+            self.assertEqual(get_stopwords("xx"), frozenset())
+        corpus.words.assert_called_once_with("english")
@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.pipeline import Pipeline
+
+from ovos_classifiers.skovos import pipelines
+from ovos_classifiers.skovos.classifier import SklearnOVOSClassifier, iter_clfs
+from ovos_classifiers.skovos.pipelines import get_features_pipeline, register_pipeline, list_pipelines
+
+
+class TestPipelineRegistry(unittest.TestCase):
+
+    def test_only_requested_pipeline_is_built(self):
+        with patch.object(pipelines, "OCPKeywordFeaturesVectorizer") as kw, \
+                patch.object(pipelines, "POSTaggerVectorizer") as pos:
+            pipe = get_features_pipeline("cv2")
+            kw.assert_not_called()
+            pos.assert_not_called()
+        self.assertIsInstance(pipe.steps[0][1], CountVectorizer)
+
+    def test_new_instance_per_call(self):
+        self.assertIsNot(get_features_pipeline("cv2"), get_features_pipeline("cv2"))
+
+    def test_register(self):
+        self.addCleanup(pipelines._PIPELINE_FACTORIES.pop, "test_cv1", None)
+        self.addCleanup(pipelines._PIPELINE_FACTORIES.pop, "test_cv3", None)
+
+        @register_pipeline("test_cv1")
+        def cv1():
+            return Pipeline([("cv1", CountVectorizer())])
+
+        register_pipeline("test_cv3", lambda: Pipeline([("cv3", CountVectorizer(ngram_range=(1, 3)))]))
+        self.assertIn("test_cv1", list_pipelines())
+        self.assertEqual(get_features_pipeline("test_cv1").steps[0][0], "cv1")
+        self.assertEqual(get_features_pipeline("test_cv3").steps[0][0], "cv3")
+
+    def test_unknown(self):
+        with self.assertRaises(KeyError):
+            get_features_pipeline("not_a_pipeline")
+
+
+class TestPipelineClassifiers(unittest.TestCase):
+    X = ["play metallica", "play some jazz music", "play the matrix movie",
+         "watch a horror movie", "put on rock music", "tell me a joke",
+         "what time is it", "play a film"] * 3
+    Y = ["music", "music", "movie", "movie", "music", "other", "other", "movie"] * 3
+
+    @staticmethod
+    def _small_hashing(factory):
+        # 2**20 hashed columns make trees and mlp slow/huge on any dataset
+        def small():
+            pipe = factory()
+            pipe.set_params(**{k: 2 ** 10 for k in pipe.get_params()
+                               if k.endswith("n_features")})
+            return pipe
+
+        return small
+
+    def test_every_pipeline_every_classifier(self):
+        factories = {pipeline_id: self._small_hashing(f)
+                     for pipeline_id, f in pipelines._PIPELINE_FACTORIES.items()
+                     if "hashing" in pipeline_id}
+        with patch.dict(pipelines._PIPELINE_FACTORIES, factories):
+            self._check_pipelines()
+
+    def _check_pipelines(self):
+        for pipeline_id in list_pipelines():
+            with self.subTest(pipeline=pipeline_id):
+                try:
+                    get_features_pipeline(pipeline_id).fit(self.X, self.Y)
+                except (LookupError, OSError) as e:
+                    # nltk data or model downloads not available
+                    self.skipTest(f"{pipeline_id} needs downloaded data: {type(e).__name__}")
+                for name, clf in iter_clfs(calibrate=False):
+                    with self.subTest(pipeline=pipeline_id, clf=name):
+                        clf = SklearnOVOSClassifier(pipeline_id, clf)
+                        clf.train(self.X, self.Y)
+                        self.assertEqual(len(clf.predict(["play some jazz"])), 1)
@@ -0,0 +1,95 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from ovos_classifiers import corefiob
+from ovos_classifiers.postag import OVOSPostag
+from ovos_classifiers.utils.registry import ModelRegistry, MODEL_REGISTRY
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def test_hit_miss(self):
+        reg = ModelRegistry()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return "model", 10
+
+        self.assertEqual(reg.get_or_load(("postag", "a", "en"), loader), "model")
+        self.assertEqual(reg.get_or_load(("postag", "a", "en"), loader), "model")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(reg.stats["hits"], 1)
+        self.assertEqual(reg.stats["misses"], 1)
+        self.assertEqual(reg.stats["bytes"], 10)
+
+    def test_lru_eviction(self):
+        reg = ModelRegistry(max_models=2, max_bytes=None)
+        reg.get_or_load("a", lambda: ("a", 0))
+        reg.get_or_load("b", lambda: ("b", 0))
+        reg.get_or_load("a", lambda: ("a", 0))  # a is now most recent
+        reg.get_or_load("c", lambda: ("c", 0))
+        self.assertIn("a", reg)
+        self.assertNotIn("b", reg)
+        self.assertEqual(reg.evictions, 1)
+
+    def test_memory_budget(self):
+        reg = ModelRegistry(max_models=None, max_bytes=100)
+        reg.get_or_load("a", lambda: ("a", 60))
+        reg.get_or_load("b", lambda: ("b", 60))
+        self.assertNotIn("a", reg)
+        self.assertIn("b", reg)
+        # a single model over budget is still kept
+        reg.get_or_load("c", lambda: ("c", 500))
+        self.assertIn("c", reg)
+        self.assertEqual(len(reg), 1)
+
+    def test_concurrent_load_once(self):
+        reg = ModelRegistry()
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def loader():
+            calls.append(1)
+            return object(), 0
+
+        def worker():
+            barrier.wait()
+            reg.get_or_load("k", loader)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(reg.hits + reg.misses, 8)
+
+    def test_postag_shared(self):
+        p1 = OVOSPostag("regex", "en-us")
+        p2 = OVOSPostag("regex", "en-us")
+        self.assertIs(p1.clf, p2.clf)
+        self.assertIn(("postag", "regex", "en-us"), MODEL_REGISTRY)
+
+    def test_corefiob_config_once(self):
+        with patch.object(corefiob, "Configuration", return_value={"lang": "en-us"}) as config:
+            tagger = corefiob.OVOSCorefIOBTagger()
+            for _ in range(3):
+                self.assertIs(tagger.load_model(tagger.model_id, tagger.lang)[1], tagger.clf)
+        # only resolved by the constructor, load_model just builds the key
+        self.assertEqual(config.call_count, 1)
+        self.assertIn(("corefiob", "corefiob_heuristic", "en-us"), MODEL_REGISTRY)
+
+    def test_postag_plugin_config_once(self):
+        from ovos_classifiers import opm, postag
+        config = {"lang": "en-us", "classifiers": {"postag": {"model_id": "regex"}}}
+        with patch.object(opm, "Configuration", return_value=config) as plugin_config, \
+                patch.object(postag, "Configuration", return_value=config) as tagger_config:
+            plugin = opm.OVOSPostagPlugin()
+            for _ in range(3):
+                tags = plugin.postag("I like pizza")
+            self.assertIs(plugin.get_tagger("en-us"), plugin.get_tagger())
+        self.assertEqual([t[2] for t in tags], ["I", "like", "pizza"])
+        self.assertEqual(plugin_config.call_count, 1)
+        self.assertEqual(tagger_config.call_count, 0)
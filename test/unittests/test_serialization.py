@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+from sklearn.linear_model import Perceptron
+from sklearn.naive_bayes import MultinomialNB
+
+from ovos_classifiers.skovos.classifier import SklearnOVOSClassifier
+from ovos_classifiers.utils.serialization import save_model, load_model, read_model_header
+
+X = ["play metallica", "play some jazz music", "play the matrix movie",
+     "watch a horror movie", "what is the weather", "tell me a joke"] * 3
+Y = ["music", "music", "movie", "movie", "other", "other"] * 3
+TEST = ["play some metallica", "watch the matrix", "tell me the weather"]
+
+
+class TestModelContainer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.clf = SklearnOVOSClassifier("cv2", Perceptron(random_state=0))
+        self.clf.train(X, Y)
+
+    def test_header(self):
+        path = os.path.join(self.tmp, "model.clf")
+        self.clf.save(path)
+        header = read_model_header(path)
+        self.assertEqual(header["pipeline_id"], "cv2")
+        self.assertEqual(header["labels"], ["movie", "music", "other"])
+        self.assertEqual(header["n_features"], self.clf.clf.steps[-1][1].n_features_in_)
+        self.assertIsNone(header["compress"])
+        self.assertEqual(len(header["sha256"]), 64)
+        self.assertIn("sklearn_version", header)
+
+    def test_mmap(self):
+        path = os.path.join(self.tmp, "model.clf")
+        self.clf.save(path)
+        # regular writeable arrays unless memory mapping is requested
+        loaded = SklearnOVOSClassifier.from_file(path)
+        self.assertTrue(loaded.clf.steps[-1][1].coef_.flags.writeable)
+        loaded.clf.steps[-1][1].coef_ *= 2
+
+        loaded = SklearnOVOSClassifier("cv2", Perceptron()).load_from_file(path, mmap_mode="r")
+        self.assertIsInstance(loaded.clf.steps[-1][1].coef_, np.memmap)
+        self.assertFalse(loaded.clf.steps[-1][1].coef_.flags.writeable)
+        np.testing.assert_array_equal(loaded.predict(TEST), self.clf.predict(TEST))
+
+    def test_compressed(self):
+        path = os.path.join(self.tmp, "model.clf")
+        self.clf.save(path)
+        cpath = os.path.join(self.tmp, "model.clf.xz")
+        self.clf.save(cpath, compress="xz")
+        self.assertEqual(read_model_header(cpath)["compress"], "xz")
+        self.assertLess(os.path.getsize(cpath), os.path.getsize(path))
+        loaded = SklearnOVOSClassifier.from_file(cpath)
+        np.testing.assert_array_equal(loaded.predict(TEST), self.clf.predict(TEST))
+
+        with self.assertRaises(ValueError):
+            save_model(self.clf.clf, cpath, compress="rar")
+
+    def test_corrupted(self):
+        path = os.path.join(self.tmp, "model.clf")
+        self.clf.save(path)
+        with open(path, "r+b") as f:
+            f.seek(100)
+            byte = f.read(1)
+            f.seek(100)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        # the sha256 is only checked on request, reading the whole file
+        with self.assertRaises(ValueError):
+            load_model(path, verify=True)
+
+    def test_truncated(self):
+        path = os.path.join(self.tmp, "model.clf")
+        self.clf.save(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        header = read_model_header(path)
+        with open(path, "wb") as f:
+            # drop the end of the payload, keep header + trailer
+            f.write(data[:header["payload_size"] - 10] + data[header["payload_size"]:])
+        with self.assertRaises(ValueError):
+            load_model(path)
+
+    def test_legacy_file(self):
+        path = os.path.join(self.tmp, "legacy.clf")
+        joblib.dump(self.clf.clf, path)
+        self.assertIsNone(read_model_header(path))
+        loaded = SklearnOVOSClassifier.from_file(path)
+        np.testing.assert_array_equal(loaded.predict(TEST), self.clf.predict(TEST))
+
+    def test_update_loaded_model(self):
+        clf = SklearnOVOSClassifier("cv2_hashing", MultinomialNB())
+        clf.partial_train(X, Y, classes=["movie", "music", "other"])
+        path = os.path.join(self.tmp, "incremental.clf")
+        clf.save(path)
+        loaded = SklearnOVOSClassifier("cv2_hashing", MultinomialNB()).load_from_file(path)
+        loaded.partial_train(["play the radio"], ["music"])
+        self.assertEqual(loaded.clf.steps[-1][1].class_count_.sum(), len(X) + 1)
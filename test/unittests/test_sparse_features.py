@@ -0,0 +1,116 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import Perceptron
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+from ovos_classifiers.skovos.features import SingleWordFeaturesVectorizer, WordFeaturesVectorizer, \
+    KeywordFeaturesVectorizer, SentenceWordFeaturesVectorizer
+from ovos_classifiers.skovos.features.en import QuestionFeaturesVectorizerEN
+
+X = ["play metallica", "what is the weather", "play a horror movie", "thank you"]
+Y = ["music", "other", "movie", "other"]
+
+
+class TestSparseFeatures(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.csv = os.path.join(tempfile.mkdtemp(), "entities.csv")
+        with open(cls.csv, "w") as f:
+            f.write("label,entity\n"
+                    "artist_name,Metallica\n"
+                    "film_genre,Horror\n"
+                    "movie_name,Horror Movie\n")
+
+    def test_dict_vectorizers(self):
+        for cls in (SingleWordFeaturesVectorizer, SentenceWordFeaturesVectorizer,
+                    QuestionFeaturesVectorizerEN):
+            feats = cls().fit(X).transform(X)
+            self.assertTrue(sparse.isspmatrix_csr(feats))
+            self.assertEqual(feats.dtype, np.float32)
+            self.assertEqual(feats.indices.dtype, np.int32)
+            dense = cls(sparse=False).fit(X).transform(X)
+            self.assertIsInstance(dense, np.ndarray)
+            np.testing.assert_array_equal(feats.toarray(), dense)
+
+    def test_keyword_vectorizer(self):
+        vec = KeywordFeaturesVectorizer(self.csv)
+        vec.fit()
+        feats = vec.transform(X)
+        self.assertTrue(sparse.isspmatrix_csr(feats))
+        self.assertEqual(feats.shape, (4, 3))
+        vec.sparse = False
+        np.testing.assert_array_equal(feats.toarray(), vec.transform(X))
+
+    def test_old_pickles(self):
+        # pickled before the sparse param existed
+        vec = SingleWordFeaturesVectorizer(sparse=False).fit(X)
+        del vec.__dict__["sparse"]
+        vec = pickle.loads(pickle.dumps(vec))
+        self.assertFalse(vec.sparse)
+        self.assertIsInstance(vec.transform(X), np.ndarray)
+
+        vec = KeywordFeaturesVectorizer(self.csv)
+        vec.fit()
+        del vec.__dict__["sparse"]
+        vec = pickle.loads(pickle.dumps(vec))
+        self.assertIsInstance(vec.transform(X), np.ndarray)
+
+    def test_feature_union(self):
+        vec = KeywordFeaturesVectorizer(self.csv)
+        vec.fit()
+        pipe = Pipeline([
+            ("feats", FeatureUnion([("cv2", CountVectorizer(ngram_range=(1, 2))),
+                                    ("words", SentenceWordFeaturesVectorizer()),
+                                    ("kw", vec)])),
+            ("clf", Perceptron())
+        ])
+        self.assertTrue(sparse.issparse(pipe.steps[0][1].fit_transform(X)))
+        pipe.fit(X, Y)
+        self.assertEqual(len(pipe.predict(X)), 4)
+
+
+class TestHashedFeatures(unittest.TestCase):
+    words = "the dog runs fast and the cat sleeps".split()
+    tags = ["DET", "NOUN", "VERB", "ADV", "CONJ", "DET", "NOUN", "VERB"]
+
+    def test_hashed(self):
+        vec = WordFeaturesVectorizer(lang="en").fit(self.words)
+        hashed = WordFeaturesVectorizer(lang="en", n_features=2 ** 12).fit(self.words)
+        feats = vec.transform(self.words)
+        hfeats = hashed.transform(self.words)
+        self.assertEqual(hfeats.shape, (8, 2 ** 12))
+        self.assertEqual(hfeats.dtype, np.float32)
+        # same features, nothing stored
+        self.assertEqual(abs(hfeats).sum(), feats.sum())
+        self.assertLess(len(pickle.dumps(hashed)), len(pickle.dumps(vec)))
+
+        unsigned = WordFeaturesVectorizer(lang="en", n_features=2 ** 12, alternate_sign=False)
+        self.assertTrue((unsigned.fit(self.words).transform(self.words).data > 0).all())
+
+    def test_feature_names(self):
+        vec = WordFeaturesVectorizer(lang="en").fit(self.words)
+        self.assertEqual(len(vec.get_feature_names()), vec.transform(self.words).shape[1])
+        hashed = WordFeaturesVectorizer(lang="en", n_features=2 ** 12).fit(self.words)
+        with self.assertRaises(ValueError):
+            hashed.get_feature_names()
+
+    def test_tagger(self):
+        pipe = Pipeline([("feats", WordFeaturesVectorizer(lang="en", n_features=2 ** 12)),
+                         ("clf", Perceptron(random_state=0))])
+        pipe.fit(self.words * 3, self.tags * 3)
+        self.assertGreater(pipe.score(self.words, self.tags), 0.7)
+
+    def test_old_pickles(self):
+        vec = WordFeaturesVectorizer(lang="en").fit(self.words)
+        for k in ("sparse", "n_features", "alternate_sign"):
+            del vec.__dict__[k]
+        vec = pickle.loads(pickle.dumps(vec))
+        self.assertIsNone(vec.n_features)
+        self.assertEqual(vec.get_params()["alternate_sign"], True)
@@ -0,0 +1,48 @@
+import pickle
+import unittest
+
+from nltk.stem.snowball import SnowballStemmer
+
+from ovos_classifiers.utils import CachedStemmer, DummyStemmer, get_stemmer, normalize
+
+
+class TestCachedStemmer(unittest.TestCase):
+
+    def test_cache(self):
+        stemmer = CachedStemmer(SnowballStemmer("english"))
+        self.assertEqual(stemmer.stem("running"), "run")
+        self.assertEqual(stemmer.stem("running"), "run")
+        stats = stemmer.stats
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+        # attributes of the wrapped stemmer are still reachable
+        self.assertEqual(stemmer.stopwords, stemmer.stemmer.stopwords)
+
+    def test_bounded(self):
+        stemmer = CachedStemmer(DummyStemmer(), maxsize=2)
+        for w in ["cats", "dogs", "birds", "cats"]:
+            stemmer.stem(w)
+        self.assertEqual(stemmer.stats["size"], 2)
+        self.assertEqual(stemmer.stats["hits"], 0)
+
+    def test_missing_methods(self):
+        stemmer = CachedStemmer(SnowballStemmer("english"))
+        self.assertFalse(hasattr(stemmer, "lemmatize"))
+        with self.assertRaises(AttributeError):
+            stemmer.lemmatize("running")
+        # normalize skips lemmatization for stemmers without .lemmatize
+        self.assertEqual(normalize(["the dogs are running"], stemmer=stemmer),
+                         normalize(["the dogs are running"], stemmer=SnowballStemmer("english")))
+        self.assertEqual(CachedStemmer(DummyStemmer()).lemmatize("cats"), "cat")
+
+    def test_pickle(self):
+        stemmer = get_stemmer("pt")
+        stemmer.stem("gatos")
+        loaded = pickle.loads(pickle.dumps(stemmer))
+        self.assertEqual(loaded.stats["size"], 0)
+        self.assertEqual(loaded.stem("gatos"), stemmer.stem("gatos"))
+
+    def test_shared(self):
+        self.assertIs(get_stemmer("en"), get_stemmer("en"))
+        self.assertIsNot(get_stemmer("en"), get_stemmer("pt"))
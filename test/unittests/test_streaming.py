@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.linear_model import Perceptron
+
+from ovos_classifiers.datasets.streaming import CSVDataset
+
+
+class TestCSVDataset(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.csv = os.path.join(cls.tmp, "data.csv")
+        with open(cls.csv, "w") as f:
+            f.write("label,utterance\n")
+            f.write("other,Who wrote Foundation, Foundation and Empire, and Second Foundation\n")
+            f.write('OCP, Play the movie "The Matrix" \n')
+            f.write('other,"quoted, with comma"\n')
+            f.write("\n")
+            for i in range(30):
+                f.write(f"OCP,play song number {i}\n")
+                f.write(f"other,what is {i} plus {i}\n")
+        cls.csv2 = os.path.join(cls.tmp, "data2.csv")
+        with open(cls.csv2, "w") as f:
+            f.write("label,utterance\n")
+            f.write("OCP,play metallica\n")
+
+    def test_parsing(self):
+        X, y = CSVDataset(self.csv).to_lists()
+        self.assertEqual(len(X), 63)
+        self.assertEqual(X[0], "Who wrote Foundation, Foundation and Empire, and Second Foundation")
+        self.assertEqual(X[1], 'Play the movie "The Matrix"')
+        self.assertEqual(X[2], "quoted, with comma")
+        self.assertEqual(y[:3], ["other", "OCP", "other"])
+
+        X, y = CSVDataset([self.csv, self.csv2]).to_lists()
+        self.assertEqual(X[-1], "play metallica")
+
+    def test_batches(self):
+        dataset = CSVDataset(self.csv)
+        batches = list(dataset.batches(batch_size=10))
+        self.assertEqual([len(X) for X, _ in batches], [10] * 6 + [3])
+        self.assertEqual(sum((X for X, _ in batches), []), dataset.to_lists()[0])
+        self.assertEqual(dataset.classes, ["OCP", "other"])
+
+    def test_split(self):
+        dataset = CSVDataset(self.csv)
+        train, test = dataset.train_test_split(test_size=0.6, random_state=0)
+        self.assertEqual(test.label_counts(), {"other": 19, "OCP": 19})
+        self.assertEqual(train.label_counts(), {"other": 13, "OCP": 12})
+        X_train, _ = train.to_lists()
+        X_test, _ = test.to_lists()
+        self.assertEqual(sorted(X_train + X_test), sorted(dataset.to_lists()[0]))
+
+        # reproducible
+        _, test2 = dataset.train_test_split(test_size=0.6, random_state=0)
+        self.assertEqual(test2.to_lists(), test.to_lists())
+
+    def test_split_sizes(self):
+        dataset = CSVDataset(self.csv)
+        train, test = dataset.train_test_split(test_size=0, random_state=0)
+        self.assertEqual(test.label_counts(), {})
+        self.assertEqual(train.label_counts(), dataset.label_counts())
+        train, test = dataset.train_test_split(test_size=1, random_state=0)
+        self.assertEqual(train.label_counts(), {})
+        self.assertEqual(test.label_counts(), dataset.label_counts())
+
+    def test_columns(self):
+        dataset = CSVDataset(self.csv)
+        X, y = dataset.to_lists()
+        utterances = dataset.utterances()
+        self.assertNotIsInstance(utterances, list)
+        # re-iterable, read again on every pass
+        self.assertEqual(list(utterances), X)
+        self.assertEqual(list(utterances), X)
+        self.assertEqual(dataset.labels(), y)
+        vec = CountVectorizer().fit(utterances)
+        self.assertEqual(vec.transform(utterances).shape[0], 63)
+
+    def test_partial_fit(self):
+        train, test = CSVDataset(self.csv).train_test_split(test_size=0.3, random_state=0)
+        vec = HashingVectorizer(n_features=2 ** 10)
+        clf = Perceptron()
+        for _ in range(3):
+            for X, y in train.batches(batch_size=8):
+                clf.partial_fit(vec.transform(X), y, classes=train.classes)
+        X, y = test.to_lists()
+        self.assertGreater(np.mean(clf.predict(vec.transform(X)) == np.array(y)), 0.8)
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+from sklearn.linear_model import Perceptron
+from sklearn.pipeline import Pipeline
+
+from ovos_classifiers.postag import OVOSPostag
+from ovos_classifiers.skovos.features import WordFeaturesVectorizer
+from ovos_classifiers.skovos.tagger import SklearnOVOSClassifierTagger
+from ovos_classifiers.tasks.tagger import OVOSNgramTagger
+
+TAGGED = [
+    [("the", "DET"), ("dog", "NOUN"), ("runs", "VERB")],
+    [("a", "DET"), ("cat", "NOUN"), ("sleeps", "VERB"), ("today", "NOUN")],
+    [("John", "PROPN"), ("likes", "VERB"), ("the", "DET"), ("music", "NOUN")],
+    [("she", "PRON"), ("sings", "VERB")]
+] * 3
+SENTENCES = ["the cat runs", "John sleeps", "she likes the dog today", ["a", "dog"]]
+
+
+class TestBatchTagging(unittest.TestCase):
+
+    def test_sklearn_tag_sents(self):
+        X = [w for s in TAGGED for w, t in s]
+        y = [t for s in TAGGED for w, t in s]
+        pipeline = Pipeline([("feats", WordFeaturesVectorizer(lang="en")),
+                             ("clf", Perceptron(random_state=0))])
+        clf = SklearnOVOSClassifierTagger(pipeline, pipeline_id="raw")
+        clf.train(X, y)
+        batch = clf.tag_sents(SENTENCES)
+        self.assertEqual(len(batch), len(SENTENCES))
+        for sent, tags in zip(SENTENCES, batch):
+            np.testing.assert_array_equal(tags, clf.tag(sent))
+        self.assertEqual(len(clf.tag_sents([[], "the dog"])[0]), 0)
+
+    def test_ngram_tag_sents(self):
+        clf = OVOSNgramTagger(default_tag="NOUN")
+        clf.train(TAGGED)
+        self.assertEqual(clf.tag_sents(SENTENCES), [clf.tag(s) for s in SENTENCES])
+
+    def test_postag_batch(self):
+        tagger = OVOSPostag("regex", "en-us")
+        self.assertEqual(tagger.postag_batch(SENTENCES[:3]),
+                         [tagger.postag(s) for s in SENTENCES[:3]])
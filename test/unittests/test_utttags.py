@@ -0,0 +1,61 @@
+import random
+import unittest
+from os import listdir
+from os.path import dirname, isfile
+
+from ovos_classifiers.heuristics.utttags import HeuristicUtteranceTagger
+
+RES = f"{dirname(dirname(dirname(__file__)))}/ovos_classifiers/res"
+LANGS = [l for l in listdir(RES) if isfile(f"{RES}/{l}/utttags.json")]
+
+
+def reference(sentence, lang):
+    sentence = sentence.lower().strip()
+    action, denial, query, request, yesno, exclamation, social = \
+        HeuristicUtteranceTagger._get_kwords(lang)
+    if any(sentence.startswith(w) for w in action):
+        return "COMMAND:ACTION"
+    elif any(sentence.startswith(w) for w in yesno):
+        return "QUESTION:YESNO"
+    elif any(sentence.startswith(w) for w in query):
+        return "QUESTION:QUERY"
+    elif any(w in sentence for w in denial):
+        return "COMMAND:DENIAL"
+    elif any(w in sentence for w in request):
+        return "QUESTION:REQUEST"
+    elif any(w in sentence for w in social):
+        return "SENTENCE:SOCIAL"
+    elif any(w in sentence for w in exclamation):
+        return "SENTENCE:EXCLAMATION"
+    return "SENTENCE:STATEMENT"
+
+
+class TestUtteranceTagger(unittest.TestCase):
+
+    def test_examples(self):
+        self.assertEqual(HeuristicUtteranceTagger.classify("How much does it cost?", "en"),
+                         "QUESTION:QUERY")
+        self.assertEqual(HeuristicUtteranceTagger.classify("tem cerveja no frigorifico?", "pt"),
+                         "QUESTION:YESNO")
+        self.assertEqual(HeuristicUtteranceTagger({"lang": "pt"}).predict("quem inventou o telefone"),
+                         ["QUESTION:QUERY"])
+
+    def test_same_as_keyword_scan(self):
+        random.seed(0)
+        for lang in LANGS:
+            words = [w for kws in HeuristicUtteranceTagger._get_kwords(lang) for w in kws]
+            words += ["the", "a", "cat", "Bob", "?", "!"]
+            sentences = [" ".join(random.choice(words) for _ in range(random.randint(1, 5)))
+                         for _ in range(300)]
+            tagger = HeuristicUtteranceTagger({"lang": lang})
+            self.assertEqual(tagger.predict(sentences),
+                             [reference(s, lang) for s in sentences])
+
+    def test_empty_keywords(self):
+        matcher = HeuristicUtteranceTagger._compile([])
+        self.assertIsNone(matcher(""))
+        self.assertIsNone(matcher("anything"))
+
+    def test_unsupported_lang(self):
+        with self.assertRaises(ValueError):
+            HeuristicUtteranceTagger({"lang": "xx"})
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+from sklearn.ensemble import VotingClassifier
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import Perceptron, LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from ovos_classifiers.skovos.classifier import SklearnOVOSVotingClassifier
+
+X = ["play metallica", "play some jazz music", "play the matrix movie",
+     "watch a horror movie", "put on rock music", "play rob zombie",
+     "i want to watch a film", "play a podcast about science",
+     "listen to the news podcast", "play the radio", "tune in to jazz radio",
+     "what is the weather", "tell me a joke", "set an alarm"] * 2
+Y = ["music", "music", "movie", "movie", "music", "music", "movie",
+     "podcast", "podcast", "radio", "radio", "other", "other", "other"] * 2
+TEST = ["play some metallica", "watch the matrix", "tell me the weather"]
+
+
+def _voters():
+    return [("percep", Perceptron(random_state=0)),
+            ("lr", LogisticRegression())]
+
+
+class TestVotingClassifier(unittest.TestCase):
+
+    def test_train(self):
+        clf = SklearnOVOSVotingClassifier(_voters(), "cv2", voting="hard", n_jobs=2)
+        clf.train(X, Y)
+
+        # same model as fitting the whole pipeline sequentially
+        expected = Pipeline([
+            ("cv2", CountVectorizer(ngram_range=(1, 2))),
+            ("clf", VotingClassifier(_voters(), voting="hard"))
+        ]).fit(X, Y)
+        np.testing.assert_array_equal(clf.predict(TEST), expected.predict(TEST))
+        self.assertEqual(clf.score(X, Y), expected.score(X, Y))
+
+        # the voters were fitted once, on the shared features
+        voting = clf.clf.steps[-1][1]
+        self.assertEqual(list(voting.named_estimators_), ["percep", "lr"])
+        self.assertEqual(voting.estimators_[0].n_features_in_,
+                         len(clf.clf.steps[0][1].steps[0][1].vocabulary_))
+
+    def test_soft_voting(self):
+        clf = SklearnOVOSVotingClassifier(_voters()[1:], "cv2", voting="soft")
+        # sequential unless asked, may already run inside a process pool
+        self.assertIsNone(clf._pipeline_clf.n_jobs)
+        clf.train(X, Y)
+        self.assertEqual(len(clf.predict_labels(TEST)), 3)
@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from ovos_classifiers.skovos.features import CorefIOBTaggerTransformer, PronounTaggerTransformer
+from ovos_classifiers.utils import extract_word_features, extract_postag_features, \
+    extract_sentence_word_features, extract_sentence_postag_features, get_stemmer
+
+WORDS = ["The", "dog", "he", "his", "it", "Mother", "man", "they", "3.5", "!",
+         "USA", "iPhone", "e.g.", "well-known", "__x__", "end.", "runs", "running"]
+TAGS = ["NOUN", "PROPN", "VERB", "DET", "PRON", "."]
+
+
+class FakeCorefTagger:
+    # padded like the real taggers, so every window position exists
+    def iob_tag(self, tokens):
+        return [(t[0], "B-ENTITY" if t[1] == "NOUN" else "O") for t in tokens] + [("", "O")] * 2
+
+
+class TestSentenceFeatures(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        random.seed(3)
+        cls.sentences = [[(random.choice(WORDS), random.choice(TAGS))
+                          for _ in range(random.randint(1, 12))]
+                         for _ in range(50)]
+
+    def test_word_features(self):
+        for memory in (1, 2, 3):
+            for stemmer in (None, get_stemmer("dummy")):
+                for sent in self.sentences:
+                    toks = [t[0] for t in sent]
+                    expected = [extract_word_features(toks, i, stemmer, memory=memory)
+                                for i in range(len(toks))]
+                    feats = extract_sentence_word_features(toks, stemmer, memory=memory)
+                    self.assertEqual(feats, expected)
+                    # same key order, DictVectorizer output depends on it
+                    self.assertEqual([list(f) for f in feats], [list(f) for f in expected])
+
+    def test_postag_features(self):
+        for sent in self.sentences:
+            expected = [extract_postag_features(sent, i) for i in range(len(sent))]
+            self.assertEqual(extract_sentence_postag_features(sent), expected)
+
+    def test_corefiob_features(self):
+        tagger = FakeCorefTagger()
+        for sent in self.sentences:
+            expected = [CorefIOBTaggerTransformer.extract_corefiob_features(sent, i, tagger)
+                        for i in range(len(sent))]
+            feats = CorefIOBTaggerTransformer.extract_sentence_corefiob_features(sent, tagger)
+            self.assertEqual(feats, expected)
+
+    def test_pronoun_features(self):
+        for sent in self.sentences:
+            expected = [PronounTaggerTransformer.extract_pronoun_features(sent, i)
+                        for i in range(len(sent))]
+            feats = PronounTaggerTransformer.extract_sentence_pronoun_features(sent)
+            self.assertEqual(feats, expected)
+            self.assertEqual([list(f) for f in feats], [list(f) for f in expected])
+
+
+class TestWordShape(unittest.TestCase):
+
+    def test_shapes(self):
+        from ovos_classifiers.utils import get_word_shape
+        shapes = {
+            "3.5": "number", ".5": "number", "12abc": "number",
+            "!?": "punct", "Hello": "capitalized", "USA": "uppercase",
+            "hello": "lowercase", "HelloWorld": "camelcase", "iPhone": "mixedcase",
+            "__START1__": "wildcard", "end.": "ending-dot", "e.g.": "abbreviation",
+            "well-known": "contains-hyphen", "ação": "other", "": "other"
+        }
+        for word, shape in shapes.items():
+            self.assertEqual(get_word_shape(word), shape, word)